@@ -0,0 +1,125 @@
+"""
+Synthetic local-news corpus generator for duplicate detection benchmarks.
+
+Stories are assembled from templates with enough variety (names, places,
+numbers, dates and detail sentences) that unrelated stories rarely look
+alike, while queries are built with known labels: exact copies, reformatted
+copies, paraphrases of stored stories and brand-new stories.
+"""
+import random
+
+CITIES = ["Pune", "Mumbai", "Nagpur", "Nashik", "Indore", "Bhopal", "Jaipur", "Lucknow", "Patna", "Surat",
+          "Kochi", "Mysuru", "Madurai", "Guwahati", "Ranchi", "Raipur", "Dehradun", "Shimla", "Agra", "Varanasi"]
+CATEGORIES = ["Civic", "Traffic", "Crime", "Health", "Education", "Weather", "Culture", "Sports", "Business", "Environment"]
+SUBJECTS = ["The city council", "Local police", "The municipal corporation", "Residents of {area}", "The transport department",
+            "Staff at {place}", "A school committee", "Shop owners in {area}", "The fire brigade", "Farmers near {area}",
+            "The electricity board", "Volunteers from {area}", "The water supply department", "Students of {place}", "Doctors at {place}"]
+ACTIONS = ["announced a plan to repair", "protested against the closure of", "inspected", "raised funds for",
+           "reported damage to", "opened a new wing at", "cleaned up", "demanded better lighting near",
+           "held a meeting about", "started renovating", "complained about delays at", "installed cameras at",
+           "organised a blood donation camp at", "planted trees around", "found cracks in"]
+PLACES = ["the old bridge", "the central market", "the railway station", "the public library", "the bus depot",
+          "the community hall", "the lake promenade", "the district hospital", "the main road", "the primary school",
+          "the vegetable market", "the sports ground", "the temple square", "the flyover", "the water tank"]
+AREAS = ["Shivaji Nagar", "Gandhi Chowk", "Station Road", "Old Town", "Civil Lines", "Model Colony", "Nehru Park",
+         "Market Yard", "Lake View", "Ram Nagar", "Sadar Bazaar", "Subhash Road", "MG Road", "Hill Top", "River Side"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+DETAILS = ["Work is expected to take {n} weeks.", "Officials said funding of {n} lakh rupees was approved last month.",
+           "Traffic will be diverted through {area} during the work.", "About {n} families were affected.",
+           "The decision was welcomed by residents of {area}.", "More details will be shared on {day}.",
+           "Around {n} volunteers helped through the weekend.", "The project is estimated to cost {n} crore rupees.",
+           "Police have registered a complaint against {n} people.", "A follow-up inspection is planned for {day}.",
+           "The corporator of ward {n} visited the site.", "Residents said the problem has continued for {n} years.",
+           "Power supply was cut for {n} hours.", "The hospital treated {n} people for minor injuries.",
+           "Schools in {area} will remain closed on {day}."]
+
+# Word substitutions used to paraphrase stories
+SYNONYMS = {
+    "repair": "fix", "closure": "shutting down", "inspected": "visited", "raised funds for": "collected money for",
+    "damage": "harm", "residents": "locals", "officials": "authorities", "expected": "likely",
+    "approved": "sanctioned", "affected": "hit", "complaint": "case", "planned": "scheduled",
+    "started": "began", "around": "about", "cost": "require", "people": "persons", "visited": "inspected",
+    "continued": "persisted", "problem": "issue", "minor": "small", "remain closed": "stay shut",
+}
+
+def _fill(template: str, generator: random.Random) -> str:
+    return template.format(
+        area=generator.choice(AREAS),
+        place=generator.choice(PLACES),
+        day=generator.choice(DAYS),
+        n=generator.randint(2, 400)
+    )
+
+def story(generator: random.Random) -> dict:
+    """One synthetic submission (title, description, city, category)"""
+    subject = _fill(generator.choice(SUBJECTS), generator)
+    place = generator.choice(PLACES)
+    area = generator.choice(AREAS)
+    lead = f"{subject} {generator.choice(ACTIONS)} {place} in {area} on {generator.choice(DAYS)}."
+    details = [_fill(detail, generator) for detail in generator.sample(DETAILS, generator.randint(2, 4))]
+    return {
+        "title": f"{subject} at {place.replace('the ', '').title()}",
+        "description": " ".join([lead] + details),
+        "city": generator.choice(CITIES),
+        "category": generator.choice(CATEGORIES),
+    }
+
+def reformat(description: str, generator: random.Random) -> str:
+    """Exact copy with formatting changes only (case, punctuation, whitespace)"""
+    text = description.upper() if generator.random() < 0.5 else description.lower()
+    return "  " + text.replace(".", "!").replace(" ", "  ", 3) + " "
+
+def paraphrase(description: str, generator: random.Random) -> str:
+    """Reworded copy: synonyms, reordered detail sentences and one added or dropped sentence"""
+    text = description
+    for word, synonym in generator.sample(list(SYNONYMS.items()), 8):
+        text = text.replace(word, synonym)
+
+    sentences = [sentence.strip() for sentence in text.split(".") if sentence.strip()]
+    lead, details = sentences[0], sentences[1:]
+    generator.shuffle(details)
+    if len(details) > 2 and generator.random() < 0.5:
+        details.pop()
+    else:
+        details.append(_fill(generator.choice(DETAILS), generator).rstrip("."))
+    return ". ".join([lead] + details) + "."
+
+def generate_corpus(size: int, seed: int = 0) -> list:
+    """Stored submissions with ids 0..size-1"""
+    generator = random.Random(seed)
+    corpus = []
+    for entry_id in range(size):
+        submission = story(generator)
+        submission["id"] = entry_id
+        corpus.append(submission)
+    return corpus
+
+def generate_queries(corpus: list, count: int, seed: int = 1,
+                     exact_share: float = 0.15, reformat_share: float = 0.15, paraphrase_share: float = 0.3) -> list:
+    """
+    Labelled queries against a corpus.
+
+    Each query has "kind" (exact, reformatted, paraphrase or new) and
+    "expected" (the id of the stored story it copies, or None).
+    """
+    generator = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        roll = generator.random()
+        if roll >= exact_share + reformat_share + paraphrase_share:
+            query = story(generator)
+            query.update(kind="new", expected=None)
+        else:
+            original = generator.choice(corpus)
+            query = {key: original[key] for key in ("title", "description", "city", "category")}
+            if roll < exact_share:
+                kind = "exact"
+            elif roll < exact_share + reformat_share:
+                kind = "reformatted"
+                query["description"] = reformat(original["description"], generator)
+            else:
+                kind = "paraphrase"
+                query["description"] = paraphrase(original["description"], generator)
+            query.update(kind=kind, expected=str(original["id"]))
+        queries.append(query)
+    return queries
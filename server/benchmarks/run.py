@@ -0,0 +1,167 @@
+"""
+Benchmark DuplicateChecker throughput, latency, memory and accuracy on synthetic corpora.
+
+Runs fully offline (no database, no Google APIs) and writes a JSON file
+that can be diffed between versions. Every run gets its own process, so the
+peak memory reported for one run is not inherited from an earlier, larger one.
+
+Usage (from the server directory):
+    python -m benchmarks.run --sizes 10000 100000 [--queries 1000] [--vectorizers tfidf hashing] [--lsh]
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from benchmarks.corpus import generate_corpus, generate_queries
+from services.duplicate_check import DuplicateChecker, VECTORIZERS, SCOPE_FIELDS
+
+DEFAULT_THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.9]
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process so far (ru_maxrss is in KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def accuracy(queries: list, results: list, thresholds: list) -> dict:
+    """Precision, recall and F1 per threshold, plus recall per kind of copy"""
+    report = {}
+    expected = sum(1 for query in queries if query["expected"] is not None)
+    for threshold in thresholds:
+        flagged = [result.is_duplicate and result.similarity_score >= threshold for result in results]
+        correct = [
+            is_flagged and result.duplicate_entry_id == query["expected"]
+            for query, result, is_flagged in zip(queries, results, flagged)
+        ]
+        precision = sum(correct) / sum(flagged) if any(flagged) else 0.0
+        recall = sum(correct) / expected if expected else 0.0
+
+        by_kind = {}
+        for kind in ("exact", "reformatted", "paraphrase"):
+            positions = [j for j, query in enumerate(queries) if query["kind"] == kind]
+            if positions:
+                by_kind[kind] = round(sum(correct[j] for j in positions) / len(positions), 4)
+
+        report[str(threshold)] = {
+            "precision": round(precision, 4),
+            "recall": round(recall, 4),
+            "f1": round(2 * precision * recall / (precision + recall), 4) if precision + recall else 0.0,
+            "recall_by_kind": by_kind,
+        }
+    return report
+
+def run_one(corpus: list, queries: list, vectorizer: str, use_lsh: bool, scope: str, thresholds: list, latency_samples: int) -> dict:
+    checker = DuplicateChecker(use_lsh=use_lsh, scope=scope, window_days=0, vectorizer=vectorizer, snapshot_dir="")
+
+    rss_before_build = peak_rss_mb()
+    started = time.perf_counter()
+    checker.load(corpus)
+    build_seconds = time.perf_counter() - started
+
+    # Latency of single checks, as the API does them
+    latencies = []
+    for query in queries[:latency_samples]:
+        started = time.perf_counter()
+        checker.check_duplicates_batch([query], within_batch=False)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    # Throughput of one batch, as the sheet sync does it
+    started = time.perf_counter()
+    results = checker.check_duplicates_batch(queries, within_batch=False)
+    batch_seconds = time.perf_counter() - started
+
+    return {
+        "corpus_size": len(corpus),
+        "vectorizer": vectorizer,
+        "use_lsh": use_lsh,
+        "scope": scope,
+        "features": checker.vectorizer.n_features,
+        "build_seconds": round(build_seconds, 3),
+        "latency_ms": {
+            "p50": round(float(np.percentile(latencies, 50)), 3),
+            "p90": round(float(np.percentile(latencies, 90)), 3),
+            "p99": round(float(np.percentile(latencies, 99)), 3),
+            "max": round(max(latencies), 3),
+        },
+        "batch_throughput_per_second": round(len(queries) / batch_seconds, 1),
+        "peak_rss_mb": peak_rss_mb(),
+        # Growth of the peak over the corpus and queries alone: the index and its scoring
+        "index_rss_mb": round(peak_rss_mb() - rss_before_build, 1),
+        "accuracy": accuracy(queries, results, thresholds),
+    }
+
+def run_in_process(size: int, seed: int, query_count: int, vectorizer: str, use_lsh: bool, scope: str, thresholds: list, latency_samples: int) -> dict:
+    """Generate the corpus and run one benchmark; called in a fresh process per run"""
+    # Check against the lowest threshold so every result carries the score needed for the sweep
+    config.DUPLICATE_THRESHOLD = min(thresholds)
+    # Per-check INFO logs would be timed along with the checks
+    logging.getLogger("services.duplicate_check").setLevel(logging.WARNING)
+
+    corpus = generate_corpus(size, seed=seed)
+    queries = generate_queries(corpus, query_count, seed=seed + 1)
+    return run_one(corpus, queries, vectorizer, use_lsh, scope, thresholds, latency_samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark duplicate detection on synthetic corpora")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000], help="Corpus sizes to benchmark (e.g. 10000 100000 1000000)")
+    parser.add_argument("--queries", type=int, default=1000, help="Labelled queries per run")
+    parser.add_argument("--latency-samples", type=int, default=200, help="Queries timed one at a time")
+    parser.add_argument("--vectorizers", nargs="+", default=["tfidf"], choices=list(VECTORIZERS), help="Vectorizers to benchmark")
+    parser.add_argument("--lsh", action="store_true", help="Also benchmark with LSH candidate lookup")
+    parser.add_argument("--scope", default="global", choices=list(SCOPE_FIELDS), help="Duplicate scope")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=DEFAULT_THRESHOLDS, help="Thresholds to report accuracy for")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus")
+    parser.add_argument("--output-dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "results"), help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    runs = []
+    for size in args.sizes:
+        for vectorizer in args.vectorizers:
+            for use_lsh in ([False, True] if args.lsh else [False]):
+                print(f"Benchmarking {size} submissions with {vectorizer}{' + LSH' if use_lsh else ''}...")
+                # A fresh (spawned) process per run, so ru_maxrss only covers this run
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                    run = executor.submit(
+                        run_in_process, size, args.seed, args.queries, vectorizer, use_lsh,
+                        args.scope, args.thresholds, args.latency_samples
+                    ).result()
+                runs.append(run)
+                best = max(run["accuracy"].items(), key=lambda item: item[1]["f1"])
+                print(f"  build {run['build_seconds']}s, p50 {run['latency_ms']['p50']}ms, p99 {run['latency_ms']['p99']}ms, "
+                      f"{run['batch_throughput_per_second']}/s batched, peak RSS {run['peak_rss_mb']}MB "
+                      f"({run['index_rss_mb']}MB for the index), best F1 {best[1]['f1']} at {best[0]}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output = os.path.join(args.output_dir, f"duplicate_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output, "w") as f:
+        json.dump({
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "settings": {"queries": args.queries, "seed": args.seed, "thresholds": args.thresholds},
+            "runs": runs,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -7,14 +7,66 @@ load_dotenv()
 # Google Sheets configuration
 GOOGLE_CREDENTIALS_FILE = os.getenv("GOOGLE_CREDENTIALS_FILE")
 SPREADSHEET_ID = os.getenv("SPREADSHEET_ID")
+SHEET_SOURCES = os.getenv("SHEET_SOURCES", "")  # JSON list of sheets to ingest, or a path to a JSON file (empty = SPREADSHEET_ID only)
 
 # Groq API configuration (replacing OpenAI)
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
 # App settings
 DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", "0.8"))
+DUPLICATE_IDF_REFRESH_SECONDS = int(os.getenv("DUPLICATE_IDF_REFRESH_SECONDS", "3600"))  # How often the duplicate index recomputes IDF
+DUPLICATE_SCOPE = os.getenv("DUPLICATE_SCOPE", "city")  # global, city, category or city_category
+DUPLICATE_WINDOW_DAYS = float(os.getenv("DUPLICATE_WINDOW_DAYS", "14"))  # Only compare against recent stories (0 = all history)
+DUPLICATE_VECTORIZER = os.getenv("DUPLICATE_VECTORIZER", "tfidf")  # tfidf (growing vocabulary) or hashing (fixed width)
+DUPLICATE_HASH_FEATURES = int(os.getenv("DUPLICATE_HASH_FEATURES", str(2 ** 18)))  # Columns used by the hashing vectorizer
+DUPLICATE_SCORE_BLOCK_ROWS = int(os.getenv("DUPLICATE_SCORE_BLOCK_ROWS", "5000"))  # Rows per block for full re-scans
+DUPLICATE_SNAPSHOT_DIR = os.getenv("DUPLICATE_SNAPSHOT_DIR", "data/duplicate_index")  # On-disk index snapshot (empty = disabled)
+DUPLICATE_CATCH_UP_LOOKBACK_SECONDS = int(os.getenv("DUPLICATE_CATCH_UP_LOOKBACK_SECONDS", "60"))  # Re-read rows approved this long before the last catch-up (late commits)
 MIN_DESCRIPTION_LENGTH = int(os.getenv("MIN_DESCRIPTION_LENGTH", "50"))
 
+# MinHash/LSH candidate lookup for duplicate detection
+DUPLICATE_LSH_ENABLED = os.getenv("DUPLICATE_LSH_ENABLED", "false").lower() == "true"
+LSH_NUM_PERM = int(os.getenv("LSH_NUM_PERM", "128"))  # Signature length
+LSH_BANDS = int(os.getenv("LSH_BANDS", "32"))  # Must divide LSH_NUM_PERM
+LSH_SHINGLE_SIZE = int(os.getenv("LSH_SHINGLE_SIZE", "5"))  # Characters per shingle
+
+# Perceptual image hashing for re-uploaded photos
+IMAGE_HASH_METHOD = os.getenv("IMAGE_HASH_METHOD", "phash")  # ahash, dhash or phash
+IMAGE_HASH_MAX_DISTANCE = int(os.getenv("IMAGE_HASH_MAX_DISTANCE", "6"))  # Max differing bits (of 64) for a match
+
+# Google Sheets sync settings
+SYNC_FULL_RECONCILE_SECONDS = int(os.getenv("SYNC_FULL_RECONCILE_SECONDS", "3600"))  # How often to re-read the whole sheet
+SYNC_POLL_MIN_SECONDS = int(os.getenv("SYNC_POLL_MIN_SECONDS", "150"))  # Fallback polling interval after new rows
+SYNC_POLL_MAX_SECONDS = int(os.getenv("SYNC_POLL_MAX_SECONDS", "1800"))  # Polling backs off up to this while nothing changes
+SYNC_TRIGGER_DEBOUNCE_SECONDS = float(os.getenv("SYNC_TRIGGER_DEBOUNCE_SECONDS", "2.0"))  # Triggers within this window share one sync
+SYNC_TRIGGER_TOKEN = os.getenv("SYNC_TRIGGER_TOKEN", "")  # Shared secret required by POST /sync/trigger (empty = triggers are refused)
+SYNC_DOWNLOAD_CONCURRENCY = int(os.getenv("SYNC_DOWNLOAD_CONCURRENCY", "8"))  # Image downloads in flight per sync
+SYNC_MODERATION_CONCURRENCY = int(os.getenv("SYNC_MODERATION_CONCURRENCY", "4"))  # Moderation calls in flight per sync
+SYNC_SOURCE_CONCURRENCY = int(os.getenv("SYNC_SOURCE_CONCURRENCY", "2"))  # Sheet sources processing a chunk at the same time; the others wait their turn
+SHEETS_MARK_FLUSH_ROWS = int(os.getenv("SHEETS_MARK_FLUSH_ROWS", "200"))  # Buffered sheet marks that trigger a batchUpdate
+SHEETS_WRITE_RETRIES = int(os.getenv("SHEETS_WRITE_RETRIES", "3"))  # Retries of a failed batchUpdate
+SHEETS_WRITE_RETRY_SECONDS = float(os.getenv("SHEETS_WRITE_RETRY_SECONDS", "1.0"))  # First retry delay, doubled each time
+SHEETS_READ_CHUNK_ROWS = int(os.getenv("SHEETS_READ_CHUNK_ROWS", "500"))  # Rows per sheet read; bounds the rows a sync holds at once
+SHEETS_CACHE_TTL_SECONDS = float(os.getenv("SHEETS_CACHE_TTL_SECONDS", "30"))  # How long a cached sheet read is served as fresh
+SHEETS_CACHE_STALE_SECONDS = float(os.getenv("SHEETS_CACHE_STALE_SECONDS", "300"))  # How long after that it is served while refreshing in the background
+
+# Leader election: only the process holding the lock runs the sync loop
+LEADER_HEARTBEAT_SECONDS = float(os.getenv("LEADER_HEARTBEAT_SECONDS", "10"))  # Lock checks, heartbeats and election retries
+LEADER_LOCK_FILE = os.getenv("LEADER_LOCK_FILE", "data/sync_leader.lock")  # File lock used when the database is not PostgreSQL
+
+# Ingestion: "inline" processes rows inside the sync; "queue" stores them as jobs for worker.py
+INGESTION_MODE = os.getenv("INGESTION_MODE", "inline")
+INGESTION_WORKER_POOL_SIZE = int(os.getenv("INGESTION_WORKER_POOL_SIZE", "4"))  # Jobs a worker claims and processes together
+INGESTION_LEASE_SECONDS = int(os.getenv("INGESTION_LEASE_SECONDS", "300"))  # Claimed jobs return to the queue after this
+INGESTION_MAX_ATTEMPTS = int(os.getenv("INGESTION_MAX_ATTEMPTS", "5"))  # Attempts before a row is dead-lettered
+INGESTION_RETRY_BASE_SECONDS = int(os.getenv("INGESTION_RETRY_BASE_SECONDS", "300"))  # Wait before the first retry, doubled after each failure
+INGESTION_RETRY_MAX_SECONDS = int(os.getenv("INGESTION_RETRY_MAX_SECONDS", "21600"))  # Longest wait between retries
+INGESTION_POLL_SECONDS = float(os.getenv("INGESTION_POLL_SECONDS", "5"))  # Worker sleep when the queue is empty
+
+# Thread pools for blocking work called from async code
+IO_EXECUTOR_WORKERS = int(os.getenv("IO_EXECUTOR_WORKERS", "16"))  # Sheets, Drive, Groq and file I/O
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "4"))  # Database sessions and duplicate index work
+
 # Supported image formats
 ALLOWED_IMAGE_EXTENSIONS = {"jpg", "jpeg", "png"}
 
@@ -1,5 +1,9 @@
+import json
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session
 from db import models
+import config
 from models import NewsSubmission, ValidationResult, DuplicateCheckResult, ImageModerationResult
 from typing import List
 from utils.logger import setup_logger
@@ -12,9 +16,16 @@ def create_submission(
     submission: NewsSubmission,
     validation: ValidationResult,
     duplicate: DuplicateCheckResult,
-    moderation: ImageModerationResult
+    moderation: ImageModerationResult,
+    fingerprints: dict = None,
+    ledger_entry: dict = None
 ) -> models.Submission:
-    """Create a new submission record with validation, duplicate check, and moderation results"""
+    """Create a new submission record with validation, duplicate check, and moderation results
+    
+    fingerprints holds extra duplicate-detection columns (see DuplicateChecker.fingerprints)
+    ledger_entry (source, row_timestamp, row_hash, row_index) records the sheet row in the
+    ingestion ledger in the same transaction as the submission
+    """
     
     # Determine overall status
     status = "approved"
@@ -36,10 +47,14 @@ def create_submission(
         duplicate_score=duplicate.similarity_score,
         duplicate_reference_id=duplicate.duplicate_entry_id,
         is_appropriate_image=moderation.is_appropriate,
-        status=status
+        status=status,
+        **(fingerprints or {})
     )
     
     db.add(db_submission)
+    if ledger_entry:
+        db.flush()
+        db.add(models.IngestionLedger(submission_id=db_submission.id, **ledger_entry))
     db.commit()
     db.refresh(db_submission)
     
@@ -70,6 +85,72 @@ def create_submission(
     
     return db_submission
 
+def update_submission(
+    db: Session,
+    submission_id: int,
+    submission: NewsSubmission,
+    validation: ValidationResult,
+    duplicate: DuplicateCheckResult,
+    moderation: ImageModerationResult,
+    fingerprints: dict = None,
+    ledger_entry: dict = None
+) -> models.Submission:
+    """Replace a stored submission with a new version of its sheet row (edited after it was ingested)
+    
+    The submission keeps its ID; its fields, status, fingerprints, validation errors and
+    moderation result are replaced, and the row's ingestion ledger entry moves to the new
+    row_hash, all in one transaction
+    """
+    db_submission = get_submission(db, submission_id)
+    
+    # Determine overall status
+    status = "approved"
+    if not validation.is_valid or duplicate.is_duplicate or not moderation.is_appropriate:
+        status = "rejected"
+    
+    db_submission.title = submission.title
+    db_submission.description = submission.description
+    db_submission.city = submission.city
+    db_submission.category = submission.category
+    db_submission.publisher_name = submission.publisher_name
+    db_submission.publisher_phone = submission.publisher_phone
+    db_submission.image_path = submission.image_path
+    db_submission.original_image_url = submission.original_image_url
+    db_submission.is_valid = validation.is_valid
+    db_submission.is_duplicate = duplicate.is_duplicate
+    db_submission.duplicate_score = duplicate.similarity_score
+    db_submission.duplicate_reference_id = duplicate.duplicate_entry_id
+    db_submission.is_appropriate_image = moderation.is_appropriate
+    db_submission.status = status
+    db_submission.updated_at = datetime.now(timezone.utc)
+    for column in ("content_hash", "minhash_signature", "image_hash"):
+        setattr(db_submission, column, (fingerprints or {}).get(column))
+    
+    # Results of the previous version
+    db.query(models.ValidationError).filter(models.ValidationError.submission_id == submission_id).delete(synchronize_session=False)
+    db.query(models.ModerationResult).filter(models.ModerationResult.submission_id == submission_id).delete(synchronize_session=False)
+    for error in validation.errors:
+        db.add(models.ValidationError(submission_id=submission_id, error_message=error))
+    if not moderation.is_appropriate and moderation.reason:
+        db.add(models.ModerationResult(submission_id=submission_id, is_appropriate=moderation.is_appropriate, reason=moderation.reason))
+    
+    if ledger_entry:
+        entry = db.query(models.IngestionLedger).filter(
+            models.IngestionLedger.source == ledger_entry["source"],
+            models.IngestionLedger.submission_id == submission_id
+        ).first()
+        if entry is None:
+            db.add(models.IngestionLedger(submission_id=submission_id, **ledger_entry))
+        else:
+            entry.row_hash = ledger_entry["row_hash"]
+            entry.row_index = ledger_entry["row_index"]
+    
+    db.commit()
+    db.refresh(db_submission)
+    
+    logger.info(f"Updated submission ID {submission_id} from an edited sheet row, status {status}")
+    return db_submission
+
 def get_all_submissions(db: Session, skip: int = 0, limit: int = 100) -> List[models.Submission]:
     """Get all submissions with pagination"""
     return db.query(models.Submission).order_by(models.Submission.created_at.desc()).offset(skip).limit(limit).all()
@@ -78,6 +159,383 @@ def get_submission(db: Session, submission_id: int) -> models.Submission:
     """Get a specific submission by ID"""
     return db.query(models.Submission).filter(models.Submission.id == submission_id).first()
 
+def get_approved_submission_by_content_hash(db: Session, content_hash: str) -> models.Submission:
+    """Get the approved submission with a content hash (the unique index allows at most one)"""
+    return db.query(models.Submission).filter(
+        models.Submission.content_hash == content_hash,
+        models.Submission.status == "approved"
+    ).first()
+
+def get_ingested_rows(db: Session, source: str, rows: list) -> set:
+    """(timestamp, row_hash) pairs among rows that are already in the ingestion ledger, checked with one query"""
+    timestamps = {row["timestamp"] for row in rows}
+    if not timestamps:
+        return set()
+
+    entries = db.query(models.IngestionLedger.row_timestamp, models.IngestionLedger.row_hash).filter(
+        models.IngestionLedger.source == source,
+        models.IngestionLedger.row_timestamp.in_(timestamps)
+    ).all()
+    return {(entry.row_timestamp, entry.row_hash) for entry in entries}
+
+def diff_rows(db: Session, source: str, rows: list) -> tuple:
+    """
+    Classify sheet rows against the ingestion ledger with one query.
+    
+    Returns (new rows, changed rows, number of unchanged rows). A row is
+    unchanged when its timestamp and row hash are in the ledger. It is changed
+    when the ledger has its timestamp with another hash, i.e. the row was
+    edited in the sheet after it was ingested; changed rows come as
+    (row, ledger entry) pairs. Responses sharing a timestamp are told apart
+    by their hashes and, failing that, by their row position.
+    """
+    timestamps = {row["timestamp"] for row in rows}
+    if not timestamps:
+        return [], [], 0
+
+    entries = db.query(models.IngestionLedger).filter(
+        models.IngestionLedger.source == source,
+        models.IngestionLedger.row_timestamp.in_(timestamps)
+    ).all()
+    by_timestamp = {}
+    for entry in entries:
+        by_timestamp.setdefault(entry.row_timestamp, []).append(entry)
+
+    # Ledger entries of rows that are in this read unchanged cannot be the previous version of another row
+    read_keys = {(row["timestamp"], row["row_hash"]) for row in rows}
+
+    new_rows, changed_rows, unchanged = [], [], 0
+    for row in rows:
+        candidates = by_timestamp.get(row["timestamp"], [])
+        if any(entry.row_hash == row["row_hash"] for entry in candidates):
+            unchanged += 1
+            continue
+
+        candidates = [entry for entry in candidates if (entry.row_timestamp, entry.row_hash) not in read_keys]
+        if len(candidates) > 1:
+            candidates = [entry for entry in candidates if entry.row_index == row["row_index"]]
+        if len(candidates) == 1 and candidates[0].submission_id is not None:
+            changed_rows.append((row, candidates[0]))
+            by_timestamp[row["timestamp"]].remove(candidates[0])  # Each entry is the previous version of one row only
+        else:
+            new_rows.append(row)
+    return new_rows, changed_rows, unchanged
+
+def count_ingested_rows(db: Session, source: str) -> int:
+    """Number of sheet rows ingested from a source"""
+    return db.query(models.IngestionLedger).filter(models.IngestionLedger.source == source).count()
+
+def get_sync_state(db: Session, source: str) -> models.SyncState:
+    """Get the sync watermark of a sheet (None if it was never synced)"""
+    return db.query(models.SyncState).filter(models.SyncState.source == source).first()
+
+def update_sync_state(db: Session, source: str, last_row: int, last_row_hash: str, full_sync_time=None) -> models.SyncState:
+    """Move the sync watermark of a sheet, recording the time of a full reconciliation pass if given"""
+    state = get_sync_state(db, source)
+    if state is None:
+        state = models.SyncState(source=source)
+        db.add(state)
+
+    state.last_row = last_row
+    state.last_row_hash = last_row_hash
+    if full_sync_time is not None:
+        state.last_full_sync = full_sync_time
+
+    db.commit()
+    db.refresh(state)
+    return state
+
+def enqueue_jobs(db: Session, source: str, rows: list) -> int:
+    """Queue sheet rows for the ingestion workers, skipping rows already queued; returns the number queued"""
+    timestamps = {row["timestamp"] for row in rows}
+    if not timestamps:
+        return 0
+
+    queued_rows = {
+        (job.row_timestamp, job.row_hash)
+        for job in db.query(models.SubmissionJob.row_timestamp, models.SubmissionJob.row_hash).filter(
+            models.SubmissionJob.source == source,
+            models.SubmissionJob.row_timestamp.in_(timestamps)
+        )
+    }
+
+    queued = 0
+    for row in rows:
+        key = (row["timestamp"], row["row_hash"])
+        if key in queued_rows:
+            continue
+        queued_rows.add(key)
+        db.add(models.SubmissionJob(
+            source=source,
+            row_timestamp=row["timestamp"],
+            row_hash=row["row_hash"],
+            row_index=row["row_index"],
+            payload=json.dumps(dict(row)),
+            state="pending"
+        ))
+        queued += 1
+
+    db.commit()
+    return queued
+
+def claim_jobs(db: Session, worker_id: str, limit: int, lease_seconds: int, max_attempts: int) -> List[models.SubmissionJob]:
+    """
+    Lease up to limit jobs to a worker, oldest first.
+
+    Pending jobs are claimed, and so are running jobs whose lease expired
+    (their worker died). FOR UPDATE SKIP LOCKED lets concurrent workers claim
+    different jobs without waiting for each other; SQLite ignores it.
+    """
+    now = datetime.now(timezone.utc)
+    expired = and_(models.SubmissionJob.state == "running", models.SubmissionJob.lease_expires_at < now)
+
+    # Jobs whose worker died on the last allowed attempt are not retried
+    for job in db.query(models.SubmissionJob).filter(expired, models.SubmissionJob.attempts >= max_attempts):
+        job.state = "failed"
+        job.last_error = "Lease expired on the last attempt"
+        job.lease_expires_at = None
+        _dead_letter(db, job.source, json.loads(job.payload), job.attempts, job.last_error, job_id=job.id)
+
+    # Pending jobs wait out their retry backoff
+    due = or_(models.SubmissionJob.next_attempt_at.is_(None), models.SubmissionJob.next_attempt_at <= now)
+    jobs = db.query(models.SubmissionJob).filter(
+        or_(and_(models.SubmissionJob.state == "pending", due), expired)
+    ).order_by(models.SubmissionJob.id).limit(limit).with_for_update(skip_locked=True).all()
+
+    for job in jobs:
+        job.state = "running"
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.lease_expires_at = now + timedelta(seconds=lease_seconds)
+
+    db.commit()
+    for job in jobs:
+        db.refresh(job)
+    return jobs
+
+def complete_job(db: Session, job_id: int, submission_id: int = None):
+    """Mark a job done, linking the submission it produced"""
+    db.query(models.SubmissionJob).filter(models.SubmissionJob.id == job_id).update(
+        {"state": "done", "submission_id": submission_id, "lease_expires_at": None, "last_error": None},
+        synchronize_session=False
+    )
+    db.commit()
+
+def fail_job(db: Session, job_id: int, error: str, max_attempts: int) -> bool:
+    """
+    Return a failed job to the queue after a backoff, or mark it failed and
+    dead-letter its row once it has used all its attempts (returns True then).
+    """
+    job = db.query(models.SubmissionJob).filter(models.SubmissionJob.id == job_id).first()
+    if job is None:
+        return False
+    job.last_error = error
+    job.lease_expires_at = None
+
+    dead = job.attempts >= max_attempts
+    if dead:
+        job.state = "failed"
+        _dead_letter(db, job.source, json.loads(job.payload), job.attempts, error, job_id=job.id)
+    else:
+        job.state = "pending"
+        job.next_attempt_at = datetime.now(timezone.utc) + retry_delay(job.attempts)
+    db.commit()
+    return dead
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff after a number of failed attempts: base, 2 x base, 4 x base... up to the maximum"""
+    seconds = config.INGESTION_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, config.INGESTION_RETRY_MAX_SECONDS))
+
+def _dead_letter(db: Session, source: str, row: dict, attempts: int, error: str, job_id: int = None):
+    """Add (or refresh) a row in the dead-letter table; the caller commits"""
+    entry = db.query(models.DeadLetterRow).filter(
+        models.DeadLetterRow.source == source,
+        models.DeadLetterRow.row_timestamp == row["timestamp"],
+        models.DeadLetterRow.row_hash == row["row_hash"]
+    ).first()
+    if entry is None:
+        entry = models.DeadLetterRow(source=source, row_timestamp=row["timestamp"], row_hash=row["row_hash"])
+        db.add(entry)
+
+    entry.row_index = row.get("row_index")
+    entry.payload = json.dumps(dict(row))
+    entry.attempts = attempts
+    entry.last_error = error
+    entry.job_id = job_id
+    logger.warning(f"Dead-lettered sheet row {entry.row_index + 2 if entry.row_index is not None else '?'} of {source} after {attempts} attempts: {error}")
+
+def record_row_failure(db: Session, source: str, row: dict, error: str, max_attempts: int) -> bool:
+    """
+    Count a failed inline ingestion of a sheet row and schedule its retry with
+    exponential backoff. Returns True if the row used its last attempt and was
+    dead-lettered instead.
+    """
+    failure = db.query(models.RowFailure).filter(
+        models.RowFailure.source == source,
+        models.RowFailure.row_timestamp == row["timestamp"],
+        models.RowFailure.row_hash == row["row_hash"]
+    ).first()
+    if failure is None:
+        failure = models.RowFailure(source=source, row_timestamp=row["timestamp"], row_hash=row["row_hash"], attempts=0)
+        db.add(failure)
+
+    failure.row_index = row.get("row_index")
+    failure.payload = json.dumps(dict(row))
+    failure.attempts += 1
+    failure.last_error = error
+
+    dead = failure.attempts >= max_attempts
+    if dead:
+        _dead_letter(db, source, row, failure.attempts, error)
+        db.delete(failure)
+    else:
+        failure.next_attempt_at = datetime.now(timezone.utc) + retry_delay(failure.attempts)
+    db.commit()
+    return dead
+
+def get_held_back_rows(db: Session, source: str, rows: list) -> set:
+    """(timestamp, row_hash) pairs among rows that are dead-lettered or still waiting out a retry backoff"""
+    timestamps = {row["timestamp"] for row in rows}
+    if not timestamps:
+        return set()
+
+    now = datetime.now(timezone.utc)
+    waiting = db.query(models.RowFailure.row_timestamp, models.RowFailure.row_hash).filter(
+        models.RowFailure.source == source,
+        models.RowFailure.row_timestamp.in_(timestamps),
+        models.RowFailure.next_attempt_at > now
+    ).all()
+    dead = db.query(models.DeadLetterRow.row_timestamp, models.DeadLetterRow.row_hash).filter(
+        models.DeadLetterRow.source == source,
+        models.DeadLetterRow.row_timestamp.in_(timestamps)
+    ).all()
+    return {(entry.row_timestamp, entry.row_hash) for entry in waiting + dead}
+
+def get_due_row_failures(db: Session, source: str) -> list:
+    """Rows (as read from the sheet) whose retry backoff has passed"""
+    failures = db.query(models.RowFailure.payload).filter(
+        models.RowFailure.source == source,
+        models.RowFailure.next_attempt_at <= datetime.now(timezone.utc)
+    ).order_by(models.RowFailure.row_index).all()
+    return [json.loads(failure.payload) for failure in failures]
+
+def clear_row_failures(db: Session, source: str, rows: list):
+    """Forget the failures of rows that have now been ingested"""
+    keys = {(row["timestamp"], row["row_hash"]) for row in rows}
+    if not keys:
+        return
+    failures = db.query(models.RowFailure).filter(
+        models.RowFailure.source == source,
+        models.RowFailure.row_timestamp.in_({timestamp for timestamp, _ in keys})
+    ).all()
+    for failure in failures:
+        if (failure.row_timestamp, failure.row_hash) in keys:
+            db.delete(failure)
+    db.commit()
+
+def get_dead_letters(db: Session, skip: int = 0, limit: int = 100) -> List[models.DeadLetterRow]:
+    """Dead-lettered rows, newest first"""
+    return db.query(models.DeadLetterRow).order_by(models.DeadLetterRow.id.desc()).offset(skip).limit(limit).all()
+
+def requeue_dead_letter(db: Session, dead_letter_id: int) -> bool:
+    """
+    Give a dead-lettered row a fresh set of attempts, starting right away.
+
+    Rows from the job queue go back to their job; rows from inline syncs are
+    retried by the next sync. Returns False if there is no such row.
+    """
+    entry = db.query(models.DeadLetterRow).filter(models.DeadLetterRow.id == dead_letter_id).first()
+    if entry is None:
+        return False
+
+    job = None
+    if entry.job_id is not None:
+        job = db.query(models.SubmissionJob).filter(models.SubmissionJob.id == entry.job_id).first()
+    if job is not None:
+        job.state = "pending"
+        job.attempts = 0
+        job.next_attempt_at = None
+        job.last_error = None
+    else:
+        db.add(models.RowFailure(
+            source=entry.source,
+            row_timestamp=entry.row_timestamp,
+            row_hash=entry.row_hash,
+            row_index=entry.row_index,
+            payload=entry.payload,
+            attempts=0,
+            next_attempt_at=datetime.now(timezone.utc),
+            last_error=entry.last_error
+        ))
+
+    db.delete(entry)
+    db.commit()
+    return True
+
+def count_jobs(db: Session) -> dict:
+    """Number of jobs in each state"""
+    rows = db.query(models.SubmissionJob.state, func.count(models.SubmissionJob.id)).group_by(models.SubmissionJob.state).all()
+    return {state: count for state, count in rows}
+
+def get_leader(db: Session, name: str) -> models.ServiceLeader:
+    """Get the recorded leader of a singleton task (None if no process ever led it)"""
+    return db.query(models.ServiceLeader).filter(models.ServiceLeader.name == name).first()
+
+def record_leader(db: Session, name: str, holder: str) -> models.ServiceLeader:
+    """Record that a process just became the leader"""
+    leader = get_leader(db, name)
+    if leader is None:
+        leader = models.ServiceLeader(name=name)
+        db.add(leader)
+
+    now = datetime.now(timezone.utc)
+    leader.holder = holder
+    leader.acquired_at = now
+    leader.heartbeat_at = now
+    # Wake-ups requested before the election are covered by the new leader's first run
+    leader.trigger_sources = None
+    db.commit()
+    db.refresh(leader)
+    return leader
+
+def leader_heartbeat(db: Session, name: str, holder: str) -> tuple:
+    """
+    Refresh the leader's heartbeat.
+    
+    Returns the time another process last asked it to run (or None) and the
+    sources requested since the last heartbeat, which are taken off the row
+    (None in the list stands for every source).
+    """
+    leader = db.query(models.ServiceLeader).filter(models.ServiceLeader.name == name).with_for_update().first()
+    if leader is None or leader.holder != holder:
+        db.commit()
+        leader = record_leader(db, name, holder)
+        return leader.trigger_requested_at, []
+    
+    sources = json.loads(leader.trigger_sources) if leader.trigger_sources else []
+    leader.heartbeat_at = datetime.now(timezone.utc)
+    leader.trigger_sources = None
+    db.commit()
+    db.refresh(leader)
+    return leader.trigger_requested_at, sources
+
+def request_leader_trigger(db: Session, name: str, source: str = None) -> bool:
+    """Ask the leader (in whichever process it runs) to sync one source, or every source, soon; False if there is no leader yet"""
+    # Row lock, so concurrent requests add to the list instead of overwriting each other
+    leader = db.query(models.ServiceLeader).filter(models.ServiceLeader.name == name).with_for_update().first()
+    if leader is None:
+        db.commit()
+        return False
+    
+    sources = json.loads(leader.trigger_sources) if leader.trigger_sources else []
+    if source not in sources:
+        sources.append(source)
+    leader.trigger_sources = json.dumps(sources)
+    leader.trigger_requested_at = datetime.now(timezone.utc)
+    db.commit()
+    return True
+
 def get_submissions_by_status(db: Session, status: str, skip: int = 0, limit: int = 100) -> List[models.Submission]:
     """Get submissions by status (approved, rejected, pending)"""
     return db.query(models.Submission).filter(models.Submission.status == status).order_by(models.Submission.created_at.desc()).offset(skip).limit(limit).all()
@@ -0,0 +1,146 @@
+"""
+Migration script to add content_hash column to submissions table,
+backfill it for existing submissions and create its indexes
+"""
+import sys
+import os
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import text
+from db.database import engine
+from utils.logger import setup_logger
+
+logger = setup_logger("db.migration")
+
+def add_content_hash_column():
+    """Add content_hash column to submissions table"""
+    try:
+        # Check if column already exists
+        with engine.connect() as conn:
+            result = conn.execute(text("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name='submissions' AND column_name='content_hash';
+            """))
+            column_exists = result.fetchone() is not None
+
+            if column_exists:
+                logger.info("Column 'content_hash' already exists in submissions table")
+                return True
+
+            # Add the column
+            conn.execute(text("""
+                ALTER TABLE submissions
+                ADD COLUMN content_hash VARCHAR(64);
+            """))
+            conn.commit()
+
+            logger.info("Successfully added 'content_hash' column to submissions table")
+            return True
+
+    except Exception as e:
+        logger.error(f"Error adding column: {str(e)}")
+        return False
+
+def backfill_content_hashes(batch_size=500):
+    """Compute content hashes for submissions that do not have one yet"""
+    from services.duplicate_check import content_fingerprint
+
+    updated = 0
+    try:
+        with engine.connect() as conn:
+            while True:
+                rows = conn.execute(text("""
+                    SELECT id, title, description FROM submissions
+                    WHERE content_hash IS NULL
+                    ORDER BY id
+                    LIMIT :limit;
+                """), {"limit": batch_size}).fetchall()
+
+                if not rows:
+                    break
+
+                conn.execute(
+                    text("UPDATE submissions SET content_hash = :content_hash WHERE id = :id"),
+                    [
+                        {"id": row.id, "content_hash": content_fingerprint(row.title, row.description)}
+                        for row in rows
+                    ]
+                )
+                conn.commit()
+                updated += len(rows)
+
+        logger.info(f"Backfilled content hashes for {updated} submissions")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error backfilling content hashes: {str(e)}")
+        return False
+
+def resolve_approved_copies(conn):
+    """
+    Keep the oldest approved submission of each content hash and mark the later
+    approved copies as rejected duplicates of it, so the unique index can be created
+    """
+    rows = conn.execute(text("""
+        SELECT id, content_hash FROM submissions
+        WHERE status = 'approved' AND content_hash IN (
+            SELECT content_hash FROM submissions
+            WHERE status = 'approved' AND content_hash IS NOT NULL
+            GROUP BY content_hash
+            HAVING COUNT(*) > 1
+        )
+        ORDER BY id;
+    """)).fetchall()
+
+    kept = {}
+    copies = []
+    for row in rows:
+        if row.content_hash not in kept:
+            kept[row.content_hash] = row.id
+            continue
+        copies.append({"id": row.id, "reference_id": str(kept[row.content_hash])})
+        logger.warning(f"Approved submission {row.id} has the same content as submission {kept[row.content_hash]}, marking it as a rejected duplicate")
+
+    if copies:
+        conn.execute(text("""
+            UPDATE submissions
+            SET status = 'rejected', is_duplicate = TRUE, duplicate_score = 1.0, duplicate_reference_id = :reference_id
+            WHERE id = :id;
+        """), copies)
+    return len(copies)
+
+def create_content_hash_indexes():
+    """Create the lookup index and, after resolving approved copies, the unique index over approved submissions"""
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_submissions_content_hash
+                ON submissions (content_hash);
+            """))
+            conn.commit()
+
+            # Approved copies that predate this migration would violate the unique index
+            resolved = resolve_approved_copies(conn)
+            conn.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_submissions_content_hash_approved
+                ON submissions (content_hash)
+                WHERE status = 'approved';
+            """))
+            conn.commit()
+
+        logger.info(f"Successfully created content hash indexes ({resolved} approved copies marked as duplicates)")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error creating indexes: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    if add_content_hash_column() and backfill_content_hashes() and create_content_hash_indexes():
+        print("Migration completed successfully.")
+    else:
+        print("Migration failed. Check the logs for details.")
+        sys.exit(1)
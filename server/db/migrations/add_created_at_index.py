@@ -0,0 +1,39 @@
+"""
+Migration script to index submissions.created_at, which every duplicate
+index reads before a check to catch up with submissions approved elsewhere
+"""
+import sys
+import os
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import text
+from db.database import engine
+from utils.logger import setup_logger
+
+logger = setup_logger("db.migration")
+
+def add_created_at_index():
+    """Create the index on submissions.created_at"""
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_submissions_created_at
+                ON submissions (created_at);
+            """))
+            conn.commit()
+
+            logger.info("Successfully created 'ix_submissions_created_at' index")
+            return True
+
+    except Exception as e:
+        logger.error(f"Error creating index: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    if add_created_at_index():
+        print("Migration completed successfully.")
+    else:
+        print("Migration failed. Check the logs for details.")
+        sys.exit(1)
@@ -0,0 +1,94 @@
+"""
+Migration script to add image_hash column to submissions table
+and backfill perceptual hashes for stored images
+"""
+import sys
+import os
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import text
+from db.database import engine
+from utils.logger import setup_logger
+
+logger = setup_logger("db.migration")
+
+def add_image_hash_column():
+    """Add image_hash column to submissions table"""
+    try:
+        # Check if column already exists
+        with engine.connect() as conn:
+            result = conn.execute(text("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name='submissions' AND column_name='image_hash';
+            """))
+            column_exists = result.fetchone() is not None
+
+            if column_exists:
+                logger.info("Column 'image_hash' already exists in submissions table")
+                return True
+
+            # Add the column
+            conn.execute(text("""
+                ALTER TABLE submissions
+                ADD COLUMN image_hash VARCHAR(16);
+            """))
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_submissions_image_hash
+                ON submissions (image_hash);
+            """))
+            conn.commit()
+
+            logger.info("Successfully added 'image_hash' column to submissions table")
+            return True
+
+    except Exception as e:
+        logger.error(f"Error adding column: {str(e)}")
+        return False
+
+def backfill_image_hashes(batch_size=500):
+    """Compute perceptual hashes for stored images that do not have one yet"""
+    from utils.helpers import compute_image_hash
+
+    updated = 0
+    last_id = 0
+    try:
+        with engine.connect() as conn:
+            while True:
+                rows = conn.execute(text("""
+                    SELECT id, image_path FROM submissions
+                    WHERE image_hash IS NULL AND image_path IS NOT NULL AND id > :last_id
+                    ORDER BY id
+                    LIMIT :limit;
+                """), {"last_id": last_id, "limit": batch_size}).fetchall()
+
+                if not rows:
+                    break
+                last_id = rows[-1].id
+
+                # Images that are missing on disk keep a NULL hash
+                hashes = [
+                    {"id": row.id, "image_hash": compute_image_hash(row.image_path)}
+                    for row in rows
+                ]
+                hashes = [entry for entry in hashes if entry["image_hash"]]
+                if hashes:
+                    conn.execute(text("UPDATE submissions SET image_hash = :image_hash WHERE id = :id"), hashes)
+                    conn.commit()
+                updated += len(hashes)
+
+        logger.info(f"Backfilled image hashes for {updated} submissions")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error backfilling image hashes: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    if add_image_hash_column() and backfill_image_hashes():
+        print("Migration completed successfully.")
+    else:
+        print("Migration failed. Check the logs for details.")
+        sys.exit(1)
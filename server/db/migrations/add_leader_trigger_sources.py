@@ -0,0 +1,52 @@
+"""
+Migration script to add trigger_sources column to service_leaders table,
+so triggers forwarded to the sync leader keep their sheet source
+"""
+import sys
+import os
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import text
+from db.database import engine
+from utils.logger import setup_logger
+
+logger = setup_logger("db.migration")
+
+def add_trigger_sources_column():
+    """Add trigger_sources column to service_leaders table"""
+    try:
+        # Check if column already exists
+        with engine.connect() as conn:
+            result = conn.execute(text("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name='service_leaders' AND column_name='trigger_sources';
+            """))
+            column_exists = result.fetchone() is not None
+
+            if column_exists:
+                logger.info("Column 'trigger_sources' already exists in service_leaders table")
+                return True
+
+            # Add the column
+            conn.execute(text("""
+                ALTER TABLE service_leaders
+                ADD COLUMN trigger_sources TEXT;
+            """))
+            conn.commit()
+
+            logger.info("Successfully added 'trigger_sources' column to service_leaders table")
+            return True
+
+    except Exception as e:
+        logger.error(f"Error adding column: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    if add_trigger_sources_column():
+        print("Migration completed successfully.")
+    else:
+        print("Migration failed. Check the logs for details.")
+        sys.exit(1)
@@ -0,0 +1,88 @@
+"""
+Migration script to add minhash_signature column to submissions table
+and backfill signatures for existing submissions
+"""
+import sys
+import os
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import text
+from db.database import engine
+from utils.logger import setup_logger
+
+logger = setup_logger("db.migration")
+
+def add_minhash_signature_column():
+    """Add minhash_signature column to submissions table"""
+    try:
+        # Check if column already exists
+        with engine.connect() as conn:
+            result = conn.execute(text("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name='submissions' AND column_name='minhash_signature';
+            """))
+            column_exists = result.fetchone() is not None
+
+            if column_exists:
+                logger.info("Column 'minhash_signature' already exists in submissions table")
+                return True
+
+            # Add the column
+            conn.execute(text("""
+                ALTER TABLE submissions
+                ADD COLUMN minhash_signature BYTEA;
+            """))
+            conn.commit()
+
+            logger.info("Successfully added 'minhash_signature' column to submissions table")
+            return True
+
+    except Exception as e:
+        logger.error(f"Error adding column: {str(e)}")
+        return False
+
+def backfill_minhash_signatures(batch_size=500):
+    """Compute signatures for submissions that do not have one yet"""
+    from services.duplicate_check import MinHasher
+
+    minhasher = MinHasher()
+    updated = 0
+    try:
+        with engine.connect() as conn:
+            while True:
+                rows = conn.execute(text("""
+                    SELECT id, description FROM submissions
+                    WHERE minhash_signature IS NULL
+                    ORDER BY id
+                    LIMIT :limit;
+                """), {"limit": batch_size}).fetchall()
+
+                if not rows:
+                    break
+
+                conn.execute(
+                    text("UPDATE submissions SET minhash_signature = :signature WHERE id = :id"),
+                    [
+                        {"id": row.id, "signature": minhasher.to_bytes(minhasher.signature(row.description))}
+                        for row in rows
+                    ]
+                )
+                conn.commit()
+                updated += len(rows)
+
+        logger.info(f"Backfilled MinHash signatures for {updated} submissions")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error backfilling signatures: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    if add_minhash_signature_column() and backfill_minhash_signatures():
+        print("Migration completed successfully.")
+    else:
+        print("Migration failed. Check the logs for details.")
+        sys.exit(1)
@@ -0,0 +1,66 @@
+"""
+Migration script to add retry scheduling for failed sheet rows: the
+next_attempt_at column of submissions_jobs and the row_failures and
+dead_letter_rows tables
+"""
+import sys
+import os
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import text
+from db.database import engine
+from db import models
+from utils.logger import setup_logger
+
+logger = setup_logger("db.migration")
+
+def add_next_attempt_column():
+    """Add next_attempt_at column to submissions_jobs table"""
+    try:
+        # Check if column already exists
+        with engine.connect() as conn:
+            result = conn.execute(text("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name='submissions_jobs' AND column_name='next_attempt_at';
+            """))
+            column_exists = result.fetchone() is not None
+
+            if column_exists:
+                logger.info("Column 'next_attempt_at' already exists in submissions_jobs table")
+                return True
+
+            # Add the column
+            conn.execute(text("""
+                ALTER TABLE submissions_jobs
+                ADD COLUMN next_attempt_at TIMESTAMP WITH TIME ZONE;
+            """))
+            conn.commit()
+
+            logger.info("Successfully added 'next_attempt_at' column to submissions_jobs table")
+            return True
+
+    except Exception as e:
+        logger.error(f"Error adding column: {str(e)}")
+        return False
+
+def create_retry_tables():
+    """Create the row_failures and dead_letter_rows tables and their indexes"""
+    try:
+        models.RowFailure.__table__.create(bind=engine, checkfirst=True)
+        models.DeadLetterRow.__table__.create(bind=engine, checkfirst=True)
+        logger.info("Tables 'row_failures' and 'dead_letter_rows' are ready")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error creating tables: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    if add_next_attempt_column() and create_retry_tables():
+        print("Migration completed successfully.")
+    else:
+        print("Migration failed. Check the logs for details.")
+        sys.exit(1)
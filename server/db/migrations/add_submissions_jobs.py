@@ -0,0 +1,33 @@
+"""
+Migration script to create the submissions_jobs table used by the
+ingestion workers (INGESTION_MODE=queue)
+"""
+import sys
+import os
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from db.database import engine
+from db import models
+from utils.logger import setup_logger
+
+logger = setup_logger("db.migration")
+
+def create_jobs_table():
+    """Create the submissions_jobs table and its indexes"""
+    try:
+        models.SubmissionJob.__table__.create(bind=engine, checkfirst=True)
+        logger.info("Table 'submissions_jobs' is ready")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error creating table: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    if create_jobs_table():
+        print("Migration completed successfully.")
+    else:
+        print("Migration failed. Check the logs for details.")
+        sys.exit(1)
@@ -0,0 +1,56 @@
+"""
+Migration script to add updated_at column to submissions table,
+set when an edited sheet row replaces a stored submission
+"""
+import sys
+import os
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import text
+from db.database import engine
+from utils.logger import setup_logger
+
+logger = setup_logger("db.migration")
+
+def add_updated_at_column():
+    """Add updated_at column to submissions table"""
+    try:
+        # Check if column already exists
+        with engine.connect() as conn:
+            result = conn.execute(text("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name='submissions' AND column_name='updated_at';
+            """))
+            column_exists = result.fetchone() is not None
+
+            if column_exists:
+                logger.info("Column 'updated_at' already exists in submissions table")
+                return True
+
+            # Add the column
+            conn.execute(text("""
+                ALTER TABLE submissions
+                ADD COLUMN updated_at TIMESTAMP WITH TIME ZONE;
+            """))
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_submissions_updated_at
+                ON submissions (updated_at);
+            """))
+            conn.commit()
+
+            logger.info("Successfully added 'updated_at' column to submissions table")
+            return True
+
+    except Exception as e:
+        logger.error(f"Error adding column: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    if add_updated_at_column():
+        print("Migration completed successfully.")
+    else:
+        print("Migration failed. Check the logs for details.")
+        sys.exit(1)
@@ -0,0 +1,89 @@
+"""
+Migration script to create the ingestion_ledger table and seed it with
+sheet rows that were stored before the ledger existed, so the first sync
+after upgrading does not ingest the whole sheet again
+"""
+import sys
+import os
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy.exc import IntegrityError
+from db.database import engine, SessionLocal
+from db import models
+from utils.logger import setup_logger
+
+logger = setup_logger("db.migration")
+
+def create_ledger_table():
+    """Create the ingestion_ledger table and its unique index"""
+    try:
+        models.IngestionLedger.__table__.create(bind=engine, checkfirst=True)
+        logger.info("Table 'ingestion_ledger' is ready")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error creating table: {str(e)}")
+        return False
+
+def seed_ledger():
+    """Match sheet rows to stored submissions by content hash and record them as ingested"""
+    from services.google_sheets import GoogleSheetsService
+    from services.duplicate_check import content_fingerprint
+
+    db = SessionLocal()
+    try:
+        sheets_service = GoogleSheetsService()
+        rows = sheets_service.get_all_submissions()
+
+        # Oldest stored submission for each content hash
+        stored = {}
+        for submission_id, content_hash in db.query(models.Submission.id, models.Submission.content_hash).filter(
+            models.Submission.content_hash.isnot(None)
+        ).order_by(models.Submission.id):
+            stored.setdefault(content_hash, submission_id)
+
+        # Rows come in sheet order, so each submission goes to the earliest row with its content.
+        # Later copies (e.g. rows rejected as duplicates of it) are recorded without a submission,
+        # so editing one of them is ingested as a new row instead of overwriting the submission.
+        claimed = set()
+        seeded = 0
+        for row in rows:
+            submission_id = stored.get(content_fingerprint(row["title"], row["description"]))
+            if submission_id is None:
+                continue
+            if submission_id in claimed:
+                submission_id = None
+            else:
+                claimed.add(submission_id)
+            try:
+                db.add(models.IngestionLedger(
+                    source=sheets_service.source_id,
+                    row_timestamp=row["timestamp"],
+                    row_hash=row["row_hash"],
+                    row_index=row["row_index"],
+                    submission_id=submission_id
+                ))
+                db.commit()
+                seeded += 1
+            except IntegrityError:
+                # Already in the ledger
+                db.rollback()
+
+        logger.info(f"Seeded ingestion ledger with {seeded} of {len(rows)} sheet rows")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error seeding ingestion ledger: {str(e)}")
+        return False
+
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    if create_ledger_table() and seed_ledger():
+        print("Migration completed successfully.")
+    else:
+        print("Migration failed. Check the logs for details.")
+        sys.exit(1)
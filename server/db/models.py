@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey, LargeBinary, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from db.database import Base
 
 class Submission(Base):
@@ -16,7 +16,8 @@ class Submission(Base):
     publisher_phone = Column(String(20), nullable=False)
     image_path = Column(String(255))
     original_image_url = Column(String(1000))  # New field for Google Drive URL
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # Indexed for duplicate index catch-up reads
+    updated_at = Column(DateTime(timezone=True), nullable=True, index=True)  # Last time an edited sheet row replaced it
     
     # Status information
     is_valid = Column(Boolean, default=True)
@@ -25,6 +26,22 @@ class Submission(Base):
     duplicate_reference_id = Column(String, nullable=True)
     is_appropriate_image = Column(Boolean, default=True)
     status = Column(String(20), default="pending")  # pending, approved, rejected
+    
+    # Duplicate detection fingerprints
+    minhash_signature = Column(LargeBinary, nullable=True)  # uint64 MinHash signature for LSH lookup
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of normalized title + description
+    image_hash = Column(String(16), nullable=True, index=True)  # 64-bit perceptual hash of the image (hex)
+    
+    __table_args__ = (
+        # At most one approved submission per normalized content, in every duplicate scope and time window
+        Index(
+            "uq_submissions_content_hash_approved",
+            "content_hash",
+            unique=True,
+            postgresql_where=text("status = 'approved'"),
+            sqlite_where=text("status = 'approved'")
+        ),
+    )
 
 class ValidationError(Base):
     __tablename__ = "validation_errors"
@@ -47,6 +64,108 @@ class ModerationResult(Base):
     # Define the relationship after both classes exist
     submission = relationship("Submission", back_populates="moderation_result")
 
+class SyncState(Base):
+    __tablename__ = "sync_state"
+
+    # One row per synced sheet, e.g. "<spreadsheet id>:Form Responses 1"
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    source = Column(String(255), nullable=False, unique=True)
+    last_row = Column(Integer, nullable=True)  # 0-based data row index of the newest processed row
+    last_row_hash = Column(String(64), nullable=True)  # Hash of that row, to detect edits before the watermark
+    last_full_sync = Column(DateTime(timezone=True), nullable=True)  # Last full reconciliation pass
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class IngestionLedger(Base):
+    __tablename__ = "ingestion_ledger"
+
+    # One row per ingested sheet row, so restarts never process a row twice
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    source = Column(String(255), nullable=False)
+    row_timestamp = Column(String(64), nullable=False)  # Form response timestamp as it appears in the sheet
+    row_hash = Column(String(64), nullable=False)  # SHA-256 of the row's raw cell values
+    row_index = Column(Integer, nullable=True)  # Sheet row when it was ingested (informational)
+    submission_id = Column(Integer, ForeignKey("submissions.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("uq_ingestion_ledger_row", "source", "row_timestamp", "row_hash", unique=True),
+    )
+
+class SubmissionJob(Base):
+    __tablename__ = "submissions_jobs"
+
+    # One row per sheet row waiting for (or done by) an ingestion worker, when INGESTION_MODE=queue
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    source = Column(String(255), nullable=False)
+    row_timestamp = Column(String(64), nullable=False)
+    row_hash = Column(String(64), nullable=False)
+    row_index = Column(Integer, nullable=True)
+    payload = Column(Text, nullable=False)  # The sheet row as JSON
+    state = Column(String(20), nullable=False, default="pending")  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    locked_by = Column(String(255), nullable=True)  # Worker holding the lease
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)  # Running jobs past this are claimed again
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)  # Pending retries wait until this (exponential backoff)
+    last_error = Column(Text, nullable=True)
+    submission_id = Column(Integer, ForeignKey("submissions.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("uq_submissions_jobs_row", "source", "row_timestamp", "row_hash", unique=True),
+        Index("ix_submissions_jobs_claim", "state", "id"),
+    )
+
+class RowFailure(Base):
+    __tablename__ = "row_failures"
+
+    # Sheet rows that failed to ingest inline and wait for a retry (INGESTION_MODE=inline)
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    source = Column(String(255), nullable=False)
+    row_timestamp = Column(String(64), nullable=False)
+    row_hash = Column(String(64), nullable=False)
+    row_index = Column(Integer, nullable=True)
+    payload = Column(Text, nullable=False)  # The sheet row as JSON, so retries do not need to re-read the sheet
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("uq_row_failures_row", "source", "row_timestamp", "row_hash", unique=True),
+    )
+
+class DeadLetterRow(Base):
+    __tablename__ = "dead_letter_rows"
+
+    # Sheet rows that failed INGESTION_MAX_ATTEMPTS times; they are not retried until requeued
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    source = Column(String(255), nullable=False)
+    row_timestamp = Column(String(64), nullable=False)
+    row_hash = Column(String(64), nullable=False)
+    row_index = Column(Integer, nullable=True)
+    payload = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    job_id = Column(Integer, ForeignKey("submissions_jobs.id", ondelete="SET NULL"), nullable=True)  # Set in queue mode
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("uq_dead_letter_rows_row", "source", "row_timestamp", "row_hash", unique=True),
+    )
+
+class ServiceLeader(Base):
+    __tablename__ = "service_leaders"
+
+    # Which process currently runs a singleton task (e.g. "sync"), kept up to date by its heartbeat
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    name = Column(String(100), nullable=False, unique=True)
+    holder = Column(String(255), nullable=False)  # host:pid of the leader
+    acquired_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    trigger_requested_at = Column(DateTime(timezone=True), nullable=True)  # Set by other processes to wake the leader
+    trigger_sources = Column(Text, nullable=True)  # JSON list of the sources they asked for (null = every source)
+
 # Now that both dependent classes are defined, add back the relationships to the Submission class
 Submission.validation_errors = relationship("ValidationError", back_populates="submission", cascade="all, delete-orphan")
 Submission.moderation_result = relationship("ModerationResult", back_populates="submission", uselist=False, cascade="all, delete-orphan")
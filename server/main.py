@@ -6,12 +6,14 @@ import asyncio
 
 # Import routers
 from routers.submissions import router as submissions_router
-from routers.sync import router as sync_router, get_sync_service
+from routers.sync import router as sync_router, get_sync_service, get_leader_elector
 from utils.logger import setup_logger
 from utils.config_check import print_config_status
 from db.database import engine
 from db import models
 from utils.temp_storage import temp_storage
+from utils.executors import run_io, shutdown_executors
+from services.container import container
 
 # Set up logger
 logger = setup_logger("main")
@@ -62,15 +64,19 @@ async def startup_event():
     logger.info("Checking configuration status on startup...")
     config_status = print_config_status()
     
+    # Build the shared Sheets and Groq clients and the duplicate index before traffic arrives
+    logger.info("Warming up shared services...")
+    await run_io(container.start)
+    
     # Start the temporary file cleanup thread
     logger.info("Starting temporary file cleanup thread...")
     temp_storage.start_cleanup_thread(interval_minutes=30)
     
-    # Start the sync service on app startup only if Google Sheets is properly configured
+    # Start the sync service on app startup only if Google Sheets is properly configured.
+    # With several workers, only the one elected leader runs it; the others take over if it dies
     if config_status["google_sheets"]:
-        logger.info("Starting sync service on application startup")
-        sync_service = get_sync_service()
-        sync_service.start()
+        logger.info("Joining the sync leader election on application startup")
+        get_leader_elector().start()
     else:
         logger.warning("Sync service not started: Google Sheets integration is disabled")
 
@@ -80,11 +86,16 @@ async def shutdown_event():
     logger.info("Stopping temporary file cleanup thread...")
     temp_storage.stop_cleanup_thread()
     
-    # Stop the sync service on app shutdown
+    # Step down as sync leader (stopping the sync service) on app shutdown
     logger.info("Stopping sync service on application shutdown")
+    get_leader_elector().stop()
     sync_service = get_sync_service()
     if sync_service and sync_service.running:
         sync_service.stop()
+    
+    # Let queued blocking work finish before the process exits, then close the shared clients
+    shutdown_executors()
+    container.close()
 
 if __name__ == "__main__":
     import uvicorn
@@ -29,3 +29,4 @@ class DuplicateCheckResult(BaseModel):
     is_duplicate: bool
     similarity_score: float = None
     duplicate_entry_id: str = None
+    duplicate_batch_index: int = None  # Position of an earlier submission in the same batch
@@ -1,14 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status, Query
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import os
+import asyncio
 
 from services.google_sheets import GoogleSheetsService
 from services.validation import validate_submission
 from services.duplicate_check import DuplicateChecker
 from services.image_moderation import ImageModerator
+from services.container import container
 from models import NewsSubmission, ValidationResult, DuplicateCheckResult, ImageModerationResult
-from utils.helpers import save_uploaded_image
+from utils.helpers import save_uploaded_image, compute_image_hash
+from utils.executors import run_io, run_db
 from db.database import get_db
 from db import crud, models
 from utils.logger import setup_logger
@@ -22,24 +26,34 @@ router = APIRouter(
     responses={404: {"description": "Not found"}}
 )
 
-# Dependency injection
+# Dependency injection: process-wide instances, built once and warmed up on startup
 def get_sheets_service():
-    return GoogleSheetsService()
+    return container.sheets_service
+
+def get_source_sheets_service(source: Optional[str] = Query(None, description="Name of the sheet source (default: the first)")):
+    if source is None:
+        return get_sheets_service()
+    sheets_service = container.find_sheets_service(source)
+    if sheets_service is None:
+        raise HTTPException(status_code=404, detail=f"Sheet source '{source}' not found")
+    return sheets_service
 
 def get_duplicate_checker():
-    return DuplicateChecker()
+    return container.duplicate_checker
 
 def get_image_moderator():
-    return ImageModerator()
+    return container.image_moderator
 
 @router.get("/", response_model=List[dict])
 async def get_submissions(
-    sheets_service: GoogleSheetsService = Depends(get_sheets_service)
+    sheets_service: GoogleSheetsService = Depends(get_source_sheets_service)
 ):
-    """Get all news submissions from Google Sheets"""
+    """Get all news submissions from Google Sheets (from one sheet source, see SHEET_SOURCES)"""
     try:
+        # Served from the read-through cache: concurrent requests share one fetch,
+        # and a stale copy is served while it is refreshed in the background
         logger.info("Fetching submissions from Google Sheets")
-        return sheets_service.get_all_submissions()
+        return await asyncio.wrap_future(sheets_service.submissions_cache.get_future())
     except Exception as e:
         logger.error(f"Failed to retrieve submissions from Google Sheets: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve submissions: {str(e)}")
@@ -56,9 +70,9 @@ async def get_submissions_from_db(
         logger.info(f"Fetching submissions from database (skip={skip}, limit={limit}, status={status})")
         
         if status:
-            submissions = crud.get_submissions_by_status(db, status, skip, limit)
+            submissions = await run_db(crud.get_submissions_by_status, db, status, skip, limit)
         else:
-            submissions = crud.get_all_submissions(db, skip, limit)
+            submissions = await run_db(crud.get_all_submissions, db, skip, limit)
             
         logger.info(f"Found {len(submissions)} submissions")
         
@@ -94,7 +108,7 @@ async def get_submission_by_id(
     db: Session = Depends(get_db)
 ):
     """Get a specific submission by ID"""
-    submission = crud.get_submission(db, submission_id)
+    submission = await run_db(crud.get_submission, db, submission_id)
     if not submission:
         logger.warning(f"Submission with ID {submission_id} not found")
         raise HTTPException(status_code=404, detail="Submission not found")
@@ -130,7 +144,6 @@ async def validate_news_submission(
     publisher_name: str = Form(...),
     publisher_phone: str = Form(...),
     image: UploadFile = File(...),
-    sheets_service: GoogleSheetsService = Depends(get_sheets_service),
     duplicate_checker: DuplicateChecker = Depends(get_duplicate_checker),
     image_moderator: ImageModerator = Depends(get_image_moderator),
     db: Session = Depends(get_db)
@@ -138,8 +151,11 @@ async def validate_news_submission(
     """Validate a news submission including duplicate check and image moderation"""
     logger.info(f"Processing new submission: {title}")
     
+    # Blocking work (file writes, PIL, the Groq client, the database) runs on
+    # dedicated executors so other requests are served while this one waits
+    
     # Step 1: Save the uploaded image
-    success, result = save_uploaded_image(image)
+    success, result = await run_io(save_uploaded_image, image)
     if not success:
         logger.error(f"Failed to save image: {result}")
         raise HTTPException(status_code=400, detail=result)
@@ -171,22 +187,60 @@ async def validate_news_submission(
     
     # Step 4: Check for duplicate content
     logger.info("Checking for duplicate content")
-    existing_submissions = sheets_service.get_all_submissions()
-    duplicate_result = duplicate_checker.check_duplicate(submission, existing_submissions)
+    # Also picks up submissions the sync leader, ingestion workers and sibling processes approved since the last check
+    await run_db(duplicate_checker.ensure_loaded, db)
+    duplicate_result = await run_db(duplicate_checker.check_duplicate, submission, db=db)
+    
+    # Catch re-uploaded photos with reworded text through the perceptual image hash
+    image_hash = await run_io(compute_image_hash, image_path)
+    if not duplicate_result.is_duplicate:
+        duplicate_result = await run_db(duplicate_checker.check_image, submission, image_hash)
     
-    # Step 5: Check image appropriateness
-    logger.info("Checking image appropriateness")
-    moderation_result = image_moderator.moderate_image(image_path)
+    # Step 5: Check image appropriateness (skipped for duplicates, which are rejected anyway)
+    if duplicate_result.is_duplicate:
+        moderation_result = ImageModerationResult(
+            is_appropriate=True,
+            reason="Moderation skipped for duplicate submission"
+        )
+    else:
+        logger.info("Checking image appropriateness")
+        moderation_result = await run_io(image_moderator.moderate_image, image_path)
     
     # Step 6: Store in database
     logger.info("Storing submission results in database")
-    db_submission = crud.create_submission(
-        db=db,
-        submission=submission,
-        validation=validation_result,
-        duplicate=duplicate_result,
-        moderation=moderation_result
-    )
+    fingerprints = duplicate_checker.fingerprints(submission, image_hash)
+    try:
+        db_submission = await run_db(
+            crud.create_submission,
+            db=db,
+            submission=submission,
+            validation=validation_result,
+            duplicate=duplicate_result,
+            moderation=moderation_result,
+            fingerprints=fingerprints
+        )
+    except IntegrityError:
+        # A concurrent upload of the same story was approved between the check and the insert
+        await run_db(db.rollback)
+        original = await run_db(crud.get_approved_submission_by_content_hash, db, fingerprints["content_hash"])
+        if original is None:
+            raise
+        logger.warning(f"Exact duplicate stored concurrently, matching entry ID: {original.id}")
+        duplicate_result = DuplicateCheckResult(is_duplicate=True, similarity_score=1.0, duplicate_entry_id=str(original.id))
+        moderation_result = ImageModerationResult(
+            is_appropriate=True,
+            reason="Moderation skipped for duplicate submission"
+        )
+        db_submission = await run_db(
+            crud.create_submission,
+            db=db,
+            submission=submission,
+            validation=validation_result,
+            duplicate=duplicate_result,
+            moderation=moderation_result,
+            fingerprints=fingerprints
+        )
+    await run_db(duplicate_checker.add_submission, db_submission)
     
     # Compile results
     result = {
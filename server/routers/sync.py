@@ -1,7 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+import hmac
+from db import crud
+from db.database import get_db
 from services.sync_service import SyncService
+from services.leader_election import LeaderElector
 from utils.logger import setup_logger
+from utils.executors import run_db
 from utils.config_check import check_google_credentials, print_config_status
+import config
 
 # Set up logger
 logger = setup_logger("routers.sync")
@@ -19,12 +27,58 @@ def get_sync_service():
     global sync_service
     if sync_service is None:
         # Don't auto-start, we'll control it via API
-        sync_service = SyncService(interval_seconds=150, auto_start=False)
+        sync_service = SyncService(auto_start=False)
     return sync_service
 
+# Leader election, so only one process (e.g. of several uvicorn workers) runs the sync loop.
+# Duplicate indexes stay per process and catch up with the leader's approvals before each check.
+leader_elector = None
+
+def get_leader_elector():
+    global leader_elector
+    if leader_elector is None:
+        service = get_sync_service()
+        leader_elector = LeaderElector(
+            "sync",
+            on_elected=service.start,
+            on_demoted=service.stop,
+            on_trigger=service.trigger
+        )
+    return leader_elector
+
+def check_sync_token(x_sync_token: str, required: bool = False):
+    """
+    When a token is configured, callers must send it in the X-Sync-Token header.
+    
+    With required, the call is refused (503) when no token is configured at all.
+    """
+    if required and not config.SYNC_TRIGGER_TOKEN:
+        logger.warning("Sync request rejected: SYNC_TRIGGER_TOKEN is not configured")
+        raise HTTPException(status_code=503, detail="Sync triggers are disabled until SYNC_TRIGGER_TOKEN is configured")
+    if config.SYNC_TRIGGER_TOKEN and not hmac.compare_digest(x_sync_token or "", config.SYNC_TRIGGER_TOKEN):
+        logger.warning("Sync request rejected: invalid token")
+        raise HTTPException(status_code=401, detail="Invalid sync token")
+
+def find_source(service: SyncService, name: str):
+    """Source ID of a sheet source by name (None = every source); 404 if it is not configured"""
+    if name is None:
+        return None
+    scheduler = service.find_source(name)
+    if scheduler is None:
+        raise HTTPException(status_code=404, detail=f"Sheet source '{name}' not found")
+    return scheduler.source_id
+
+def not_leader_response(elector: LeaderElector) -> dict:
+    return {
+        "status": "not_leader",
+        "message": "Another process runs the sync service",
+        "this_process": elector.identity
+    }
+
 @router.post("/start")
 async def start_sync(
-    service: SyncService = Depends(get_sync_service)
+    service: SyncService = Depends(get_sync_service),
+    elector: LeaderElector = Depends(get_leader_elector)
 ):
     """Start the synchronization service"""
     if not service.google_sheets_enabled:
@@ -32,6 +86,10 @@ async def start_sync(
             "status": "error", 
             "message": "Cannot start sync service: Google Sheets integration is disabled. Check your configuration."
         }
+    
+    # Only the elected process may sync
+    if elector.running and not elector.is_leader:
+        return not_leader_response(elector)
         
     if service.running:
         return {"status": "already_running", "message": "Sync service is already running"}
@@ -54,7 +112,9 @@ async def stop_sync(
 
 @router.post("/sync-now")
 async def run_sync_now(
-    service: SyncService = Depends(get_sync_service)
+    source: Optional[str] = Query(None, description="Name of the sheet source to sync (default: all)"),
+    service: SyncService = Depends(get_sync_service),
+    elector: LeaderElector = Depends(get_leader_elector)
 ):
     """Run a sync operation immediately"""
     if not service.google_sheets_enabled:
@@ -62,21 +122,94 @@ async def run_sync_now(
             "status": "error", 
             "message": "Cannot sync now: Google Sheets integration is disabled. Check your configuration."
         }
-        
+    
+    # A sync here would race the leader's; use /sync/trigger to ask the leader instead
+    if elector.running and not elector.is_leader:
+        return not_leader_response(elector)
+    
+    source_id = find_source(service, source)
     try:
-        logger.info("Manual sync requested via API")
-        await service.sync_submissions()
+        logger.info(f"Manual sync of {source or 'all sources'} requested via API")
+        await service.sync_submissions(source_id)
         return {"status": "success", "message": "Sync operation completed successfully"}
     except Exception as e:
         logger.error(f"Manual sync failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Sync operation failed: {str(e)}")
 
+@router.post("/trigger")
+async def trigger_sync(
+    source: Optional[str] = Query(None, description="Name of the sheet source that changed (default: all)"),
+    x_sync_token: str = Header(None),
+    service: SyncService = Depends(get_sync_service),
+    elector: LeaderElector = Depends(get_leader_elector)
+):
+    """
+    Schedule a sync soon, e.g. from an Apps Script onFormSubmit trigger.
+    
+    Triggers are debounced and coalesced: a burst of calls results in one sync.
+    Each regional form's script can pass its source name, so only that sheet is read.
+    """
+    # The trigger is meant to be reachable from Apps Script, so it is never left open
+    check_sync_token(x_sync_token, required=True)
+    source_id = find_source(service, source)
+    
+    if not service.running:
+        # The sync loop runs in another process: wake it through the leader's database row
+        if elector.running and not elector.is_leader and await run_db(elector.request_trigger, source_id):
+            logger.info("Sync trigger forwarded to the leader")
+            return {"status": "forwarded", "message": "Sync requested from the leader process"}
+        return {"status": "not_running", "message": "Sync service is not running"}
+    
+    if service.trigger(source_id):
+        logger.info("Sync scheduled by trigger")
+        return {"status": "scheduled", "message": "Sync scheduled"}
+    return {"status": "coalesced", "message": "A sync is already scheduled"}
+
 @router.get("/status")
 async def get_sync_status(
-    service: SyncService = Depends(get_sync_service)
+    service: SyncService = Depends(get_sync_service),
+    elector: LeaderElector = Depends(get_leader_elector)
+):
+    """Get the current status of the sync service, and which process runs it"""
+    # The status reads the ingestion ledger and the leader row, so it runs on the database pool
+    status = await run_db(service.get_status)
+    status["leader"] = await run_db(elector.status) if elector.running else None
+    return status
+
+@router.get("/dead-letters")
+async def get_dead_letters(
+    skip: int = Query(0, description="Skip records"),
+    limit: int = Query(100, description="Limit records"),
+    db: Session = Depends(get_db)
+):
+    """Sheet rows that failed INGESTION_MAX_ATTEMPTS times and are no longer retried"""
+    entries = await run_db(crud.get_dead_letters, db, skip, limit)
+    return [
+        {
+            "id": entry.id,
+            "source": entry.source,
+            "row": entry.row_index + 2 if entry.row_index is not None else None,  # Sheet row number
+            "timestamp": entry.row_timestamp,
+            "attempts": entry.attempts,
+            "last_error": entry.last_error,
+            "job_id": entry.job_id,
+            "created_at": entry.created_at
+        }
+        for entry in entries
+    ]
+
+@router.post("/dead-letters/{dead_letter_id}/requeue")
+async def requeue_dead_letter(
+    dead_letter_id: int,
+    x_sync_token: str = Header(None),
+    db: Session = Depends(get_db)
 ):
-    """Get the current status of the sync service"""
-    return service.get_status()
+    """Retry a dead-lettered row with a fresh set of attempts (on the next sync, or by the workers in queue mode)"""
+    check_sync_token(x_sync_token)
+    if not await run_db(crud.requeue_dead_letter, db, dead_letter_id):
+        raise HTTPException(status_code=404, detail="Dead-lettered row not found")
+    logger.info(f"Requeued dead-lettered row {dead_letter_id}")
+    return {"status": "requeued", "message": f"Row {dead_letter_id} will be retried"}
 
 @router.get("/config")
 async def get_config_status():
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Compare the TF-IDF and hashing vectorizers of the duplicate checker.
+
+Builds a labelled set of copied, paraphrased and unrelated queries (see benchmarks/corpus.py), runs both
+vectorizers over it and reports accuracy against the labels, agreement with
+the TF-IDF results, build and check times and the memory held by each index.
+
+Usage:
+    python scripts/compare_vectorizers.py [--size 5000] [--threshold 0.8] [--from-db] [--output report.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import generate_corpus, generate_queries
+from services.duplicate_check import DuplicateChecker, VECTORIZERS
+import config
+
+def load_corpus(size: int, from_db: bool, seed: int) -> list:
+    """Approved descriptions from the database, or a synthetic corpus"""
+    if from_db:
+        from db.database import SessionLocal
+        from db import models
+        db = SessionLocal()
+        try:
+            rows = db.query(models.Submission.id, models.Submission.description).filter(
+                models.Submission.status == "approved"
+            ).order_by(models.Submission.id).limit(size).all()
+            return [{"id": row.id, "description": row.description} for row in rows]
+        finally:
+            db.close()
+
+    return generate_corpus(size, seed=seed)
+
+def index_memory(checker: DuplicateChecker) -> int:
+    """Approximate bytes held by the index arrays and the vocabulary"""
+    total = 0
+    for shard in checker.shards.values():
+        index = shard.index
+        total += index.doc_freq_columns.nbytes + index.doc_freq.nbytes + index.idf_columns.nbytes + index.idf.nbytes
+        for matrix in [index.counts, index.vectors] + index._pending_counts + index._pending_vectors:
+            total += matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+    vocabulary = getattr(checker.vectorizer, "vocabulary", {})
+    total += sys.getsizeof(vocabulary) + sum(sys.getsizeof(term) for term in vocabulary)
+    return total
+
+def evaluate(name: str, corpus: list, queries: list) -> dict:
+    checker = DuplicateChecker(use_lsh=False, scope="global", window_days=0, vectorizer=name, snapshot_dir="")
+
+    started = time.perf_counter()
+    checker.load(corpus)
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    results = checker.check_duplicates_batch(queries, within_batch=False)
+    check_seconds = time.perf_counter() - started
+
+    true_positives = sum(1 for query, result in zip(queries, results) if result.is_duplicate and result.duplicate_entry_id == query["expected"])
+    flagged = sum(1 for result in results if result.is_duplicate)
+    expected = sum(1 for query in queries if query["expected"] is not None)
+    precision = true_positives / flagged if flagged else 0.0
+    recall = true_positives / expected if expected else 0.0
+
+    return {
+        "vectorizer": name,
+        "features": checker.vectorizer.n_features,
+        "build_seconds": round(build_seconds, 3),
+        "check_ms_per_query": round(check_seconds * 1000 / len(queries), 3),
+        "index_megabytes": round(index_memory(checker) / 2 ** 20, 2),
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "f1": round(2 * precision * recall / (precision + recall), 4) if precision + recall else 0.0,
+        "decisions": [result.duplicate_entry_id if result.is_duplicate else None for result in results],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare duplicate detection vectorizers")
+    parser.add_argument("--size", type=int, default=5000, help="Number of stored submissions")
+    parser.add_argument("--queries", type=int, default=1000, help="Number of queries to check")
+    parser.add_argument("--from-db", action="store_true", help="Use approved submissions from the database")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--threshold", type=float, default=config.DUPLICATE_THRESHOLD, help="Duplicate threshold to evaluate")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    config.DUPLICATE_THRESHOLD = args.threshold
+    corpus = load_corpus(args.size, args.from_db, args.seed)
+    if not corpus:
+        print("No submissions to compare against.")
+        sys.exit(1)
+    queries = generate_queries(corpus, args.queries, seed=args.seed + 1)
+
+    reports = [evaluate(name, corpus, queries) for name in VECTORIZERS]
+    baseline = reports[0]["decisions"]
+    for report in reports:
+        report["agreement_with_tfidf"] = round(sum(a == b for a, b in zip(report.pop("decisions"), baseline)) / len(queries), 4)
+
+    print(f"\n=== Vectorizer comparison ({len(corpus)} stored, {len(queries)} queries, threshold {config.DUPLICATE_THRESHOLD}) ===")
+    columns = ["vectorizer", "features", "build_seconds", "check_ms_per_query", "index_megabytes", "precision", "recall", "f1", "agreement_with_tfidf"]
+    print(" | ".join(columns))
+    for report in reports:
+        print(" | ".join(str(report[column]) for column in columns))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"corpus_size": len(corpus), "queries": len(queries), "threshold": config.DUPLICATE_THRESHOLD, "results": reports}, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+if __name__ == "__main__":
+    main()
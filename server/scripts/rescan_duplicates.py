@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Re-scan the submissions table for clusters of duplicates on all cores.
+
+Useful after changing DUPLICATE_THRESHOLD or the vectorizer: every stored
+description is compared with every other one in its scope (no time window)
+and groups of submissions that are connected by a similarity at or above the
+threshold are reported.
+
+Usage:
+    python scripts/rescan_duplicates.py [--threshold 0.8] [--status approved] [--workers 8] [--output clusters.json]
+"""
+import argparse
+import json
+import os
+import sys
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.database import SessionLocal
+from db import models
+from services.duplicate_check import DuplicateChecker, ParallelScorer, SCOPE_FIELDS, VECTORIZERS
+import config
+
+def load_rows(status: str) -> list:
+    db = SessionLocal()
+    try:
+        query = db.query(
+            models.Submission.id,
+            models.Submission.description,
+            models.Submission.city,
+            models.Submission.category,
+            models.Submission.created_at
+        )
+        if status != "all":
+            query = query.filter(models.Submission.status == status)
+        return [row._asdict() for row in query.order_by(models.Submission.created_at, models.Submission.id).all()]
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-scan stored submissions for duplicate clusters")
+    parser.add_argument("--threshold", type=float, default=config.DUPLICATE_THRESHOLD, help="Similarity threshold")
+    parser.add_argument("--status", default="approved", help="Submission status to scan, or 'all'")
+    parser.add_argument("--scope", default=config.DUPLICATE_SCOPE, choices=list(SCOPE_FIELDS), help="Only compare submissions within this scope")
+    parser.add_argument("--vectorizer", default=config.DUPLICATE_VECTORIZER, choices=list(VECTORIZERS), help="Vectorizer to use")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("--output", help="Write the clusters as JSON to this file")
+    args = parser.parse_args()
+
+    rows = load_rows(args.status)
+    print(f"Loaded {len(rows)} submissions")
+
+    checker = DuplicateChecker(use_lsh=False, scope=args.scope, window_days=0, vectorizer=args.vectorizer)
+    checker.load(rows)
+
+    scorer = ParallelScorer(workers=args.workers)
+    clusters = []
+    for key, shard in checker.shards.items():
+        for cluster in scorer.clusters(shard.index.vectors, shard.index.ids, args.threshold):
+            clusters.append({"scope": key, "ids": cluster})
+    clusters.sort(key=lambda cluster: len(cluster["ids"]), reverse=True)
+
+    print(f"\n=== {len(clusters)} duplicate clusters at threshold {args.threshold} ===")
+    for cluster in clusters:
+        print(f"[{cluster['scope'] or 'global'}] {len(cluster['ids'])} submissions: {', '.join(cluster['ids'])}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"threshold": args.threshold, "scope": args.scope, "clusters": clusters}, f, indent=2)
+        print(f"\nClusters written to {args.output}")
+
+if __name__ == "__main__":
+    main()
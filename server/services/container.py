@@ -0,0 +1,125 @@
+import threading
+import time
+import traceback
+
+from services.google_sheets import GoogleSheetsService, load_sheet_sources
+from services.duplicate_check import DuplicateChecker, duplicate_checker
+from services.image_moderation import ImageModerator
+from db.database import SessionLocal
+from utils.config_check import check_google_credentials
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger("services.container")
+
+class ServiceContainer:
+    """
+    Process-wide clients shared by every request, the sync and the ingestion workers.
+
+    Building the Sheets client reads the service-account file and the API
+    discovery document, and every Groq client opens its own connection pool,
+    so they are built once per process instead of once per request. start()
+    (called on application startup) builds them and warms them up before
+    traffic arrives: an OAuth token and an open connection for Sheets, an open
+    connection for Groq, and a loaded duplicate index. close() (called on
+    shutdown) closes their connections.
+
+    Services are also built on first use, so scripts and workers that never
+    call start() get the same shared instances. There is one Sheets client per
+    configured sheet source (see SHEET_SOURCES), all sharing one set of
+    credentials; the image moderator and duplicate index serve every source.
+    """
+
+    def __init__(self):
+        self.duplicate_checker: DuplicateChecker = duplicate_checker
+        self._sheets_services = None
+        self._image_moderator = None
+        self._lock = threading.Lock()
+        self.started = False
+
+    @property
+    def sheets_services(self) -> dict:
+        """The shared Google Sheets client of every sheet source, by source ID (raises if the credentials are missing or invalid)"""
+        if self._sheets_services is None:
+            with self._lock:
+                if self._sheets_services is None:
+                    services = {}
+                    credentials = None
+                    for source in load_sheet_sources():
+                        service = GoogleSheetsService(source, credentials)
+                        credentials = service.credentials
+                        services[source.source_id] = service
+                    self._sheets_services = services
+                    logger.info(f"Google Sheets clients created for {len(services)} sources")
+        return self._sheets_services
+
+    @property
+    def sheets_service(self) -> GoogleSheetsService:
+        """The Google Sheets client of the first sheet source (the feed's default)"""
+        return next(iter(self.sheets_services.values()))
+
+    def find_sheets_service(self, name: str):
+        """The Google Sheets client of a source, by name or source ID, or None"""
+        for service in self.sheets_services.values():
+            if name in (service.source.name, service.source_id):
+                return service
+        return None
+
+    @property
+    def image_moderator(self) -> ImageModerator:
+        """The shared image moderator and its Groq client"""
+        if self._image_moderator is None:
+            with self._lock:
+                if self._image_moderator is None:
+                    self._image_moderator = ImageModerator()
+                    logger.info("Groq client created")
+        return self._image_moderator
+
+    def start(self):
+        """Build and warm up every service (blocking); a failed warm-up is logged, not raised"""
+        started = time.perf_counter()
+
+        if check_google_credentials():
+            try:
+                for sheets_service in self.sheets_services.values():
+                    try:
+                        sheets_service.warm_up()
+                    except Exception as e:
+                        logger.warning(f"Google Sheets warm-up of source {sheets_service.source.name} failed: {str(e)}")
+            except Exception as e:
+                logger.warning(f"Google Sheets warm-up failed: {str(e)}")
+        else:
+            logger.warning("Skipping Google Sheets warm-up: Google Sheets integration is disabled")
+
+        try:
+            self.image_moderator.warm_up()
+        except Exception as e:
+            logger.warning(f"Groq warm-up failed: {str(e)}")
+
+        # Build the duplicate index now rather than on the first submission
+        db = SessionLocal()
+        try:
+            self.duplicate_checker.ensure_loaded(db)
+        except Exception as e:
+            logger.error(f"Failed to load the duplicate index: {str(e)}")
+            logger.error(traceback.format_exc())
+        finally:
+            db.close()
+
+        self.started = True
+        logger.info(f"Services warmed up in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    def close(self):
+        """Close the services' connections; they are rebuilt if used again"""
+        with self._lock:
+            sheets_services, self._sheets_services = self._sheets_services, None
+            image_moderator, self._image_moderator = self._image_moderator, None
+        for sheets_service in (sheets_services or {}).values():
+            sheets_service.close()
+        if image_moderator is not None:
+            image_moderator.close()
+        self.started = False
+        logger.info("Service connections closed")
+
+# Global container instance
+container = ServiceContainer()
@@ -1,55 +1,1427 @@
+import bisect
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import unicodedata
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import shared_memory
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import scipy.sparse as sp
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, TfidfVectorizer
+from sklearn.preprocessing import normalize
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
 from models import NewsSubmission, DuplicateCheckResult
+from db import models
 import config
+from utils.image_hash import BKTree
 from utils.logger import setup_logger
 
 # Set up logger
 logger = setup_logger("services.duplicate_check")
 
-class DuplicateChecker:
+def normalize_content(text: str) -> str:
+    """Normalize text so trivially reformatted copies compare equal (Unicode form, accents, case, punctuation, whitespace)"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    kept = []
+    for character in decomposed:
+        category = unicodedata.category(character)
+        if category == "Mn":
+            # Drop combining accents
+            continue
+        # Punctuation and symbols become word separators
+        kept.append(" " if category[0] in ("P", "S") else character)
+    return " ".join("".join(kept).casefold().split())
+
+def content_fingerprint(title: str, description: str) -> str:
+    """SHA-256 of the normalized title and description, stored in submissions.content_hash"""
+    normalized = normalize_content(title) + "\n" + normalize_content(description)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def _value(entry, name: str):
+    """Read a value from a dict, a model row or a NewsSubmission"""
+    if isinstance(entry, dict):
+        return entry.get(name)
+    return getattr(entry, name, None)
+
+def _field(submission, name: str) -> str:
+    """Read a text field from a NewsSubmission or a sheet row dict"""
+    return _value(submission, name) or ""
+
+def _timestamp(created_at) -> float:
+    """Epoch seconds of a creation time (now when unknown, e.g. before the row is refreshed)"""
+    if created_at is None:
+        return time.time()
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at.timestamp()
+
+# Bump when the snapshot layout changes so old snapshots are rebuilt
+SNAPSHOT_FORMAT = 3
+SNAPSHOTS_TO_KEEP = 3
+
+# Submission fields that make up each duplicate scope
+SCOPE_FIELDS = {
+    "global": (),
+    "city": ("city",),
+    "category": ("category",),
+    "city_category": ("city", "category"),
+}
+
+class TermVectorizer:
+    """Turn descriptions into raw term counts over a vocabulary that grows as new terms are indexed"""
+
     def __init__(self):
-        self.vectorizer = TfidfVectorizer(stop_words='english')
-        
-    def check_duplicate(self, new_submission: NewsSubmission, existing_submissions: list) -> DuplicateCheckResult:
-        """Check if a new submission is a duplicate of any existing submission"""
-        if not existing_submissions:
-            logger.info("No existing submissions to compare against. Skipping duplicate check.")
-            return DuplicateCheckResult(is_duplicate=False)
-        
-        # Extract existing descriptions
-        existing_texts = [sub["description"] for sub in existing_submissions]
-        
-        # Add new submission text
-        all_texts = existing_texts + [new_submission.description]
-        
-        logger.info(f"Checking for duplicates among {len(existing_texts)} existing submissions")
-        
-        # Generate TF-IDF matrix
-        tfidf_matrix = self.vectorizer.fit_transform(all_texts)
-        
-        # Get the vector for the new submission (last row)
-        new_submission_vector = tfidf_matrix[-1]
-        
-        # Compare with all existing submissions
-        similarity_scores = cosine_similarity(
-            new_submission_vector,
-            tfidf_matrix[:-1]  # Exclude the last row (new submission)
-        )[0]
-        
-        # Find the highest similarity score and its index
-        max_similarity = max(similarity_scores) if len(similarity_scores) > 0 else 0.0
-        most_similar_index = np.argmax(similarity_scores) if len(similarity_scores) > 0 else -1
-        
-        # Check if it exceeds the threshold
-        if max_similarity >= config.DUPLICATE_THRESHOLD:
-            logger.warning(f"Potential duplicate detected! Similarity score: {max_similarity:.4f}, matching entry ID: {most_similar_index}")
-            return DuplicateCheckResult(
-                is_duplicate=True,
-                similarity_score=float(max_similarity),
-                duplicate_entry_id=str(most_similar_index)  # Ensure this is a string
-            )
+        # Reuse the tokenization TfidfVectorizer has always applied (English stopwords removed)
+        self.analyzer = TfidfVectorizer(stop_words='english').build_analyzer()
+        self.vocabulary = {}
+
+    @property
+    def n_features(self) -> int:
+        return len(self.vocabulary)
+
+    def term_counts(self, texts: list, add_terms: bool = True) -> sp.csr_matrix:
+        """
+        Build a sparse term-count matrix (one row per text).
+
+        With add_terms, unseen terms are added to the vocabulary. Otherwise
+        (queries that may never be indexed) they get temporary columns after
+        the vocabulary for this call only: they still count towards each row's
+        norm and can match other rows of the same call, but never match a
+        stored row and leave the vocabulary unchanged.
+        """
+        # Temporary columns of unseen query terms
+        unseen = {}
+        indptr = [0]
+        indices = []
+        data = []
+
+        for text in texts:
+            counts = {}
+            for term in self.analyzer(text or ""):
+                column = self.vocabulary.get(term)
+                if column is None:
+                    if add_terms:
+                        column = self.vocabulary[term] = len(self.vocabulary)
+                    else:
+                        column = unseen.setdefault(term, len(self.vocabulary) + len(unseen))
+                counts[column] = counts.get(column, 0) + 1
+
+            indices.extend(counts.keys())
+            data.extend(counts.values())
+            indptr.append(len(indices))
+
+        return sp.csr_matrix(
+            (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(texts), self.n_features + len(unseen))
+        )
+
+class HashingTermVectorizer:
+    """
+    Stateless alternative to TermVectorizer that hashes word and character n-grams into a fixed number of columns.
+
+    There is no vocabulary, so memory does not grow with the corpus and any
+    process can compute the same counts without sharing fitted state.
+    """
+
+    TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+    def __init__(self,
+                 n_features: int = config.DUPLICATE_HASH_FEATURES,
+                 word_ngrams: tuple = (1, 2),
+                 char_ngrams: tuple = (3, 5)):
+        self._n_features = n_features
+        self.word_ngrams = word_ngrams
+        self.char_ngrams = char_ngrams
+        self.hasher = FeatureHasher(n_features=n_features, input_type='string', alternate_sign=False)
+
+    @property
+    def n_features(self) -> int:
+        return self._n_features
+
+    def features(self, text: str) -> list:
+        """Word n-grams (stopwords removed) and character n-grams of each word, prefixed so they never collide by name"""
+        words = [word for word in self.TOKEN_PATTERN.findall((text or "").lower()) if word not in ENGLISH_STOP_WORDS]
+
+        features = []
+        low, high = self.word_ngrams
+        for n in range(low, high + 1):
+            features.extend("w:" + " ".join(words[i:i + n]) for i in range(len(words) - n + 1))
+
+        low, high = self.char_ngrams
+        for word in words:
+            padded = f" {word} "
+            for n in range(low, high + 1):
+                features.extend("c:" + padded[i:i + n] for i in range(len(padded) - n + 1))
+
+        return features
+
+    def term_counts(self, texts: list, add_terms: bool = True) -> sp.csr_matrix:
+        """Build a sparse feature-count matrix (one row per text) with a fixed number of columns (add_terms has no effect)"""
+        counts = self.hasher.transform(self.features(text) for text in texts).tocsr()
+        counts.sum_duplicates()
+        return counts.astype(np.float64)
+
+# Vectorizers selectable with DUPLICATE_VECTORIZER
+VECTORIZERS = {
+    "tfidf": TermVectorizer,
+    "hashing": HashingTermVectorizer,
+}
+
+class DuplicateIndex:
+    """
+    In-memory TF-IDF index over stored submission descriptions.
+
+    Keeps the raw term counts, the document frequencies, the IDF vector from the
+    last refresh and the L2-normalized TF-IDF rows, so a new description can be
+    scored with a single sparse dot product instead of refitting the corpus.
+    Document frequencies and IDF are stored sparsely (sorted columns with their
+    values) for the terms of this index only, so their size follows the index
+    rather than the shared vocabulary or hashing space.
+    """
+
+    # Number of pending blocks to tolerate before merging them together
+    MAX_PENDING_BLOCKS = 32
+
+    def __init__(self, vectorizer):
+        self.vectorizer = vectorizer
+        self.ids = []
+        self.row_of = {}
+        self.doc_freq_columns = np.zeros(0, dtype=np.int32)
+        self.doc_freq = np.zeros(0, dtype=np.int32)
+        self.idf_columns = np.zeros(0, dtype=np.int32)
+        self.idf = np.zeros(0, dtype=np.float64)
+
+        # Rows weighted with the IDF of the last refresh
+        self.counts = sp.csr_matrix((0, 0), dtype=np.float64)
+        self.vectors = sp.csr_matrix((0, 0), dtype=np.float64)
+
+        # Rows added since the last refresh, scored separately to avoid copying the main matrix
+        self._pending_counts = []
+        self._pending_vectors = []
+
+    def __len__(self):
+        return len(self.row_of)
+
+    def _idf_for(self, columns: np.ndarray) -> np.ndarray:
+        """IDF of each column, for terms that were not in the index at the last refresh too"""
+        # Unseen terms get the IDF of a term that occurs in no stored document
+        unseen_idf = np.log(1 + len(self)) + 1
+        if len(self.idf_columns) == 0:
+            return np.full(len(columns), unseen_idf)
+
+        positions = np.minimum(np.searchsorted(self.idf_columns, columns), len(self.idf_columns) - 1)
+        return np.where(self.idf_columns[positions] == columns, self.idf[positions], unseen_idf)
+
+    def _update_doc_freq(self, columns: np.ndarray, delta: int):
+        """Add delta to the document frequency of the terms of some rows (each row lists a column once)"""
+        columns, counts = np.unique(columns, return_counts=True)
+        positions = np.searchsorted(self.doc_freq_columns, columns)
+        known = positions < len(self.doc_freq_columns)
+        known[known] = self.doc_freq_columns[positions[known]] == columns[known]
+
+        self.doc_freq[positions[known]] += delta * counts[known]
+        if not known.all():
+            self.doc_freq_columns = np.insert(self.doc_freq_columns, positions[~known], columns[~known])
+            self.doc_freq = np.insert(self.doc_freq, positions[~known], delta * counts[~known])
+        if delta < 0:
+            # Terms no stored row uses any more are dropped
+            used = self.doc_freq > 0
+            self.doc_freq_columns = self.doc_freq_columns[used]
+            self.doc_freq = self.doc_freq[used]
+
+    def weight(self, counts: sp.csr_matrix) -> sp.csr_matrix:
+        """Apply the current IDF weights and L2-normalize each row"""
+        if counts.shape[0] == 0:
+            return counts
+        # Scale each stored value by the IDF of its column (cheaper than a diagonal product on wide matrices)
+        weighted = counts.copy()
+        weighted.data *= self._idf_for(weighted.indices)
+        return normalize(weighted, norm='l2', copy=False)
+
+    def vectorize(self, texts: list) -> sp.csr_matrix:
+        """Build normalized TF-IDF vectors for texts without adding them (or their unseen terms) to the index"""
+        return self.weight(self.vectorizer.term_counts(texts, add_terms=False))
+
+    def add(self, ids: list, texts: list):
+        """Add documents incrementally using the IDF weights of the last refresh"""
+        if not ids:
+            return
+
+        counts = self.vectorizer.term_counts(texts)
+
+        self._update_doc_freq(counts.indices, 1)
+
+        for entry_id in ids:
+            self.row_of[entry_id] = len(self.ids)
+            self.ids.append(entry_id)
+        self._pending_counts.append(counts)
+        self._pending_vectors.append(self.weight(counts))
+
+        # Keep the number of blocks scored per query bounded
+        if len(self._pending_vectors) > self.MAX_PENDING_BLOCKS:
+            self._pending_counts = [self._stack(self._pending_counts)]
+            self._pending_vectors = [self._stack(self._pending_vectors)]
+
+    def _stack(self, blocks: list) -> sp.csr_matrix:
+        """Stack row blocks that may have been built with different vocabulary sizes"""
+        n_features = max(block.shape[1] for block in blocks)
+        resized = []
+        for block in blocks:
+            block = block.copy()
+            block.resize((block.shape[0], n_features))
+            resized.append(block)
+        return sp.vstack(resized, format='csr')
+
+    def _clear_row(self, blocks: list, row: int) -> np.ndarray:
+        """Zero one stored row of a list of row blocks in place, returning the columns it used"""
+        offset = 0
+        for block in blocks:
+            if row < offset + block.shape[0]:
+                start, end = block.indptr[row - offset], block.indptr[row - offset + 1]
+                if not block.data.flags.writeable:
+                    # Rows mapped from a snapshot are copied into private memory before the first write
+                    block.data = np.array(block.data)
+                columns = block.indices[start:end][block.data[start:end] != 0]
+                block.data[start:end] = 0
+                return columns
+            offset += block.shape[0]
+        return np.zeros(0, dtype=np.int32)
+
+    def remove(self, entry_id: str) -> bool:
+        """
+        Tombstone a stored row so it can no longer match, returning False if the ID is not indexed.
+
+        The row keeps its position (eviction drops prefixes by position) until
+        compact() drops it from the matrices.
+        """
+        row = self.row_of.pop(entry_id, None)
+        if row is None:
+            return False
+
+        self.ids[row] = None
+        self._update_doc_freq(self._clear_row([self.counts] + self._pending_counts, row), -1)
+        self._clear_row([self.vectors] + self._pending_vectors, row)
+        return True
+
+    def _row_counts(self) -> sp.csr_matrix:
+        """All stored term-count rows in one matrix"""
+        blocks = [self.counts] + self._pending_counts if self.counts.shape[0] else self._pending_counts
+        return self._stack(blocks) if blocks else self.counts
+
+    def evict_first(self, count: int):
+        """Drop the oldest rows (rows are kept in insertion order) and re-weight the rest"""
+        if count <= 0:
+            return
+
+        counts = self._row_counts()
+
+        # Evicted rows no longer count towards document frequencies (removed rows were already subtracted)
+        evicted = counts[:count]
+        self._update_doc_freq(evicted.indices[evicted.data != 0], -1)
+
+        self.counts = counts[count:]
+        self.ids = self.ids[count:]
+        self.row_of = {entry_id: row for row, entry_id in enumerate(self.ids) if entry_id is not None}
+        self._pending_counts = []
+        self.refresh()
+
+    def compact(self) -> list:
+        """
+        Drop removed rows and re-weight the rest.
+
+        Returns the previous positions of the rows kept, or None when no row
+        was removed.
+        """
+        if len(self.row_of) == len(self.ids):
+            return None
+
+        kept = [row for row, entry_id in enumerate(self.ids) if entry_id is not None]
+        self.counts = self._row_counts()[kept]
+        self.ids = [self.ids[row] for row in kept]
+        self.row_of = {entry_id: row for row, entry_id in enumerate(self.ids)}
+        self._pending_counts = []
+        self.refresh()
+        return kept
+
+    def refresh(self):
+        """Recompute IDF from the current document frequencies and re-weight every stored row"""
+        blocks = [self.counts] + self._pending_counts if self.counts.shape[0] else self._pending_counts
+        if blocks:
+            self.counts = self._stack(blocks)
+
+        n_documents = len(self)
+        self.idf_columns = self.doc_freq_columns.copy()
+        self.idf = np.log((1 + n_documents) / (1 + self.doc_freq)) + 1
+        self.vectors = self.weight(self.counts)
+
+        self._pending_counts = []
+        self._pending_vectors = []
+
+    def save(self, directory: str):
+        """Write the CSR arrays of the stored rows, the document frequencies and the IDF vector as .npy files"""
+        for name, blocks in (("counts", [self.counts] + self._pending_counts), ("vectors", [self.vectors] + self._pending_vectors)):
+            matrix = self._stack(blocks)
+            matrix.sort_indices()
+            np.save(os.path.join(directory, f"{name}_data.npy"), matrix.data)
+            np.save(os.path.join(directory, f"{name}_indices.npy"), matrix.indices)
+            np.save(os.path.join(directory, f"{name}_indptr.npy"), matrix.indptr)
+            np.save(os.path.join(directory, f"{name}_shape.npy"), np.asarray(matrix.shape))
+        for name in ("doc_freq_columns", "doc_freq", "idf_columns", "idf"):
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+
+    def load(self, directory: str, ids: list):
+        """
+        Load a saved index, mapping the CSR and IDF arrays read-only with numpy.memmap.
+
+        Processes that load the same files share their pages; the arrays are
+        only copied into private memory by the next refresh.
+        """
+        def load_matrix(name):
+            arrays = [np.load(os.path.join(directory, f"{name}_{part}.npy"), mmap_mode='r') for part in ("data", "indices", "indptr")]
+            shape = tuple(np.load(os.path.join(directory, f"{name}_shape.npy")))
+            return sp.csr_matrix(tuple(arrays), shape=shape, copy=False)
+
+        self.ids = list(ids)
+        self.row_of = {entry_id: row for row, entry_id in enumerate(self.ids) if entry_id is not None}
+        # Document frequencies change with every add, so they are kept in private memory
+        self.doc_freq_columns = np.load(os.path.join(directory, "doc_freq_columns.npy"))
+        self.doc_freq = np.load(os.path.join(directory, "doc_freq.npy"))
+        self.idf_columns = np.load(os.path.join(directory, "idf_columns.npy"), mmap_mode='r')
+        self.idf = np.load(os.path.join(directory, "idf.npy"), mmap_mode='r')
+        self.counts = load_matrix("counts")
+        self.vectors = load_matrix("vectors")
+        self._pending_counts = []
+        self._pending_vectors = []
+
+    def _blocks(self) -> list:
+        """Stored vector blocks in row order"""
+        return [self.vectors] + self._pending_vectors if self.vectors.shape[0] else self._pending_vectors
+
+    def best_matches(self, vectors: sp.csr_matrix) -> tuple:
+        """
+        Best stored row and its cosine similarity for every query row.
+
+        Each block is scored with one sparse matrix-matrix product and reduced
+        column-wise, so no dense (stored rows x queries) matrix is built.
+        Rows are -1 when nothing in the index shares a term with the query.
+        """
+        best_rows = np.full(vectors.shape[0], -1, dtype=np.int64)
+        best_scores = np.zeros(vectors.shape[0])
+
+        offset = 0
+        for block in self._blocks():
+            # Queries may know terms the stored rows have never seen; those contribute nothing
+            query = vectors[:, :block.shape[1]]
+            product = (block @ query.T).tocsc()
+            if product.nnz:
+                block_rows = np.asarray(product.argmax(axis=0)).ravel()
+                block_scores = product.max(axis=0).toarray().ravel()
+                better = block_scores > best_scores
+                best_rows[better] = block_rows[better] + offset
+                best_scores[better] = block_scores[better]
+            offset += block.shape[0]
+
+        return best_rows, best_scores
+
+    def scores_for_rows(self, vectors: sp.csr_matrix, rows: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the given stored rows (in the given order) against every query row"""
+        results = np.zeros((len(rows), vectors.shape[0]))
+        offset = 0
+        for block in self._blocks():
+            in_block = (rows >= offset) & (rows < offset + block.shape[0])
+            if in_block.any():
+                query = vectors[:, :block.shape[1]]
+                results[in_block] = (block[rows[in_block] - offset] @ query.T).toarray()
+            offset += block.shape[0]
+        return results
+
+# Arrays attached by each scoring worker process (filled by _attach_shared_arrays)
+_worker_matrices = {}
+
+def _share_array(array: np.ndarray) -> tuple:
+    """Copy an array into a new shared memory block and describe it for the workers"""
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+def _attach_shared_arrays(descriptions: dict):
+    """Process pool initializer: map the shared CSR arrays without copying them"""
+    for name, (shape, arrays) in descriptions.items():
+        blocks = [shared_memory.SharedMemory(name=block_name) for block_name, _, _ in arrays]
+        data, indices, indptr = [
+            np.ndarray(array_shape, dtype=np.dtype(dtype), buffer=block.buf)
+            for block, (_, array_shape, dtype) in zip(blocks, arrays)
+        ]
+        _worker_matrices[name] = (sp.csr_matrix((data, indices, indptr), shape=shape, copy=False), blocks)
+
+def _top_k_block(stored: sp.csr_matrix, queries: sp.csr_matrix, stored_start: int, query_start: int,
+                 k: int, threshold: float, exclude_self: bool) -> tuple:
+    """
+    Top-k stored rows of one block for every query row of one block.
+
+    Returns parallel arrays of (query row, stored row, score) using global row
+    numbers, keeping only scores at or above the threshold.
+    """
+    product = (queries @ stored.T).tocsr()
+    if exclude_self:
+        # Drop the diagonal when scoring a matrix against itself
+        product = product.tocoo()
+        keep = (product.row + query_start) != (product.col + stored_start)
+        product = sp.csr_matrix((product.data[keep], (product.row[keep], product.col[keep])), shape=product.shape)
+    product.data[product.data < threshold] = 0
+    product.eliminate_zeros()
+
+    query_rows, stored_rows, scores = [], [], []
+    for row in range(product.shape[0]):
+        start, end = product.indptr[row], product.indptr[row + 1]
+        if start == end:
+            continue
+        row_scores = product.data[start:end]
+        best = np.argsort(-row_scores, kind="stable")[:k]
+        query_rows.append(np.full(len(best), row + query_start, dtype=np.int64))
+        stored_rows.append(product.indices[start:end][best].astype(np.int64) + stored_start)
+        scores.append(row_scores[best])
+
+    if not scores:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+    return np.concatenate(query_rows), np.concatenate(stored_rows), np.concatenate(scores)
+
+def _score_shared_blocks(task: tuple) -> tuple:
+    """Worker entry point: score one (stored block, query block) pair of the shared matrices"""
+    stored_start, stored_end, query_start, query_end, k, threshold, exclude_self = task
+    stored = _worker_matrices["stored"][0][stored_start:stored_end]
+    queries = _worker_matrices["queries"][0][query_start:query_end]
+    return _top_k_block(stored, queries, stored_start, query_start, k, threshold, exclude_self)
+
+class ParallelScorer:
+    """
+    Exact top-k cosine similarity between many queries and a large stored matrix on all cores.
+
+    Both L2-normalized CSR matrices are copied once into shared memory. The
+    stored rows and the queries are split into blocks, every pair of blocks is
+    scored in a process pool, and the per-block top-k lists are merged, so no
+    worker ever holds more than one block of the similarity matrix.
+    """
+
+    def __init__(self, workers: int = None, block_rows: int = config.DUPLICATE_SCORE_BLOCK_ROWS):
+        self.workers = workers or os.cpu_count() or 1
+        self.block_rows = block_rows
+
+    def _tasks(self, n_stored: int, n_queries: int, k: int, threshold: float, exclude_self: bool) -> list:
+        return [
+            (stored_start, min(stored_start + self.block_rows, n_stored),
+             query_start, min(query_start + self.block_rows, n_queries),
+             k, threshold, exclude_self)
+            for stored_start in range(0, n_stored, self.block_rows)
+            for query_start in range(0, n_queries, self.block_rows)
+        ]
+
+    def top_k(self, stored: sp.csr_matrix, queries: sp.csr_matrix = None, k: int = 5, threshold: float = 0.0) -> tuple:
+        """
+        Best k stored rows for every query row with a score at or above threshold.
+
+        Without queries the stored matrix is scored against itself and each row's
+        match with itself is skipped. Returns (query_rows, stored_rows, scores)
+        arrays sorted by query row and then by descending score.
+        """
+        exclude_self = queries is None
+        if queries is None:
+            queries = stored
+        n_features = max(stored.shape[1], queries.shape[1])
+        stored = stored.tocsr().astype(np.float64)
+        queries = queries.tocsr().astype(np.float64)
+        stored.resize((stored.shape[0], n_features))
+        queries.resize((queries.shape[0], n_features))
+
+        tasks = self._tasks(stored.shape[0], queries.shape[0], k, threshold, exclude_self)
+        if not tasks:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+        started = time.perf_counter()
+
+        if self.workers == 1 or len(tasks) == 1:
+            parts = [
+                _top_k_block(stored[task[0]:task[1]], queries[task[2]:task[3]], task[0], task[2], k, threshold, exclude_self)
+                for task in tasks
+            ]
         else:
-            logger.info(f"No duplicates detected. Highest similarity score: {max_similarity:.4f}")
+            parts = self._score_in_pool(stored, queries, tasks)
+
+        query_rows, stored_rows, scores = (np.concatenate(column) for column in zip(*parts))
+
+        # Merge the per-block lists: order by query, then by score, and keep the first k of each query
+        order = np.lexsort((stored_rows, -scores, query_rows))
+        query_rows, stored_rows, scores = query_rows[order], stored_rows[order], scores[order]
+        first = np.searchsorted(query_rows, query_rows, side="left")
+        keep = np.arange(len(query_rows)) - first < k
+
+        logger.info(f"Scored {queries.shape[0]} queries against {stored.shape[0]} rows in {len(tasks)} blocks on {self.workers} workers in {time.perf_counter() - started:.2f}s")
+        return query_rows[keep], stored_rows[keep], scores[keep]
+
+    def _score_in_pool(self, stored: sp.csr_matrix, queries: sp.csr_matrix, tasks: list) -> list:
+        blocks = []
+        try:
+            descriptions = {}
+            for name, matrix in (("stored", stored), ("queries", queries)):
+                arrays = []
+                for array in (matrix.data, matrix.indices, matrix.indptr):
+                    block, description = _share_array(array)
+                    blocks.append(block)
+                    arrays.append(description)
+                descriptions[name] = (matrix.shape, arrays)
+
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_attach_shared_arrays, initargs=(descriptions,)) as pool:
+                return list(pool.map(_score_shared_blocks, tasks))
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    def clusters(self, stored: sp.csr_matrix, ids: list, threshold: float, k: int = 10) -> list:
+        """Groups of ids connected by a similarity at or above threshold (largest first)"""
+        query_rows, stored_rows, _ = self.top_k(stored, k=k, threshold=threshold)
+
+        # Union-find over the matching pairs
+        parent = list(range(len(ids)))
+
+        def find(row):
+            while parent[row] != row:
+                parent[row] = parent[parent[row]]
+                row = parent[row]
+            return row
+
+        for first, second in zip(query_rows, stored_rows):
+            parent[find(first)] = find(second)
+
+        groups = {}
+        for row in set(query_rows.tolist()) | set(stored_rows.tolist()):
+            groups.setdefault(find(row), []).append(ids[row])
+        return sorted((sorted(group) for group in groups.values()), key=len, reverse=True)
+
+class MinHasher:
+    """Compute MinHash signatures over character shingles of a description"""
+
+    # Mersenne prime used by the universal hash family
+    PRIME = (1 << 61) - 1
+
+    def __init__(self, num_perm: int = config.LSH_NUM_PERM, shingle_size: int = config.LSH_SHINGLE_SIZE, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+        # Fixed seed so signatures stored in the database stay comparable across processes
+        generator = np.random.RandomState(seed)
+        self.a = generator.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = generator.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> set:
+        """Overlapping character shingles of the lowercased, whitespace-collapsed text"""
+        normalized = re.sub(r"\s+", " ", (text or "").lower()).strip()
+        if len(normalized) <= self.shingle_size:
+            return {normalized} if normalized else set()
+        return {normalized[i:i + self.shingle_size] for i in range(len(normalized) - self.shingle_size + 1)}
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of a text (all values are PRIME for empty text)"""
+        shingles = self.shingles(text)
+        if not shingles:
+            return np.full(self.num_perm, self.PRIME, dtype=np.uint64)
+
+        # 32-bit shingle hashes keep a * x + b below 2**64, so uint64 arithmetic never overflows
+        hashes = np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+        permuted = (np.outer(self.a, hashes) + self.b[:, None]) % np.uint64(self.PRIME)
+        return permuted.min(axis=1)
+
+    def to_bytes(self, signature: np.ndarray) -> bytes:
+        return signature.astype(np.uint64).tobytes()
+
+    def from_bytes(self, data: bytes):
+        """Decode a stored signature, or None if it was computed with a different configuration"""
+        if not data or len(data) != self.num_perm * 8:
+            return None
+        return np.frombuffer(data, dtype=np.uint64)
+
+class MinHashLSH:
+    """Banded locality-sensitive hash buckets over MinHash signatures"""
+
+    def __init__(self, num_perm: int = config.LSH_NUM_PERM, bands: int = config.LSH_BANDS):
+        if num_perm % bands != 0:
+            raise ValueError(f"LSH_NUM_PERM ({num_perm}) must be divisible by LSH_BANDS ({bands})")
+
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.buckets = [{} for _ in range(bands)]
+
+    def _band_keys(self, signature: np.ndarray) -> list:
+        return [
+            signature[band * self.rows_per_band:(band + 1) * self.rows_per_band].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def add(self, entry_id: str, signature: np.ndarray):
+        for band, key in enumerate(self._band_keys(signature)):
+            self.buckets[band].setdefault(key, set()).add(entry_id)
+
+    def remove(self, entry_id: str, signature: np.ndarray):
+        for band, key in enumerate(self._band_keys(signature)):
+            bucket = self.buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self.buckets[band][key]
+
+    def query(self, signature: np.ndarray) -> set:
+        """IDs that share at least one band with the signature"""
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self.buckets[band].get(key, ()))
+        return candidates
+
+class DuplicateShard:
+    """
+    Duplicate index for one scope (e.g. one city) over a sliding time window.
+
+    Rows are kept in the order they were created, so evicting entries older
+    than the window always drops a prefix of the index.
+    """
+
+    def __init__(self, vectorizer, use_lsh: bool):
+        self.index = DuplicateIndex(vectorizer)
+        self.created_at = []
+
+        # Optional MinHash/LSH buckets; signatures are kept so evicted entries can be removed
+        self.lsh = MinHashLSH() if use_lsh else None
+        self.signatures = {}
+
+        # Perceptual hashes of approved images for Hamming-radius lookups
+        self.image_index = BKTree()
+        self.image_hashes = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def add(self, entry_ids: list, descriptions: list, created_at: list, signatures: list, image_hashes: list):
+        """Add entries (parallel lists, oldest first) with one index update"""
+        self.index.add(entry_ids, descriptions)
+        for entry_id, timestamp, signature, image_hash in zip(entry_ids, created_at, signatures, image_hashes):
+            # Keep timestamps sorted even if rows arrive slightly out of order
+            self.created_at.append(max(timestamp, self.created_at[-1]) if self.created_at else timestamp)
+            if self.lsh is not None:
+                self.lsh.add(entry_id, signature)
+                self.signatures[entry_id] = signature
+            if image_hash:
+                self.image_index.add(int(image_hash, 16), entry_id)
+                self.image_hashes[entry_id] = image_hash
+
+    def remove(self, entry_id: str) -> bool:
+        """Remove an entry from the text, LSH and image indexes, returning False if it is not in this shard"""
+        if not self.index.remove(entry_id):
+            return False
+
+        signature = self.signatures.pop(entry_id, None)
+        if signature is not None:
+            self.lsh.remove(entry_id, signature)
+        image_hash = self.image_hashes.pop(entry_id, None)
+        if image_hash:
+            self.image_index.remove(int(image_hash, 16), entry_id)
+        return True
+
+    def refresh(self):
+        """Drop removed entries and refresh the IDF statistics of the shard's index"""
+        kept = self.index.compact()
+        if kept is not None:
+            self.created_at = [self.created_at[row] for row in kept]
+        else:
+            self.index.refresh()
+
+    def save(self, directory: str):
+        """Write the shard's index, timestamps, signatures and image hashes to a directory"""
+        os.makedirs(directory, exist_ok=True)
+        self.index.save(directory)
+        np.save(os.path.join(directory, "created_at.npy"), np.asarray(self.created_at, dtype=np.float64))
+        if self.lsh is not None:
+            # Removed rows keep an empty signature until the next compaction
+            empty = np.zeros(self.lsh.bands * self.lsh.rows_per_band, dtype=np.uint64)
+            np.save(os.path.join(directory, "signatures.npy"), np.vstack([self.signatures.get(entry_id, empty) for entry_id in self.index.ids]))
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump({"ids": self.index.ids, "image_hashes": self.image_hashes}, f)
+
+    @classmethod
+    def load(cls, directory: str, vectorizer, use_lsh: bool) -> "DuplicateShard":
+        """Load a shard written by save()"""
+        shard = cls(vectorizer, use_lsh)
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+
+        shard.index.load(directory, meta["ids"])
+        shard.created_at = np.load(os.path.join(directory, "created_at.npy")).tolist()
+        if use_lsh:
+            signatures = np.load(os.path.join(directory, "signatures.npy"), mmap_mode='r')
+            for entry_id, signature in zip(meta["ids"], signatures):
+                if entry_id is None:
+                    continue
+                shard.lsh.add(entry_id, signature)
+                shard.signatures[entry_id] = signature
+        for entry_id, image_hash in meta["image_hashes"].items():
+            shard.image_index.add(int(image_hash, 16), entry_id)
+            shard.image_hashes[entry_id] = image_hash
+        return shard
+
+    def evict_before(self, cutoff: float) -> int:
+        """Remove entries created before the cutoff timestamp, returning how many were removed"""
+        count = bisect.bisect_left(self.created_at, cutoff)
+        if count == 0:
+            return 0
+
+        evicted_ids = self.index.ids[:count]
+        self.index.evict_first(count)
+        self.created_at = self.created_at[count:]
+
+        if self.lsh is not None:
+            for entry_id in evicted_ids:
+                # Entries removed after an edit no longer have a signature
+                signature = self.signatures.pop(entry_id, None)
+                if signature is not None:
+                    self.lsh.remove(entry_id, signature)
+
+        # Rebuild the BK-tree from the remaining hashes instead of removing entries one by one
+        if any(entry_id in self.image_hashes for entry_id in evicted_ids):
+            for entry_id in evicted_ids:
+                self.image_hashes.pop(entry_id, None)
+            self.image_index = BKTree()
+            for entry_id, image_hash in self.image_hashes.items():
+                self.image_index.add(int(image_hash, 16), entry_id)
+
+        return sum(entry_id is not None for entry_id in evicted_ids)
+
+class DuplicateChecker:
+    def __init__(self,
+                 refresh_interval_seconds: int = config.DUPLICATE_IDF_REFRESH_SECONDS,
+                 use_lsh: bool = config.DUPLICATE_LSH_ENABLED,
+                 scope: str = config.DUPLICATE_SCOPE,
+                 window_days: float = config.DUPLICATE_WINDOW_DAYS,
+                 vectorizer: str = config.DUPLICATE_VECTORIZER,
+                 snapshot_dir: str = config.DUPLICATE_SNAPSHOT_DIR):
+        if scope not in SCOPE_FIELDS:
+            raise ValueError(f"Unknown DUPLICATE_SCOPE '{scope}'. Use one of: {', '.join(SCOPE_FIELDS)}")
+        if vectorizer not in VECTORIZERS:
+            raise ValueError(f"Unknown DUPLICATE_VECTORIZER '{vectorizer}'. Use one of: {', '.join(VECTORIZERS)}")
+
+        # Vocabulary (or hashing space) is shared by every shard; IDF statistics are per shard
+        self.vectorizer_name = vectorizer
+        self.vectorizer = VECTORIZERS[vectorizer]()
+        self.shards = {}
+        self.scope = scope
+        self.window_days = window_days
+        self.refresh_interval = refresh_interval_seconds
+        self.loaded = False
+        self.last_refresh_time = None
+        self._lock = threading.RLock()
+
+        # Optional MinHash/LSH candidate index so checks only score colliding submissions
+        self.use_lsh = use_lsh
+        self.minhasher = MinHasher() if use_lsh else None
+
+        # On-disk snapshot for warm starts; the high-water mark is the largest approved
+        # submission ID covered, approved_seen the number of approved IDs up to it and
+        # edited_at the latest updated_at of a submission replaced by an edit
+        self.snapshot_dir = snapshot_dir
+        self.high_water_mark = None
+        self.approved_seen = 0
+        self.edited_at = None
+
+        # Time of the last read of approved submissions, for catch_up(), and the
+        # updated_at of recent edits this index already applied, by submission ID
+        self.caught_up_at = None
+        self.applied_edits = {}
+
+    def _scope_key(self, submission) -> str:
+        """Shard key of a submission, model row or sheet row dict"""
+        return "|".join(normalize_content(_field(submission, name)) for name in SCOPE_FIELDS[self.scope])
+
+    def _window_cutoff(self) -> float:
+        """Oldest creation timestamp kept in the index, or None when there is no window"""
+        if not self.window_days:
+            return None
+        return time.time() - self.window_days * 86400
+
+    def shard_for(self, submission) -> DuplicateShard:
+        """Shard a submission belongs to, or None if nothing in its scope is indexed"""
+        return self.shards.get(self._scope_key(submission))
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards.values())
+
+    def _signature_for(self, description: str, stored: bytes = None):
+        """Reuse a stored MinHash signature when it matches the current configuration"""
+        signature = self.minhasher.from_bytes(stored) if stored else None
+        if signature is None:
+            signature = self.minhasher.signature(description)
+        return signature
+
+    def fingerprints(self, submission: NewsSubmission, image_hash: str = None) -> dict:
+        """Column values to store with a submission so the index can be rebuilt from the database"""
+        fingerprints = {"content_hash": content_fingerprint(submission.title, submission.description)}
+        if self.use_lsh:
+            fingerprints["minhash_signature"] = self.minhasher.to_bytes(self.minhasher.signature(submission.description))
+        if image_hash:
+            fingerprints["image_hash"] = image_hash
+        return fingerprints
+
+    def _add_entries(self, entries: list):
+        """Add dicts or model rows to their shards, one index update per shard"""
+        columns = {}
+        for entry in entries:
+            description = _value(entry, "description")
+            shard_columns = columns.setdefault(self._scope_key(entry), ([], [], [], [], []))
+            shard_columns[0].append(str(_value(entry, "id")))
+            shard_columns[1].append(description)
+            shard_columns[2].append(_timestamp(_value(entry, "created_at")))
+            shard_columns[3].append(self._signature_for(description, _value(entry, "minhash_signature")) if self.use_lsh else None)
+            shard_columns[4].append(_value(entry, "image_hash"))
+
+        for key, shard_columns in columns.items():
+            shard = self.shards.get(key)
+            if shard is None:
+                shard = DuplicateShard(self.vectorizer, self.use_lsh)
+                self.shards[key] = shard
+            shard.add(*shard_columns)
+
+    def load(self, entries: list):
+        """
+        Build the index from dicts with an id and a description, ordered by creation time.
+
+        Entries may also carry city, category, created_at and the stored
+        minhash_signature and image_hash columns.
+        """
+        with self._lock:
+            self.vectorizer = VECTORIZERS[self.vectorizer_name]()
+            self.shards = {}
+            self.caught_up_at = time.time()
+            self._add_entries(entries)
+
+            self.refresh()
+            self.loaded = True
+            logger.info(f"Duplicate index built with {len(self)} submissions in {len(self.shards)} shards and {self.vectorizer.n_features} {self.vectorizer_name} features")
+
+    def _entry_columns(self) -> list:
+        columns = [
+            models.Submission.id,
+            models.Submission.description,
+            models.Submission.city,
+            models.Submission.category,
+            models.Submission.created_at,
+            models.Submission.image_hash
+        ]
+        if self.use_lsh:
+            columns.append(models.Submission.minhash_signature)
+        return columns
+
+    def load_from_db(self, db: Session):
+        """Build the index from approved submissions in the database that fall inside the time window"""
+        # Fix the high-water mark first so submissions approved during the load are replayed later
+        approved_seen, high_water_mark = db.query(
+            func.count(models.Submission.id),
+            func.max(models.Submission.id)
+        ).filter(models.Submission.status == "approved").one()
+        edited_at = self._latest_edit(db)
+
+        query = db.query(*self._entry_columns()).filter(
+            models.Submission.status == "approved",
+            models.Submission.id <= (high_water_mark or 0)
+        )
+        cutoff = self._window_cutoff()
+        if cutoff is not None:
+            query = query.filter(models.Submission.created_at >= datetime.fromtimestamp(cutoff, tz=timezone.utc))
+
+        rows = query.order_by(models.Submission.created_at, models.Submission.id).all()
+        self.load([row._asdict() for row in rows])
+        self.high_water_mark = high_water_mark or 0
+        self.approved_seen = approved_seen
+        self.edited_at = edited_at
+
+    def _latest_edit(self, db: Session) -> float:
+        """Epoch seconds of the latest edit of any submission, or None if none was edited"""
+        edited_at = db.query(func.max(models.Submission.updated_at)).scalar()
+        return _timestamp(edited_at) if edited_at is not None else None
+
+    def _snapshot_settings(self) -> dict:
+        """Settings a snapshot must have been built with to be reused"""
+        return {
+            "format": SNAPSHOT_FORMAT,
+            "vectorizer": self.vectorizer_name,
+            "n_features": self.vectorizer.n_features if self.vectorizer_name == "hashing" else None,
+            "scope": self.scope,
+            "window_days": self.window_days,
+            "use_lsh": self.use_lsh,
+            "lsh": [config.LSH_NUM_PERM, config.LSH_BANDS, config.LSH_SHINGLE_SIZE] if self.use_lsh else None,
+        }
+
+    def save_snapshot(self):
+        """
+        Write the index to a new snapshot directory and point CURRENT at it.
+
+        Only indexes loaded from the database are saved, since the snapshot
+        must be validated against the database's high-water mark.
+        """
+        if not self.snapshot_dir or self.high_water_mark is None:
+            return
+
+        with self._lock:
+            started = time.perf_counter()
+            version = f"{int(time.time() * 1000)}-{os.getpid()}"
+            path = os.path.join(self.snapshot_dir, version)
+            try:
+                shard_dirs = {}
+                for number, (key, shard) in enumerate(self.shards.items()):
+                    shard_dirs[key] = f"shard-{number}"
+                    shard.save(os.path.join(path, shard_dirs[key]))
+
+                os.makedirs(path, exist_ok=True)
+                with open(os.path.join(path, "manifest.json"), "w") as f:
+                    json.dump(dict(
+                        self._snapshot_settings(),
+                        high_water_mark=self.high_water_mark,
+                        approved_seen=self.approved_seen,
+                        edited_at=self.edited_at,
+                        shards=shard_dirs,
+                        vocabulary=sorted(getattr(self.vectorizer, "vocabulary", {}), key=self.vectorizer.vocabulary.get) if self.vectorizer_name == "tfidf" else None
+                    ), f)
+
+                # Switch to the new snapshot atomically, so readers never see a partial one
+                pointer = os.path.join(self.snapshot_dir, f"CURRENT.{os.getpid()}")
+                with open(pointer, "w") as f:
+                    f.write(version)
+                os.replace(pointer, os.path.join(self.snapshot_dir, "CURRENT"))
+            except Exception as e:
+                logger.error(f"Error saving duplicate index snapshot: {str(e)}")
+                shutil.rmtree(path, ignore_errors=True)
+                return
+
+            # Keep the latest few snapshots: other workers may still be writing or mapping them
+            versions = sorted(name for name in os.listdir(self.snapshot_dir) if os.path.isdir(os.path.join(self.snapshot_dir, name)))
+            for old in versions[:-SNAPSHOTS_TO_KEEP]:
+                shutil.rmtree(os.path.join(self.snapshot_dir, old), ignore_errors=True)
+
+            logger.info(f"Saved duplicate index snapshot {version} up to submission {self.high_water_mark} in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    def load_snapshot(self, db: Session) -> bool:
+        """
+        Load the current snapshot and replay approved submissions added after it.
+
+        Returns False (leaving the index untouched) when there is no snapshot,
+        it was built with other settings, the database no longer has the same
+        number of approved submissions up to the snapshot's high-water mark, or
+        a submission was edited after the snapshot was written.
+        """
+        if not self.snapshot_dir:
+            return False
+
+        try:
+            with open(os.path.join(self.snapshot_dir, "CURRENT")) as f:
+                path = os.path.join(self.snapshot_dir, f.read().strip())
+            with open(os.path.join(path, "manifest.json")) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            logger.info("No duplicate index snapshot found")
+            return False
+
+        if any(manifest.get(key) != value for key, value in self._snapshot_settings().items()):
+            logger.warning("Duplicate index snapshot was built with different settings, rebuilding from the database")
+            return False
+
+        high_water_mark = manifest["high_water_mark"]
+        approved_seen = db.query(func.count(models.Submission.id)).filter(
+            models.Submission.status == "approved",
+            models.Submission.id <= high_water_mark
+        ).scalar()
+        if approved_seen != manifest["approved_seen"]:
+            logger.warning(f"Duplicate index snapshot is stale ({approved_seen} approved submissions up to {high_water_mark}, snapshot has {manifest['approved_seen']}), rebuilding from the database")
+            return False
+        edited_at = self._latest_edit(db)
+        if edited_at != manifest["edited_at"]:
+            logger.warning("Duplicate index snapshot is stale (submissions were edited after it was written), rebuilding from the database")
+            return False
+
+        with self._lock:
+            started = time.perf_counter()
+            vectorizer = VECTORIZERS[self.vectorizer_name]()
+            if manifest["vocabulary"] is not None:
+                vectorizer.vocabulary = {term: column for column, term in enumerate(manifest["vocabulary"])}
+
+            try:
+                shards = {
+                    key: DuplicateShard.load(os.path.join(path, shard_dir), vectorizer, self.use_lsh)
+                    for key, shard_dir in manifest["shards"].items()
+                }
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Error loading duplicate index snapshot: {str(e)}")
+                return False
+
+            self.vectorizer = vectorizer
+            self.shards = shards
+            self.high_water_mark = high_water_mark
+            self.approved_seen = approved_seen
+            self.edited_at = edited_at
+            self.last_refresh_time = time.monotonic()
+            self.loaded = True
+
+            # Replay submissions approved after the snapshot, then drop entries that have left the window since it was written
+            self.caught_up_at = time.time()
+            rows = db.query(*self._entry_columns()).filter(
+                models.Submission.status == "approved",
+                models.Submission.id > high_water_mark
+            ).order_by(models.Submission.created_at, models.Submission.id).all()
+            self._add_entries([row._asdict() for row in rows])
+            self._track_approved([row.id for row in rows])
+            evicted = self._evict_expired()
+
+            logger.info(f"Loaded duplicate index snapshot with {len(self)} submissions, replayed {len(rows)} newer ones and evicted {evicted} expired ones in {(time.perf_counter() - started) * 1000:.1f}ms")
+            if rows or evicted:
+                self.save_snapshot()
+            return True
+
+    def ensure_loaded(self, db: Session):
+        """
+        Load the index the first time it is needed, from the snapshot when it is still valid.
+
+        Once loaded, catch up with submissions other processes approved or
+        edited since the last call, so every check sees them.
+        """
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    if not self.load_snapshot(db):
+                        self.load_from_db(db)
+                        self.save_snapshot()
+                    return
+        self.catch_up(db, config.DUPLICATE_CATCH_UP_LOOKBACK_SECONDS)
+
+    def catch_up(self, db: Session, lookback_seconds: float) -> int:
+        """
+        Apply submissions approved or edited by other processes since the last read.
+
+        Every API worker, the sync leader and each ingestion worker keeps its
+        own index. Rows created or edited up to lookback_seconds before the
+        last read are read again, in case their transaction committed late;
+        rows already in the index and edits it already applied are skipped.
+        Returns the number of rows added or replaced.
+        """
+        if not self.loaded or self.caught_up_at is None:
+            return 0
+
+        # Read outside the lock so checks are not held up by the query
+        started = time.time()
+        since = self.caught_up_at - lookback_seconds
+        since_time = datetime.fromtimestamp(since, tz=timezone.utc)
+        rows = db.query(*self._entry_columns(), models.Submission.status, models.Submission.updated_at).filter(or_(
+            and_(models.Submission.status == "approved", models.Submission.created_at >= since_time),
+            models.Submission.updated_at >= since_time
+        )).order_by(models.Submission.created_at, models.Submission.id).all()
+
+        with self._lock:
+            applied = 0
+            for row in rows:
+                edited_at = _timestamp(row.updated_at) if row.updated_at is not None else None
+                if edited_at is not None and edited_at >= since:
+                    if self.applied_edits.get(str(row.id)) != edited_at:
+                        # Whether the earlier version was approved is not known here; if the count drifts, the next snapshot load rebuilds
+                        self.update_submission(row, was_approved=any(str(row.id) in shard.index.row_of for shard in self.shards.values()))
+                        applied += 1
+                elif row.status == "approved":
+                    shard = self.shards.get(self._scope_key(row))
+                    if shard is None or str(row.id) not in shard.index.row_of:
+                        self._add_entries([row])
+                        self._track_approved([row.id])
+                        applied += 1
+
+            self.applied_edits = {entry_id: edited_at for entry_id, edited_at in self.applied_edits.items() if edited_at >= since}
+            self.caught_up_at = max(self.caught_up_at, started)
+
+        if applied:
+            logger.info(f"Caught up with {applied} submissions approved or edited elsewhere")
+        return applied
+
+    def _track_approved(self, entry_ids: list):
+        """Move the high-water mark past newly indexed approved submissions"""
+        if self.high_water_mark is None:
+            return
+        for entry_id in entry_ids:
+            self.approved_seen += 1
+            self.high_water_mark = max(self.high_water_mark, int(entry_id))
+
+    def _evict_expired(self) -> int:
+        """Evict entries older than the time window and drop shards left empty, returning how many were evicted"""
+        evicted = 0
+        cutoff = self._window_cutoff()
+        for key, shard in list(self.shards.items()):
+            if cutoff is not None:
+                evicted += shard.evict_before(cutoff)
+            if len(shard) == 0:
+                del self.shards[key]
+        return evicted
+
+    def refresh(self):
+        """Evict entries older than the time window and refresh IDF statistics of every shard"""
+        with self._lock:
+            started = time.perf_counter()
+
+            evicted = self._evict_expired()
+            for shard in self.shards.values():
+                shard.refresh()
+
+            self.last_refresh_time = time.monotonic()
+            logger.info(f"Duplicate index refreshed in {(time.perf_counter() - started) * 1000:.1f}ms ({evicted} entries evicted, {len(self)} kept)")
+
+    def _maybe_refresh(self):
+        """Refresh IDF (and evict old entries) when the configured interval has elapsed"""
+        if self.last_refresh_time is None or time.monotonic() - self.last_refresh_time >= self.refresh_interval:
+            self.refresh()
+            self.save_snapshot()
+
+    def add_submission(self, submission: models.Submission):
+        """Add a stored submission to the index if it was approved"""
+        if submission.status != "approved":
+            return
+
+        with self._lock:
+            self._add_entries([submission])
+            self._track_approved([submission.id])
+            self._maybe_refresh()
+
+    def remove_submission(self, entry_id) -> bool:
+        """Remove a submission from whichever shard indexes it, returning False if none does"""
+        with self._lock:
+            return any(shard.remove(str(entry_id)) for shard in self.shards.values())
+
+    def update_submission(self, submission: models.Submission, was_approved: bool):
+        """
+        Replace the indexed version of a stored submission after an edited sheet row updated it.
+
+        The earlier version is removed from the text, LSH and image indexes
+        (it may live in another shard if the scope fields changed) and the new
+        one is added only if it is still approved.
+        """
+        with self._lock:
+            self.remove_submission(submission.id)
+            if submission.status == "approved":
+                self._add_entries([submission])
+
+            if self.high_water_mark is not None:
+                if submission.status == "approved" and not was_approved:
+                    self._track_approved([submission.id])
+                elif was_approved and submission.status != "approved":
+                    self.approved_seen -= 1
+            updated_at = _value(submission, "updated_at")
+            if updated_at is not None:
+                self.applied_edits[str(submission.id)] = _timestamp(updated_at)
+                if self.high_water_mark is not None:
+                    self.edited_at = max(self.edited_at or 0.0, _timestamp(updated_at))
+            self._maybe_refresh()
+
+    def check_image(self, submission, image_hash: str, exclude_id: str = None) -> DuplicateCheckResult:
+        """
+        Check whether a near-identical image was already approved in the submission's scope.
+
+        exclude_id skips the submission's own earlier version when it is re-checked after an edit.
+        """
+        if not image_hash:
+            return DuplicateCheckResult(is_duplicate=False)
+
+        with self._lock:
+            self._maybe_refresh()
+            shard = self.shard_for(submission)
+            matches = shard.image_index.query(int(image_hash, 16), config.IMAGE_HASH_MAX_DISTANCE) if shard else []
+        matches = [match for match in matches if exclude_id is None or str(match[1]) != str(exclude_id)]
+
+        if not matches:
+            logger.info(f"No near-identical images found for hash {image_hash}")
+            return DuplicateCheckResult(is_duplicate=False)
+
+        distance, entry_id = matches[0]
+        logger.warning(f"Near-identical image detected! Hamming distance: {distance}, matching entry ID: {entry_id}")
+        return DuplicateCheckResult(
+            is_duplicate=True,
+            similarity_score=1.0 - distance / 64,
+            duplicate_entry_id=entry_id
+        )
+
+    def _best_corpus_matches(self, shard: DuplicateShard, descriptions: list, queries: sp.csr_matrix) -> tuple:
+        """Best row of the shard and score for every query, restricted to LSH candidates in LSH mode"""
+        if not self.use_lsh:
+            return shard.index.best_matches(queries)
+
+        best_rows = np.full(len(descriptions), -1, dtype=np.int64)
+        best_scores = np.zeros(len(descriptions))
+
+        candidate_sets = [shard.lsh.query(self.minhasher.signature(description)) for description in descriptions]
+        candidate_ids = sorted(set().union(*candidate_sets))
+        if not candidate_ids:
+            return best_rows, best_scores
+
+        # Score the union of all candidates in one product, then keep each query's own candidates
+        rows = np.array([shard.index.row_of[entry_id] for entry_id in candidate_ids], dtype=np.int64)
+        position = {entry_id: k for k, entry_id in enumerate(candidate_ids)}
+        scores = shard.index.scores_for_rows(queries, rows)
+
+        for j, candidates in enumerate(candidate_sets):
+            if not candidates:
+                continue
+            positions = [position[entry_id] for entry_id in candidates]
+            best = int(np.argmax(scores[positions, j]))
+            best_rows[j] = rows[positions[best]]
+            best_scores[j] = scores[positions[best], j]
+
+        logger.info(f"Scored {len(candidate_ids)} LSH candidates out of {len(shard)} submissions")
+        return best_rows, best_scores
+
+    def _find_content_hashes(self, db: Session, hashes: list) -> dict:
+        """Look up approved submissions by content hash with one indexed query (not limited to a scope or window)"""
+        rows = db.query(models.Submission.content_hash, models.Submission.id).filter(
+            models.Submission.content_hash.in_(set(hashes)),
+            models.Submission.status == "approved"
+        ).all()
+        return {row.content_hash: str(row.id) for row in rows}
+
+    def _check_similar(self, shard: DuplicateShard, descriptions: list, within_batch: bool, exclude_ids: list = None) -> list:
+        """TF-IDF scoring of descriptions against a shard and against earlier descriptions in the list"""
+        with self._lock:
+            logger.info(f"Checking {len(descriptions)} submissions for duplicates among {len(shard) if shard else 0} existing submissions")
+            if shard is not None:
+                queries = shard.index.vectorize(descriptions)
+                corpus_rows, corpus_scores = self._best_corpus_matches(shard, descriptions, queries)
+                corpus_ids = [shard.index.ids[row] if row >= 0 else None for row in corpus_rows]
+                # An edited submission matching its own earlier version is not a duplicate
+                for j, excluded in enumerate(exclude_ids or []):
+                    if excluded is not None and corpus_ids[j] is not None and str(corpus_ids[j]) == str(excluded):
+                        corpus_ids[j] = None
+                        corpus_scores[j] = 0.0
+            else:
+                # Nothing stored in this scope yet; weight queries with an empty index
+                queries = DuplicateIndex(self.vectorizer).vectorize(descriptions)
+                corpus_scores = np.zeros(len(descriptions))
+                corpus_ids = [None] * len(descriptions)
+
+        # Compare each submission with the ones submitted before it in the same batch
+        batch_rows = np.full(len(descriptions), -1, dtype=np.int64)
+        batch_scores = np.zeros(len(descriptions))
+        pairwise = np.tril((queries @ queries.T).toarray(), k=-1) if within_batch and len(descriptions) > 1 else None
+        # Earlier submissions that are duplicates themselves will be rejected, so nothing can match them
+        eligible = np.ones(len(descriptions), dtype=bool)
+
+        results = []
+        for j in range(len(descriptions)):
+            if pairwise is not None and j > 0:
+                candidates = np.where(eligible[:j], pairwise[j, :j], 0.0)
+                batch_rows[j] = candidates.argmax()
+                batch_scores[j] = candidates[batch_rows[j]]
+
+            if batch_scores[j] > corpus_scores[j] and batch_scores[j] >= config.DUPLICATE_THRESHOLD:
+                logger.warning(f"Potential duplicate detected within batch! Similarity score: {batch_scores[j]:.4f}, matching batch position: {batch_rows[j]}")
+                results.append(DuplicateCheckResult(
+                    is_duplicate=True,
+                    similarity_score=float(batch_scores[j]),
+                    duplicate_batch_index=int(batch_rows[j])
+                ))
+            elif corpus_ids[j] is not None and corpus_scores[j] >= config.DUPLICATE_THRESHOLD:
+                logger.warning(f"Potential duplicate detected! Similarity score: {corpus_scores[j]:.4f}, matching entry ID: {corpus_ids[j]}")
+                results.append(DuplicateCheckResult(
+                    is_duplicate=True,
+                    similarity_score=float(corpus_scores[j]),
+                    duplicate_entry_id=corpus_ids[j]
+                ))
+            else:
+                logger.info(f"No duplicates detected. Highest similarity score: {max(corpus_scores[j], batch_scores[j]):.4f}")
+                results.append(DuplicateCheckResult(is_duplicate=False))
+            eligible[j] = not results[j].is_duplicate
+
+        return results
+
+    def check_duplicates_batch(self, submissions: list, within_batch: bool = True, db: Session = None, exclude_ids: list = None) -> list:
+        """
+        Check many submissions at once.
+
+        With a database session, exact and trivially reformatted copies are
+        answered first with one indexed content-hash lookup over all history
+        and every scope (like the unique index on approved content hashes).
+        The remaining submissions are grouped by scope and each group is scored
+        against its shard with one sparse matrix-matrix product. With
+        within_batch, each submission is also compared with the submissions
+        before it in the batch and scope that are not duplicates themselves;
+        such matches set duplicate_batch_index (the position of the earlier
+        submission) and leave duplicate_entry_id empty. Callers should only
+        count them once the earlier submission has been stored as approved,
+        and otherwise check the submission again with within_batch=False.
+        exclude_ids holds, per submission, a stored ID it must not match (its
+        own earlier version when an edited sheet row is checked again), or None.
+        """
+        if not submissions:
+            return []
+        exclude_ids = [str(entry_id) if entry_id is not None else None for entry_id in (exclude_ids or [None] * len(submissions))]
+
+        # Accept NewsSubmission objects as well as sheet rows (dicts with a title and description)
+        titles = [_field(submission, "title") for submission in submissions]
+        descriptions = [_field(submission, "description") for submission in submissions]
+        results = [None] * len(submissions)
+
+        # Exact-duplicate fast path on the normalized content hash
+        hashes = [content_fingerprint(title, description) for title, description in zip(titles, descriptions)]
+        stored = self._find_content_hashes(db, hashes) if db is not None else {}
+        first_position = {}
+        for j, content_hash in enumerate(hashes):
+            if content_hash in stored and stored[content_hash] != exclude_ids[j]:
+                logger.warning(f"Exact duplicate detected! Matching entry ID: {stored[content_hash]}")
+                results[j] = DuplicateCheckResult(is_duplicate=True, similarity_score=1.0, duplicate_entry_id=stored[content_hash])
+            elif within_batch and content_hash in first_position:
+                logger.warning(f"Exact duplicate detected within batch! Matching batch position: {first_position[content_hash]}")
+                results[j] = DuplicateCheckResult(is_duplicate=True, similarity_score=1.0, duplicate_batch_index=first_position[content_hash])
+            first_position.setdefault(content_hash, j)
+
+        # Only submissions without an exact match go through vector scoring, one group per shard
+        groups = {}
+        for j in range(len(submissions)):
+            if results[j] is None:
+                groups.setdefault(self._scope_key(submissions[j]), []).append(j)
+
+        with self._lock:
+            self._maybe_refresh()
+            for key, pending in groups.items():
+                similar = self._check_similar(self.shards.get(key), [descriptions[j] for j in pending], within_batch, [exclude_ids[j] for j in pending])
+                for j, result in zip(pending, similar):
+                    if result.duplicate_batch_index is not None:
+                        result.duplicate_batch_index = pending[result.duplicate_batch_index]
+                    results[j] = result
+
+        return results
+
+    def check_duplicate(self, new_submission: NewsSubmission, existing_submissions: list = None, db: Session = None) -> DuplicateCheckResult:
+        """
+        Check if a new submission is a duplicate of any indexed submission in its scope.
+
+        With a database session, exact copies are found through the content
+        hash index before any vector work. If existing_submissions is given,
+        the check runs against those entries (dicts with a description and
+        optional id) instead of the index.
+        """
+        if existing_submissions is not None:
+            checker = DuplicateChecker(use_lsh=False, scope="global", window_days=0, vectorizer=self.vectorizer_name)
+            checker.load([
+                {"id": sub.get("id", position), "description": sub["description"]}
+                for position, sub in enumerate(existing_submissions)
+            ])
+            return checker.check_duplicate(new_submission)
+
+        if len(self) == 0 and db is None:
+            logger.info("No existing submissions to compare against. Skipping duplicate check.")
             return DuplicateCheckResult(is_duplicate=False)
+
+        return self.check_duplicates_batch([new_submission], within_batch=False, db=db)[0]
+
+# Create a global instance shared by the API and the sync service
+duplicate_checker = DuplicateChecker()
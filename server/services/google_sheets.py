@@ -1,70 +1,374 @@
 import os
+import hashlib
+import json
+import threading
+import time
+from collections.abc import Mapping
+import google_auth_httplib2
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest, build_http
 import config
+from utils.cache import ReadThroughCache
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger("services.google_sheets")
+
+def row_hash(row: list) -> str:
+    """SHA-256 of a row's raw cell values"""
+    return hashlib.sha256("\x1f".join(str(cell) for cell in row).encode("utf-8")).hexdigest()
+
+class SheetRow(Mapping):
+    """
+    One form response read from the sheet.
+
+    A slotted record instead of a dict per row keeps large reads small. It
+    is a read-only mapping like the dicts the rest of the pipeline uses
+    (row["title"], row.get("image_url"), dict(row)), so rows loaded back from
+    JSON payloads go through the same code.
+    """
+    FIELDS = ("timestamp", "title", "description", "city", "category",
+              "publisher_name", "publisher_phone", "image_url", "row_index", "row_hash")
+    __slots__ = FIELDS
+    # The form response itself, as GET /submissions/ serves it; row_index and row_hash are sync bookkeeping
+    FORM_FIELDS = FIELDS[:8]
+
+    def __init__(self, timestamp, title, description, city, category,
+                 publisher_name, publisher_phone, image_url, row_index, row_hash):
+        self.timestamp = timestamp
+        self.title = title
+        self.description = description
+        self.city = city
+        self.category = category
+        self.publisher_name = publisher_name
+        self.publisher_phone = publisher_phone
+        self.image_url = image_url
+        self.row_index = row_index
+        self.row_hash = row_hash
+
+    @classmethod
+    def parse(cls, row: list, row_index: int, indexes: tuple = None):
+        """
+        Build a record from the raw cells of a sheet row, or None if the row is incomplete.
+
+        indexes gives the column of each field from timestamp to image_url
+        (default: columns A to H in form order); the image is optional.
+        """
+        indexes = indexes or SheetSource.DEFAULT_INDEXES
+        # Make sure we have enough columns
+        if len(row) <= max(indexes[:7]):
+            return None
+        values = [row[index] if index < len(row) else "" for index in indexes]
+        return cls(*values, row_index, row_hash(row))
+
+    def __getitem__(self, name: str):
+        if name not in self.FIELDS:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def form_response(self) -> dict:
+        return {name: getattr(self, name) for name in self.FORM_FIELDS}
+
+    def __repr__(self):
+        return f"SheetRow(row_index={self.row_index}, timestamp={self.timestamp!r})"
+
+def column_index(letter: str) -> int:
+    """0-based index of a column letter (A = 0, Z = 25, AA = 26)"""
+    index = 0
+    for char in str(letter).strip().upper():
+        if not "A" <= char <= "Z":
+            raise ValueError(f"Invalid column letter: {letter!r}")
+        index = index * 26 + ord(char) - ord("A") + 1
+    if index == 0:
+        raise ValueError(f"Invalid column letter: {letter!r}")
+    return index - 1
+
+def column_letter(index: int) -> str:
+    """Column letter of a 0-based index"""
+    letter = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letter = chr(ord("A") + remainder) + letter
+    return letter
+
+class SheetSource:
+    """
+    One Google Form response sheet to ingest.
+
+    Several regional forms can be served by one deployment: each source has
+    its own spreadsheet and sheet, column mapping, polling interval and
+    download and moderation budget, and its own watermark (keyed by
+    source_id). Sources are configured with SHEET_SOURCES; without it the
+    single sheet in SPREADSHEET_ID is used.
+    """
+    DEFAULT_SHEET_NAME = 'Form Responses 1'
+    # Columns of the form fields, in the order of the default Google Form
+    DEFAULT_COLUMNS = {
+        "timestamp": "A", "title": "B", "description": "C", "city": "D", "category": "E",
+        "publisher_name": "F", "publisher_phone": "G", "image_url": "H"
+    }
+    # Columns the sync writes its status marks to
+    DEFAULT_MARK_COLUMNS = {"duplicate": "I", "inappropriate": "J", "invalid": "K"}
+    DEFAULT_INDEXES = tuple(range(8))
+
+    def __init__(self, spreadsheet_id: str, sheet_name: str = None, name: str = None,
+                 columns: dict = None, mark_columns: dict = None, poll_seconds: float = None,
+                 download_concurrency: int = None, moderation_concurrency: int = None):
+        self.spreadsheet_id = spreadsheet_id
+        self.sheet_name = sheet_name or self.DEFAULT_SHEET_NAME
+        self.name = name or spreadsheet_id
+        self.poll_seconds = poll_seconds  # None = the sync service's interval
+        self.download_concurrency = download_concurrency or config.SYNC_DOWNLOAD_CONCURRENCY
+        self.moderation_concurrency = moderation_concurrency or config.SYNC_MODERATION_CONCURRENCY
+
+        unknown = set(columns or {}) - set(self.DEFAULT_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown fields in the column mapping of source {self.name}: {', '.join(sorted(unknown))}")
+        self.columns = {**self.DEFAULT_COLUMNS, **(columns or {})}
+        self.mark_columns = {**self.DEFAULT_MARK_COLUMNS, **(mark_columns or {})}
+
+        self.indexes = tuple(column_index(self.columns[field]) for field in SheetRow.FIELDS[:8])
+        # Reads stop at the last form column, so the marks never change a row's hash
+        self.last_column = column_letter(max(self.indexes))
+        for mark, letter in self.mark_columns.items():
+            if column_index(letter) <= max(self.indexes):
+                raise ValueError(f"The {mark} mark column of source {self.name} must come after the form columns (after {self.last_column})")
+
+    @property
+    def source_id(self) -> str:
+        """Identifies this sheet in the sync_state, ingestion ledger and job tables"""
+        return f"{self.spreadsheet_id}:{self.sheet_name}"
+
+    @classmethod
+    def from_dict(cls, entry: dict):
+        """Build a source from one entry of SHEET_SOURCES"""
+        if not entry.get("spreadsheet_id"):
+            raise ValueError(f"Sheet source without a spreadsheet_id: {entry}")
+        return cls(
+            spreadsheet_id=entry["spreadsheet_id"],
+            sheet_name=entry.get("sheet_name"),
+            name=entry.get("name"),
+            columns=entry.get("columns"),
+            mark_columns=entry.get("mark_columns"),
+            poll_seconds=entry.get("poll_seconds"),
+            download_concurrency=entry.get("download_concurrency"),
+            moderation_concurrency=entry.get("moderation_concurrency")
+        )
+
+    def __repr__(self):
+        return f"SheetSource(name={self.name!r}, source_id={self.source_id!r})"
+
+def load_sheet_sources() -> list:
+    """
+    The configured sheet sources.
+
+    SHEET_SOURCES is a JSON list of sources (or the path of a JSON file
+    holding one); without it, the single sheet in SPREADSHEET_ID is used.
+    """
+    if not config.SHEET_SOURCES:
+        return [SheetSource(config.SPREADSHEET_ID, name="default")]
+
+    text = config.SHEET_SOURCES
+    if os.path.isfile(text):
+        with open(text) as sources_file:
+            text = sources_file.read()
+    sources = [SheetSource.from_dict(entry) for entry in json.loads(text)]
+
+    for attribute in ("name", "source_id"):
+        values = [getattr(source, attribute) for source in sources]
+        duplicates = {value for value in values if values.count(value) > 1}
+        if duplicates:
+            raise ValueError(f"Sheet sources must have unique values of {attribute}: {', '.join(sorted(duplicates))}")
+    return sources
 
 class GoogleSheetsService:
-    def __init__(self):
-        self.credentials = service_account.Credentials.from_service_account_file(
+    def __init__(self, source: SheetSource = None, credentials=None):
+        # The sheet to read; several services can share one set of credentials
+        self.source = source or SheetSource(config.SPREADSHEET_ID, name="default")
+        self.credentials = credentials or service_account.Credentials.from_service_account_file(
             config.GOOGLE_CREDENTIALS_FILE, 
             scopes=['https://www.googleapis.com/auth/spreadsheets']
         )
-        self.service = build('sheets', 'v4', credentials=self.credentials)
-        self.spreadsheet_id = config.SPREADSHEET_ID
+        # httplib2 connections are not thread-safe, so every executor thread gets
+        # its own authorized connection, kept open and reused by later calls
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self.service = build('sheets', 'v4', credentials=self.credentials, requestBuilder=self._build_request)
+        self.spreadsheet_id = self.source.spreadsheet_id
+        self.sheet_name = self.source.sheet_name
+        # Identifies this sheet in the sync_state table
+        self.source_id = self.source.source_id
+        # Whole-sheet reads for the feed, shared by concurrent requests (the sync always reads live)
+        self.submissions_cache = ReadThroughCache(
+            self.get_form_responses,
+            ttl_seconds=config.SHEETS_CACHE_TTL_SECONDS,
+            stale_seconds=config.SHEETS_CACHE_STALE_SECONDS,
+            name=f"sheet submissions ({self.source.name})"
+        )
+        # Status marks waiting for the next batchUpdate
+        self.pending_marks = []
+        self._marks_lock = threading.Lock()
+
+    def _build_request(self, http, *args, **kwargs):
+        return HttpRequest(self._connection(), *args, **kwargs)
+
+    def _connection(self):
+        """This thread's authorized connection to the Sheets API"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = google_auth_httplib2.AuthorizedHttp(self.credentials, http=build_http())
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def warm_up(self):
+        """Fetch an OAuth token and open a connection, so the first real call does not pay for them"""
+        self.service.spreadsheets().get(spreadsheetId=self.spreadsheet_id, fields='spreadsheetId').execute()
+        logger.info("Google Sheets client warmed up")
+
+    def close(self):
+        """Close every thread's connection (marks still buffered are written first)"""
+        self.flush_marks()
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self.service.close()
 
     def get_all_submissions(self):
         """Fetch all submissions from Google Sheet"""
+        return self.get_submissions(start_row=0)
+
+    def get_form_responses(self):
+        """Fetch all form responses without the sync's row_index and row_hash (the GET /submissions/ feed)"""
+        return [row.form_response() for row in self.iter_submissions()]
+
+    def invalidate_cache(self):
+        """Drop cached reads, e.g. because the sync found new rows"""
+        self.submissions_cache.invalidate()
+
+    def get_submissions(self, start_row: int = 0):
+        """
+        Fetch submissions from a data row onwards (0 = first row after the headers).
+
+        Each submission carries its row_index (for marking the row later) and a
+        row_hash of the raw cell values (for detecting edits).
+        """
+        return list(self.iter_submissions(start_row))
+
+    def iter_submissions(self, start_row: int = 0, chunk_rows: int = None):
+        """Yield submissions one by one, reading the sheet a chunk at a time"""
+        for chunk in self.iter_submission_chunks(start_row, chunk_rows):
+            yield from chunk
+
+    def iter_submission_chunks(self, start_row: int = 0, chunk_rows: int = None):
+        """
+        Yield the submissions from a data row onwards in lists of at most chunk_rows.
+
+        Each chunk is one values().get of a fixed row range, requested only
+        when the previous chunk has been consumed, so a caller that processes
+        chunk by chunk holds one chunk of the sheet at a time. A chunk shorter
+        than the range means the end of the sheet was reached.
+        """
+        chunk_rows = chunk_rows or config.SHEETS_READ_CHUNK_ROWS
         sheet = self.service.spreadsheets()
-        result = sheet.values().get(
-            spreadsheetId=self.spreadsheet_id,
-            range='Form Responses 1!A2:H'  # Assuming headers are in row 1
-        ).execute()
-        values = result.get('values', [])
-        
-        submissions = []
-        for row in values:
-            # Make sure we have enough columns
-            if len(row) >= 7:
-                submission = {
-                    "timestamp": row[0] if len(row) > 0 else "",
-                    "title": row[1] if len(row) > 1 else "",
-                    "description": row[2] if len(row) > 2 else "",
-                    "city": row[3] if len(row) > 3 else "",
-                    "category": row[4] if len(row) > 4 else "",
-                    "publisher_name": row[5] if len(row) > 5 else "",
-                    "publisher_phone": row[6] if len(row) > 6 else "",
-                    "image_url": row[7] if len(row) > 7 else ""
-                }
-                submissions.append(submission)
-        
-        return submissions
+        while True:
+            result = sheet.values().get(
+                spreadsheetId=self.spreadsheet_id,
+                range=f'{self.sheet_name}!A{start_row + 2}:{self.source.last_column}{start_row + chunk_rows + 1}'  # Headers are in row 1
+            ).execute()
+            values = result.get('values', [])
+
+            chunk = []
+            for offset, row in enumerate(values):
+                submission = SheetRow.parse(row, start_row + offset, self.source.indexes)
+                if submission is not None:
+                    chunk.append(submission)
+            if chunk:
+                yield chunk
+
+            if len(values) < chunk_rows:
+                return
+            start_row += chunk_rows
 
     def mark_as_duplicate(self, row_index):
         """Mark a submission as duplicate in the sheet"""
-        sheet = self.service.spreadsheets()
-        sheet.values().update(
-            spreadsheetId=self.spreadsheet_id,
-            range=f'Form Responses 1!I{row_index + 2}',  # Column I, accounting for header
-            valueInputOption='RAW',
-            body={'values': [['DUPLICATE']]}
-        ).execute()
+        self._queue_mark(self.source.mark_columns['duplicate'], row_index, 'DUPLICATE')
 
     def mark_as_inappropriate(self, row_index):
         """Mark a submission as having inappropriate content"""
-        sheet = self.service.spreadsheets()
-        sheet.values().update(
-            spreadsheetId=self.spreadsheet_id,
-            range=f'Form Responses 1!J{row_index + 2}',  # Column J
-            valueInputOption='RAW',
-            body={'values': [['INAPPROPRIATE CONTENT']]}
-        ).execute()
+        self._queue_mark(self.source.mark_columns['inappropriate'], row_index, 'INAPPROPRIATE CONTENT')
 
     def mark_as_invalid(self, row_index):
         """Mark a submission as having invalid fields"""
+        self._queue_mark(self.source.mark_columns['invalid'], row_index, 'INVALID SUBMISSION')
+
+    def clear_marks(self, row_index):
+        """Clear the status marks of a submission whose row was edited (it is marked again after re-checking)"""
+        for column in self.source.mark_columns.values():
+            self._queue_mark(column, row_index, '')
+
+    def _queue_mark(self, column: str, row_index: int, value: str):
+        """
+        Buffer a status mark until the next flush.
+
+        Marks are written together by flush_marks(), which the sync calls at the
+        end of every run; a full buffer of SHEETS_MARK_FLUSH_ROWS is flushed right away.
+        """
+        with self._marks_lock:
+            self.pending_marks.append({
+                'range': f'{self.sheet_name}!{column}{row_index + 2}',  # Accounting for header
+                'values': [[value]]
+            })
+            buffer_full = len(self.pending_marks) >= config.SHEETS_MARK_FLUSH_ROWS
+        if buffer_full:
+            self.flush_marks()
+
+    def flush_marks(self) -> bool:
+        """
+        Write all buffered marks with a single values().batchUpdate call.
+
+        Failed calls are retried SHEETS_WRITE_RETRIES times with a doubling
+        delay. If every attempt fails the marks stay buffered for the next
+        flush and False is returned.
+        """
+        with self._marks_lock:
+            marks, self.pending_marks = self.pending_marks, []
+        if not marks:
+            return True
+
         sheet = self.service.spreadsheets()
-        sheet.values().update(
-            spreadsheetId=self.spreadsheet_id,
-            range=f'Form Responses 1!K{row_index + 2}',  # Column K
-            valueInputOption='RAW',
-            body={'values': [['INVALID SUBMISSION']]}
-        ).execute()
+        delay = config.SHEETS_WRITE_RETRY_SECONDS
+        for attempt in range(config.SHEETS_WRITE_RETRIES + 1):
+            try:
+                sheet.values().batchUpdate(
+                    spreadsheetId=self.spreadsheet_id,
+                    body={'valueInputOption': 'RAW', 'data': marks}
+                ).execute()
+                logger.info(f"Wrote {len(marks)} status marks to the sheet")
+                return True
+            except Exception as e:
+                if attempt == config.SHEETS_WRITE_RETRIES:
+                    logger.error(f"Failed to write {len(marks)} status marks after {attempt + 1} attempts: {str(e)}")
+                    break
+                logger.warning(f"Writing status marks failed (attempt {attempt + 1}), retrying in {delay}s: {str(e)}")
+                time.sleep(delay)
+                delay *= 2
+
+        # Keep the marks (ahead of any queued meanwhile) for the next flush
+        with self._marks_lock:
+            self.pending_marks = marks + self.pending_marks
+        return False
@@ -12,8 +12,19 @@ logger = setup_logger("services.image_moderation")
 
 class ImageModerator:
     def __init__(self):
+        # One client per process (see services/container.py): it keeps a pool of
+        # open connections that is shared by every thread calling moderate_image
         self.client = groq.Groq(api_key=config.GROQ_API_KEY)
         
+    def warm_up(self):
+        """Open a connection to the Groq API before the first moderation needs it"""
+        self.client.models.list()
+        logger.info("Groq client warmed up")
+        
+    def close(self):
+        """Close the client's connection pool"""
+        self.client.close()
+        
     def moderate_image(self, image_path: str) -> ImageModerationResult:
         """Check if an image is appropriate using file analysis and Groq's LLM for additional checks"""
         try:
@@ -0,0 +1,104 @@
+import asyncio
+import json
+import os
+import socket
+import traceback
+import uuid
+
+from db import crud
+from db.database import SessionLocal
+from services.sync_service import SyncService
+from utils.executors import run_db
+from utils.logger import setup_logger
+import config
+
+# Set up logger
+logger = setup_logger("services.ingestion_worker")
+
+class IngestionWorker:
+    """
+    Processes sheet rows queued in the submissions_jobs table (INGESTION_MODE=queue).
+
+    Each round the worker leases up to pool_size jobs, runs them through the
+    same pipeline as the sync (concurrent downloads and moderation, commits in
+    queue order) and marks each job done or failed. Any number of workers can
+    run side by side, in separate processes or on separate machines: claims use
+    SKIP LOCKED, and a job whose worker dies is claimed again once its lease
+    expires. A job that was committed before its worker died is found in the
+    ingestion ledger and completed without being processed twice.
+    """
+
+    def __init__(self, pool_size: int = None, sync_service: SyncService = None):
+        self.pool_size = pool_size or config.INGESTION_WORKER_POOL_SIZE
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.sync_service = sync_service or SyncService(auto_start=False)
+        self.session_factory = SessionLocal
+        self.running = False
+        self.processed_count = 0
+        self.failed_count = 0
+
+    def _claim(self, db) -> list:
+        """Lease a batch of jobs and return (job ID, source, row) tuples"""
+        jobs = crud.claim_jobs(db, self.worker_id, self.pool_size, config.INGESTION_LEASE_SECONDS, config.INGESTION_MAX_ATTEMPTS)
+        return [(job.id, job.source, json.loads(job.payload)) for job in jobs]
+
+    async def run_once(self) -> int:
+        """Claim and process one batch of jobs; returns the number of jobs claimed"""
+        db = self.session_factory()
+        try:
+            claimed = await run_db(self._claim, db)
+            if not claimed:
+                return 0
+            logger.info(f"Worker {self.worker_id} claimed {len(claimed)} jobs")
+
+            # Pick up submissions that other workers approved since the last batch
+            await run_db(self.sync_service.duplicate_checker.ensure_loaded, db)
+
+            # Jobs of the same sheet are ingested together, in queue order
+            by_source = {}
+            for job_id, source, row in claimed:
+                by_source.setdefault(source, []).append((job_id, row))
+
+            for source, jobs in by_source.items():
+                # A worker that died after committing a row left it in the ledger: finish its job without redoing it
+                ingested = await run_db(crud.get_ingested_rows, db, source, [row for _, row in jobs])
+                pending = []
+                for job_id, row in jobs:
+                    if (row["timestamp"], row["row_hash"]) in ingested:
+                        await run_db(crud.complete_job, db, job_id)
+                    else:
+                        pending.append((job_id, row))
+
+                results = await self.sync_service.ingest_rows(db, source, [row for _, row in pending])
+                for (job_id, row), result in zip(pending, results):
+                    if isinstance(result, Exception):
+                        self.failed_count += 1
+                        await run_db(crud.fail_job, db, job_id, str(result), config.INGESTION_MAX_ATTEMPTS)
+                    else:
+                        self.processed_count += 1
+                        await run_db(crud.complete_job, db, job_id, result)
+
+            return len(claimed)
+
+        finally:
+            await run_db(db.close)
+
+    async def run_forever(self):
+        """Process jobs until stopped, sleeping INGESTION_POLL_SECONDS whenever the queue is empty"""
+        self.running = True
+        logger.info(f"Ingestion worker {self.worker_id} started with pool size {self.pool_size}")
+        while self.running:
+            try:
+                claimed = await self.run_once()
+            except Exception as e:
+                logger.error(f"Error in ingestion worker: {str(e)}")
+                logger.error(traceback.format_exc())
+                claimed = 0
+
+            if not claimed:
+                await asyncio.sleep(config.INGESTION_POLL_SECONDS)
+        logger.info(f"Ingestion worker {self.worker_id} stopped")
+
+    def stop(self):
+        """Stop after the current batch"""
+        self.running = False
@@ -0,0 +1,246 @@
+import asyncio
+import hashlib
+import os
+import socket
+import traceback
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from db import crud
+from db.database import engine as default_engine, SessionLocal
+from utils.executors import run_db
+from utils.logger import setup_logger
+import config
+
+# fcntl is POSIX only; Windows falls back to msvcrt for the file lock
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# Set up logger
+logger = setup_logger("services.leader_election")
+
+class LeaderElector:
+    """
+    Elects one process (e.g. one of several uvicorn workers) to run a singleton task.
+
+    On PostgreSQL the leader holds a session-level advisory lock on a dedicated
+    connection; elsewhere (SQLite, local runs) it holds an exclusive lock on
+    LEADER_LOCK_FILE. Both are released by the operating system or the
+    database when the process dies, and the other processes retry every
+    LEADER_HEARTBEAT_SECONDS, so one of them takes over automatically.
+
+    The leader records itself and a heartbeat in the service_leaders table, so
+    every process can report who leads. Other processes can wake the leader
+    through the same row (request_trigger, optionally for one source), which
+    the leader checks on every heartbeat; on_trigger is then called once per
+    requested source (None for every source).
+    """
+
+    def __init__(self, name: str, on_elected, on_demoted, on_trigger=None,
+                 engine=None, lock_file: str = None, heartbeat_seconds: float = None):
+        self.name = name
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.on_trigger = on_trigger
+        self.engine = engine or default_engine
+        self.session_factory = SessionLocal
+        self.lock_file = lock_file or config.LEADER_LOCK_FILE
+        self.heartbeat_seconds = heartbeat_seconds or config.LEADER_HEARTBEAT_SECONDS
+        self.identity = f"{socket.gethostname()}:{os.getpid()}"
+
+        self.is_leader = False
+        self.running = False
+        self._task = None
+        self._lock_connection = None  # PostgreSQL connection holding the advisory lock
+        self._lock_handle = None  # Open lock file
+        self._last_trigger = None
+        self.triggered_sources = []  # Sources of the last "triggered" round
+
+        # Advisory locks are keyed by a signed 64-bit integer
+        self.lock_key = int.from_bytes(hashlib.sha256(f"newsviews:{name}".encode("utf-8")).digest()[:8], "big", signed=True)
+
+    @property
+    def uses_advisory_lock(self) -> bool:
+        return self.engine.dialect.name == "postgresql"
+
+    def _acquire_lock(self) -> bool:
+        """Try to take the lock without waiting"""
+        if self.uses_advisory_lock:
+            connection = self.engine.connect()
+            try:
+                acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key}).scalar()
+                connection.commit()
+            except Exception:
+                connection.close()
+                raise
+            if acquired:
+                self._lock_connection = connection
+            else:
+                connection.close()
+            return bool(acquired)
+
+        directory = os.path.dirname(self.lock_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handle = open(self.lock_file, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            handle.close()
+            return False
+        self._lock_handle = handle
+        return True
+
+    def _lock_alive(self) -> bool:
+        """Whether the lock is still held (an advisory lock dies with its connection)"""
+        if self._lock_connection is None:
+            return self._lock_handle is not None
+        try:
+            self._lock_connection.execute(text("SELECT 1")).scalar()
+            self._lock_connection.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Lost the connection holding the {self.name} leader lock: {str(e)}")
+            return False
+
+    def _release_lock(self):
+        if self._lock_connection is not None:
+            try:
+                self._lock_connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.lock_key})
+                self._lock_connection.commit()
+            except Exception:
+                pass  # Closing the connection releases the lock anyway
+            finally:
+                self._lock_connection.close()
+                self._lock_connection = None
+
+        if self._lock_handle is not None:
+            if fcntl is not None:
+                fcntl.flock(self._lock_handle.fileno(), fcntl.LOCK_UN)
+            self._lock_handle.close()
+            self._lock_handle = None
+
+    def step(self) -> str:
+        """
+        One election round (blocking): take the lock, or check it and heartbeat.
+
+        Returns "elected", "demoted", "triggered" or None.
+        """
+        if not self.is_leader:
+            if not self._acquire_lock():
+                return None
+            self.is_leader = True
+            db = self.session_factory()
+            try:
+                leader = crud.record_leader(db, self.name, self.identity)
+                # Wake-ups requested before the election are covered by the first run
+                self._last_trigger = leader.trigger_requested_at
+            except Exception as e:
+                # The next heartbeat records it; the lock is what makes this process the leader
+                logger.error(f"Failed to record the {self.name} leader: {str(e)}")
+            finally:
+                db.close()
+            logger.info(f"{self.identity} is now the {self.name} leader")
+            return "elected"
+
+        if not self._lock_alive():
+            self._release_lock()
+            self.is_leader = False
+            logger.warning(f"{self.identity} is no longer the {self.name} leader")
+            return "demoted"
+
+        db = self.session_factory()
+        try:
+            requested, sources = crud.leader_heartbeat(db, self.name, self.identity)
+        finally:
+            db.close()
+        if requested is not None and requested != self._last_trigger:
+            self._last_trigger = requested
+            # Rows written before trigger_sources existed wake every source
+            self.triggered_sources = sources or [None]
+            return "triggered"
+        return None
+
+    async def _run(self):
+        """Background task: election rounds every heartbeat"""
+        while self.running:
+            try:
+                event = await run_db(self.step)
+            except Exception as e:
+                logger.error(f"Error during {self.name} leader election: {str(e)}")
+                logger.error(traceback.format_exc())
+                event = None
+
+            if event == "elected":
+                self.on_elected()
+            elif event == "demoted":
+                self.on_demoted()
+            elif event == "triggered" and self.on_trigger is not None:
+                for source in self.triggered_sources:
+                    try:
+                        self.on_trigger(source)
+                    except Exception as e:
+                        # e.g. a source this process does not know
+                        logger.error(f"Error handling {self.name} trigger for source {source}: {str(e)}")
+
+            await asyncio.sleep(self.heartbeat_seconds)
+
+    def start(self):
+        """Start taking part in the election (call from inside the event loop)"""
+        if not self.running:
+            self.running = True
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"{self.identity} joined the {self.name} leader election")
+
+    def stop(self):
+        """Leave the election, stepping down if this process leads"""
+        if self.running:
+            self.running = False
+            if self._task:
+                self._task.cancel()
+        if self.is_leader:
+            self.is_leader = False
+            self.on_demoted()
+        self._release_lock()
+
+    def request_trigger(self, source: str = None) -> bool:
+        """Ask the leader, in whichever process it runs, to run soon for one source or all (blocking)"""
+        db = self.session_factory()
+        try:
+            return crud.request_leader_trigger(db, self.name, source)
+        finally:
+            db.close()
+
+    def status(self) -> dict:
+        """Who leads, as recorded in the database (blocking)"""
+        db = self.session_factory()
+        try:
+            leader = crud.get_leader(db, self.name)
+        finally:
+            db.close()
+
+        result = {
+            "this_process": self.identity,
+            "is_leader": self.is_leader,
+            "leader": None,
+            "leader_since": None,
+            "leader_heartbeat": None,
+            "leader_alive": False
+        }
+        if leader is not None:
+            heartbeat = leader.heartbeat_at
+            if heartbeat is not None and heartbeat.tzinfo is None:
+                heartbeat = heartbeat.replace(tzinfo=timezone.utc)
+            result["leader"] = leader.holder
+            result["leader_since"] = leader.acquired_at.isoformat() if leader.acquired_at else None
+            result["leader_heartbeat"] = heartbeat.isoformat() if heartbeat else None
+            # A leader that missed three heartbeats has most likely died; another process takes over shortly
+            result["leader_alive"] = heartbeat is not None and datetime.now(timezone.utc) - heartbeat < timedelta(seconds=3 * self.heartbeat_seconds)
+        return result
@@ -1,38 +1,73 @@
 import asyncio
+import itertools
 import time
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import os
 from sqlalchemy.orm import Session
 from fastapi import Depends
 import traceback
 
-from services.google_sheets import GoogleSheetsService
 from services.validation import validate_submission
-from services.duplicate_check import DuplicateChecker
-from services.image_moderation import ImageModerator
-from models import NewsSubmission, ImageModerationResult
-from db import crud
+from services.container import container
+from models import NewsSubmission, ImageModerationResult, DuplicateCheckResult
+from db import crud, models
 from db.database import SessionLocal
 from utils.logger import setup_logger
 from utils.config_check import check_google_credentials
-from utils.helpers import process_drive_image, approve_and_save_image, reject_image
+from utils.helpers import process_drive_image, approve_and_save_image, reject_image, compute_image_hash
+from utils.executors import run_io, run_db
 import config
 
 # Set up logger
 logger = setup_logger("services.sync")
 
+class SourceScheduler:
+    """
+    Scheduling state of one sheet source inside the sync service.
+
+    Every source has its own loop, polling interval, trigger and watermark,
+    so a slow or busy sheet does not hold up the polls of the others.
+    """
+    
+    def __init__(self, sheets_service, interval_seconds: float):
+        self.sheets_service = sheets_service
+        self.source = sheets_service.source
+        self.source_id = sheets_service.source_id
+        self.name = self.source.name
+        
+        # Polling starts at the interval and backs off while nothing changes
+        self.interval = interval_seconds
+        self.poll_interval = interval_seconds
+        self.last_sync_time = None
+        self.task = None
+        self.wake = None  # asyncio.Event set by trigger(), created by start() inside the event loop
+        
+        # The persisted sheet watermark, as of the last sync
+        self.sync_state = None
+    
+    @property
+    def max_interval(self) -> float:
+        """Longest polling interval while the sheet is idle"""
+        return max(self.interval, config.SYNC_POLL_MAX_SECONDS)
+
 class SyncService:
     def __init__(self, 
-                 interval_seconds: int = 150,  # Default: 5 minutes
+                 interval_seconds: int = None,  # Shortest polling interval of sources without their own (default: SYNC_POLL_MIN_SECONDS)
                  auto_start: bool = True):
         
+        # Set up sync parameters. Syncs normally run on push triggers; polling is an
+        # adaptive fallback that starts at the interval and backs off while nothing changes
+        self.interval = interval_seconds or config.SYNC_POLL_MIN_SECONDS
+        self.sources = {}  # Source ID -> SourceScheduler
+        
         # Check if Google credentials are properly configured
         self.google_sheets_enabled = check_google_credentials()
         
         if self.google_sheets_enabled:
             try:
-                self.sheets_service = GoogleSheetsService()
-                logger.info("Google Sheets service initialized successfully")
+                for sheets_service in container.sheets_services.values():
+                    self.add_source(sheets_service)
+                logger.info(f"Google Sheets service initialized successfully with {len(self.sources)} sources")
             except Exception as e:
                 self.google_sheets_enabled = False
                 logger.error(f"Failed to initialize Google Sheets service: {str(e)}")
@@ -40,222 +75,651 @@ class SyncService:
         else:
             logger.warning("Google Sheets integration is disabled due to missing configuration")
             
-        # Initialize other services
-        self.duplicate_checker = DuplicateChecker()
-        self.image_moderator = ImageModerator()
+        # Shared services from the process-wide container
+        self.duplicate_checker = container.duplicate_checker
+        self.image_moderator = container.image_moderator
         
-        # Set up sync parameters
-        self.interval = interval_seconds
         self.running = False
-        self.last_sync_time = None
-        self._task = None
+        self.last_trigger_time = None
+        self.trigger_count = 0
+        # Limits the sources processing a chunk at once (see _turn), one semaphore per event loop
+        self._slots = None
+        self._slots_loop = None
         
-        # Track processed row IDs to avoid duplicates
-        self.processed_timestamps = set()
+        # Database sessions
+        self.session_factory = SessionLocal
         
         if auto_start and self.google_sheets_enabled:
             self.start()
+    
+    def add_source(self, sheets_service) -> SourceScheduler:
+        """Sync a sheet through its Sheets client (sources from SHEET_SOURCES are added on construction)"""
+        scheduler = SourceScheduler(sheets_service, sheets_service.source.poll_seconds or self.interval)
+        self.sources[scheduler.source_id] = scheduler
+        return scheduler
+    
+    def find_source(self, name: str):
+        """A source's scheduler by name or source ID, or None"""
+        for scheduler in self.sources.values():
+            if name in (scheduler.name, scheduler.source_id):
+                return scheduler
+        return None
+    
+    def _scheduler_for(self, source: str) -> SourceScheduler:
+        scheduler = self.sources.get(source)
+        if scheduler is None:
+            raise ValueError(f"Sheet source {source} is not configured in this process")
+        return scheduler
             
     def start(self):
-        """Start the synchronization service"""
+        """Start the synchronization service: one loop per sheet source"""
         if not self.google_sheets_enabled:
             logger.warning("Cannot start sync service: Google Sheets integration is disabled")
             return
             
         if not self.running:
             self.running = True
-            self._task = asyncio.create_task(self._sync_loop())
-            logger.info(f"Sync service started. Checking for new submissions every {self.interval} seconds.")
+            for scheduler in self.sources.values():
+                scheduler.wake = asyncio.Event()
+                scheduler.task = asyncio.create_task(self._source_loop(scheduler))
+            logger.info(f"Sync service started for {len(self.sources)} sources. Polling every {self.interval} to {config.SYNC_POLL_MAX_SECONDS} seconds, or sooner when triggered.")
         
     def stop(self):
         """Stop the synchronization service"""
         if self.running:
             self.running = False
-            if self._task:
-                self._task.cancel()
+            for scheduler in self.sources.values():
+                if scheduler.task:
+                    scheduler.task.cancel()
             logger.info("Sync service stopped.")
             
-    async def _sync_loop(self):
-        """Background task to periodically sync with Google Sheets"""
+    def trigger(self, source_id: str = None) -> bool:
+        """
+        Ask the sync loop of one source, or of all sources, to run soon (called by POST /sync/trigger).
+        
+        Returns True if this schedules a sync, False if one was already pending
+        and the trigger was coalesced into it. The loop waits
+        SYNC_TRIGGER_DEBOUNCE_SECONDS after waking, so a burst of form
+        submissions is picked up by a single sync; triggers that arrive while a
+        sync is running schedule exactly one follow-up sync.
+        """
+        self.last_trigger_time = datetime.now()
+        self.trigger_count += 1
+        schedulers = self.sources.values() if source_id is None else [self._scheduler_for(source_id)]
+        
+        scheduled = False
+        for scheduler in schedulers:
+            if scheduler.wake is not None and not scheduler.wake.is_set():
+                scheduler.wake.set()
+                scheduled = True
+        return scheduled
+    
+    async def _wait_for_trigger(self, scheduler: SourceScheduler, timeout: float) -> bool:
+        """Sleep until a trigger or the timeout; returns True if woken by a trigger"""
+        try:
+            await asyncio.wait_for(scheduler.wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        
+        # Debounce: let the rest of a burst arrive, then sync it all at once
+        await asyncio.sleep(config.SYNC_TRIGGER_DEBOUNCE_SECONDS)
+        scheduler.wake.clear()
+        return True
+    
+    async def _source_loop(self, scheduler: SourceScheduler):
+        """Background task of one source: syncs on triggers, with adaptive polling as a fallback"""
         while self.running:
             try:
-                logger.info("Running Google Sheets synchronization...")
-                if self.google_sheets_enabled:
-                    await self.sync_submissions()
-                    self.last_sync_time = datetime.now()
-                    logger.info(f"Sync completed at {self.last_sync_time}. Next sync in {self.interval} seconds.")
+                logger.info(f"Running Google Sheets synchronization of source {scheduler.name}...")
+                new_count = await self.sync_source(scheduler)
+                scheduler.last_sync_time = datetime.now()
+                
+                # Poll at the shortest interval while rows are coming in, back off while idle
+                if new_count:
+                    scheduler.poll_interval = scheduler.interval
                 else:
-                    logger.warning("Skipping sync: Google Sheets integration is disabled")
+                    scheduler.poll_interval = min(scheduler.poll_interval * 2, scheduler.max_interval)
+                logger.info(f"Sync of source {scheduler.name} completed at {scheduler.last_sync_time}. Next poll in {scheduler.poll_interval} seconds unless triggered.")
             except Exception as e:
-                logger.error(f"Error during sync: {str(e)}")
+                logger.error(f"Error during sync of source {scheduler.name}: {str(e)}")
                 logger.error(traceback.format_exc())
             
-            # Wait for the next interval
-            await asyncio.sleep(self.interval)
+            # Wait for a trigger or the next poll
+            if await self._wait_for_trigger(scheduler, scheduler.poll_interval):
+                logger.info(f"Sync of source {scheduler.name} triggered")
+    
+    def _turn(self) -> asyncio.Semaphore:
+        """
+        Process-wide turns at processing a chunk.
+        
+        At most SYNC_SOURCE_CONCURRENCY sources work at once. A source takes a
+        turn per chunk and queues again behind the others for its next chunk
+        (asyncio semaphores are first come, first served), so a full pass over
+        a large sheet does not starve the other sources.
+        """
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots_loop = loop
+            self._slots = asyncio.Semaphore(config.SYNC_SOURCE_CONCURRENCY)
+        return self._slots
     
-    async def sync_submissions(self):
-        """Synchronize new submissions from Google Sheets"""
+    async def sync_submissions(self, source_id: str = None) -> int:
+        """Synchronize new submissions from every source (or one); returns the number of rows stored"""
         # Check if Google Sheets integration is enabled
         if not self.google_sheets_enabled:
             logger.warning("Cannot sync submissions: Google Sheets integration is disabled")
-            return
-            
-        # Get all submissions from Google Sheet
-        try:
-            submissions = self.sheets_service.get_all_submissions()
-        except Exception as e:
-            logger.error(f"Failed to get submissions from Google Sheet: {str(e)}")
-            logger.error(traceback.format_exc())
-            return
+            return 0
         
-        if not submissions:
-            logger.info("No submissions found in Google Sheet.")
-            return
-        
-        # Get database session
-        db = SessionLocal()
+        schedulers = list(self.sources.values()) if source_id is None else [self._scheduler_for(source_id)]
+        counts = await asyncio.gather(*(self.sync_source(scheduler) for scheduler in schedulers))
+        return sum(counts)
+    
+    async def sync_source(self, scheduler: SourceScheduler) -> int:
+        """Synchronize new submissions from one source; returns the number of rows stored"""
+        # Get database session. Every blocking call below (Sheets API, database,
+        # index work) runs on a dedicated executor so the event loop keeps serving requests
+        db = self.session_factory()
         try:
-            # Process each submission
+            source = scheduler.source_id
             new_count = 0
-            for i, sub in enumerate(submissions):
-                # Skip if we've already processed this submission (using timestamp as unique identifier)
-                if sub.get("timestamp") in self.processed_timestamps:
-                    continue
+            
+            async with self._turn():
+                # Earlier failures whose backoff has passed go first, as they are older than any new row
+                if config.INGESTION_MODE != "queue":
+                    new_count += await self._retry_failed_rows(db, source)
                 
-                # Process this new submission
+                # Open the rows after the watermark (or the whole sheet on a reconciliation pass);
+                # the watermark is read on the database pool, the sheet on the I/O pool
                 try:
-                    logger.info(f"Processing new submission: {sub.get('title')} (timestamp: {sub.get('timestamp')})")
-                    
-                    # Extract image URL and process it if it's from Google Drive
-                    temp_image_path = None
-                    permanent_image_path = None
-                    original_image_url = sub.get("image_url", "")  # Store the original URL
-                    
-                    if original_image_url:
-                        image_url = original_image_url
-                        
-                        # Check if it's a Google Drive URL
-                        if "drive.google.com" in image_url or "docs.google.com" in image_url:
-                            logger.info(f"Processing Google Drive image: {image_url}")
-                            success, temp_path, perm_path = process_drive_image(image_url)
-                            
-                            if success:
-                                temp_image_path = temp_path
-                                permanent_image_path = perm_path
-                                logger.info(f"Google Drive image processed successfully. Temp path: {temp_image_path}")
-                            else:
-                                logger.warning(f"Failed to process Google Drive image: {perm_path}")
-                        else:
-                            # For non-Drive URLs, use the existing download function
-                            try:
-                                from utils.helpers import save_downloaded_image
-                                success, result = save_downloaded_image(image_url)
-                                if success:
-                                    # This is already saved to a permanent location
-                                    permanent_image_path = result
-                                    logger.info(f"Downloaded image from URL: {permanent_image_path}")
-                                else:
-                                    logger.warning(f"Failed to download image: {result}")
-                            except Exception as img_err:
-                                logger.error(f"Error processing image URL: {str(img_err)}")
-                    
-                    # Create submission object using either the temp or permanent path
-                    # For Drive images, we'll use the temporary path initially
-                    image_path = temp_image_path or permanent_image_path
-                    
-                    submission = NewsSubmission(
-                        title=sub.get("title", ""),
-                        description=sub.get("description", ""),
-                        city=sub.get("city", ""),
-                        category=sub.get("category", ""),
-                        publisher_name=sub.get("publisher_name", ""),
-                        publisher_phone=sub.get("publisher_phone", ""),
-                        image_path=image_path,
-                        original_image_url=original_image_url  # Store the original URL
-                    )
-                    
-                    # Run validation
-                    validation_result = validate_submission(submission)
-                    
-                    # Check for duplicates
-                    existing_db = db.query(crud.models.Submission).all()
-                    existing_submissions = []
-                    for ex_sub in existing_db:
-                        existing_submissions.append({
-                            "description": ex_sub.description
-                        })
-                    
-                    duplicate_result = self.duplicate_checker.check_duplicate(submission, existing_submissions)
-                    
-                    # Image moderation
-                    moderation_result = None
-                    if image_path and os.path.exists(image_path):
-                        try:
-                            # Try to use the new method that doesn't require sending images to the API
-                            moderation_result = self.image_moderator.moderate_image(image_path)
-                        except Exception as e:
-                            logger.error(f"Error during image moderation: {str(e)}")
-                            # Fallback to basic checks if AI moderation fails
-                            moderation_result = self.image_moderator.moderate_image_with_fallback(image_path)
-                    else:
-                        # If no image, mark as inappropriate
-                        from models import ImageModerationResult
-                        moderation_result = ImageModerationResult(
-                            is_appropriate=False,
-                            reason="Missing or inaccessible image"
-                        )
-                    
-                    # Handle the final disposition of the image based on moderation results
-                    if temp_image_path and permanent_image_path:
-                        if moderation_result.is_appropriate and validation_result.is_valid and not duplicate_result.is_duplicate:
-                            # If everything is okay, move from temp to permanent location
-                            if approve_and_save_image(temp_image_path, permanent_image_path):
-                                # Update the image path in the submission to the permanent location
-                                submission.image_path = permanent_image_path
-                        else:
-                            # If there's any issue, reject and delete the temp image
-                            reject_image(temp_image_path)
-                    
-                    # Store in database
-                    db_submission = crud.create_submission(
-                        db=db,
-                        submission=submission,
-                        validation=validation_result,
-                        duplicate=duplicate_result,
-                        moderation=moderation_result
-                    )
-                    
-                    # Mark as processed
-                    self.processed_timestamps.add(sub.get("timestamp"))
-                    new_count += 1
+                    state = await run_db(crud.get_sync_state, db, source)
+                    chunks, full_pass = await run_io(self._open_rows, scheduler, state)
+                except Exception as e:
+                    logger.error(f"Failed to get submissions from Google Sheet {scheduler.name}: {str(e)}")
+                    logger.error(traceback.format_exc())
+                    return new_count
+            
+            # The sheet is read and processed one chunk of SHEETS_READ_CHUNK_ROWS rows
+            # at a time, so a sync never holds more than one chunk of a large sheet
+            last_chunk = None
+            while True:
+                async with self._turn():
+                    try:
+                        chunk = await run_io(next, chunks, None)
+                    except Exception as e:
+                        logger.error(f"Failed to get submissions from Google Sheet {scheduler.name}: {str(e)}")
+                        logger.error(traceback.format_exc())
+                        full_pass = False  # The next sync continues from the watermark
+                        break
+                    if chunk is None:
+                        break
                     
-                    # If submission was rejected, mark it in Google Sheets
-                    if not validation_result.is_valid:
-                        self.sheets_service.mark_as_invalid(i)
-                    elif duplicate_result.is_duplicate:
-                        self.sheets_service.mark_as_duplicate(i)
-                    elif not moderation_result.is_appropriate:
-                        self.sheets_service.mark_as_inappropriate(i)
-                        
-                    logger.info(f"Processed submission ID {db_submission.id} with status {db_submission.status}")
+                    new_count += await self._sync_chunk(db, source, chunk)
                     
-                except Exception as sub_err:
-                    logger.error(f"Error processing submission {i+2}: {str(sub_err)}")
-                    logger.error(traceback.format_exc())
-                    # Continue with next submission
+                    # Rows that failed are retried from the row_failures table, so the
+                    # watermark moves past every chunk (an interrupted sync resumes after it)
+                    await run_db(self._advance_watermark, db, scheduler, chunk, False)
+                last_chunk = chunk
+            
+            if last_chunk is None:
+                logger.info(f"No new submissions found in Google Sheet {scheduler.name}.")
+            elif full_pass:
+                await run_db(self._advance_watermark, db, scheduler, last_chunk, True)
             
-            logger.info(f"Sync complete. Processed {new_count} new submissions.")
+            logger.info(f"Sync of source {scheduler.name} complete. Processed {new_count} new submissions.")
+            return new_count
             
         finally:
-            db.close()
+            await run_db(db.close)
+    
+    async def _sync_chunk(self, db: Session, source: str, chunk: list) -> int:
+        """Queue or ingest the rows of one chunk that are new or were edited since they were ingested"""
+        # Compare each row's hash with the ingestion ledger in one query; unchanged rows are skipped
+        added, changed, unchanged = await run_db(crud.diff_rows, db, source, chunk)
+        if changed:
+            logger.info(f"Sheet rows: {len(added)} new, {len(changed)} edited, {unchanged} unchanged")
+        new_rows = added + [sub for sub, _ in changed]
+        if not new_rows:
+            return 0
+        
+        # The feed's cached copy of the sheet is out of date now
+        self._scheduler_for(source).sheets_service.invalidate_cache()
+        
+        if config.INGESTION_MODE == "queue":
+            # Ingestion workers (python worker.py) process the rows; the sync only queues them
+            queued = await run_db(crud.enqueue_jobs, db, source, new_rows)
+            logger.info(f"Queued {queued} new rows for the ingestion workers")
+            return queued
+        
+        # Rows that are dead-lettered or still backing off wait, even if a reconciliation pass read them again
+        held_back = await run_db(crud.get_held_back_rows, db, source, new_rows)
+        return await self._ingest_and_track(db, source, [
+            sub for sub in new_rows if (sub["timestamp"], sub["row_hash"]) not in held_back
+        ], self._revisions(changed))
+    
+    async def _retry_failed_rows(self, db: Session, source: str) -> int:
+        """Ingest earlier failures whose backoff has passed; returns the number stored"""
+        due = await run_db(crud.get_due_row_failures, db, source)
+        if not due:
+            return 0
+        
+        # Rows stored since by other means (e.g. a requeue racing a sync) are only forgotten
+        ingested = await run_db(crud.get_ingested_rows, db, source, due)
+        await run_db(crud.clear_row_failures, db, source, [sub for sub in due if (sub["timestamp"], sub["row_hash"]) in ingested])
+        retries = [sub for sub in due if (sub["timestamp"], sub["row_hash"]) not in ingested]
+        if retries:
+            logger.info(f"Retrying {len(retries)} previously failed rows")
+        return await self._ingest_and_track(db, source, retries)
+    
+    async def _ingest_and_track(self, db: Session, source: str, rows: list, revisions: dict = None) -> int:
+        """
+        Ingest rows inline and record the outcome of each for retries.
+        
+        A row that fails is retried after INGESTION_RETRY_BASE_SECONDS, doubling
+        per attempt, and dead-lettered after INGESTION_MAX_ATTEMPTS attempts.
+        revisions is passed on to ingest_rows. Returns the number of rows stored.
+        """
+        if not rows:
+            return 0
+        
+        # Sheet order, so rows are checked for duplicates against the rows before them
+        rows = sorted(rows, key=lambda sub: sub["row_index"])
+        results = await self.ingest_rows(db, source, rows, revisions)
+        
+        stored = []
+        for sub, result in zip(rows, results):
+            if isinstance(result, Exception):
+                await run_db(crud.record_row_failure, db, source, sub, str(result), config.INGESTION_MAX_ATTEMPTS)
+            else:
+                stored.append(sub)
+        await run_db(crud.clear_row_failures, db, source, stored)
+        return len(stored)
+    
+    async def ingest_rows(self, db: Session, source: str, rows: list, revisions: dict = None) -> list:
+        """
+        Run sheet rows through validation, duplicate checks and moderation and store them.
+        
+        Used by the sync itself (INGESTION_MODE=inline) and by the ingestion
+        workers (INGESTION_MODE=queue). Returns, per row, the ID of the stored
+        submission or the exception that stopped it. Downloads and moderation
+        calls are bounded by the source's own budget. revisions maps the
+        (timestamp, row_hash) of edited rows to the submissions they update;
+        when it is not given (workers, retries) the rows are diffed against
+        the ingestion ledger here.
+        """
+        try:
+            scheduler = self._scheduler_for(source)
+        except ValueError as e:
+            # Queued rows of a sheet this process does not know fail, and are retried or dead-lettered
+            logger.error(str(e))
+            return [e] * len(rows)
+        
+        # Build the duplicate index on first use; later batches reuse it
+        await run_db(self.duplicate_checker.ensure_loaded, db)
+        
+        # Edited rows update their earlier submission, which must not count as a duplicate of them
+        if revisions is None:
+            revisions = await run_db(self._find_revisions, db, source, rows)
+        exclude_ids = [revisions.get((sub.get("timestamp"), sub["row_hash"])) for sub in rows]
+        
+        # Check all rows for duplicates in one pass (exact copies via the content hash index first)
+        duplicate_results = await run_db(self.duplicate_checker.check_duplicates_batch, rows, db=db, exclude_ids=exclude_ids)
+        stored_ids = {}  # Batch position -> database ID of rows stored as approved
+        
+        # Downloads and moderation of all rows run concurrently (bounded per stage);
+        # results are committed one by one in sheet order
+        download_limit = asyncio.Semaphore(scheduler.source.download_concurrency)
+        moderation_limit = asyncio.Semaphore(scheduler.source.moderation_concurrency)
+        prepared_rows = [
+            asyncio.create_task(self._prepare_row(sub, duplicate_results[position], download_limit, moderation_limit, exclude_ids[position]))
+            for position, sub in enumerate(rows)
+        ]
+        
+        # Process each submission
+        results = []
+        for position, sub in enumerate(rows):
+            i = sub["row_index"]
+            try:
+                prepared = await prepared_rows[position]
+                # A match with an earlier row of this batch only counts if that row was stored as approved
+                batch_index = prepared["duplicate"].duplicate_batch_index
+                if batch_index is not None and batch_index not in stored_ids:
+                    prepared = await self._recheck_row(db, prepared, moderation_limit)
+                db_submission = await run_db(self._commit_row, db, source, i, sub, prepared, stored_ids)
+                if db_submission.status == "approved":
+                    stored_ids[position] = str(db_submission.id)
+                results.append(db_submission.id)
+                
+            except Exception as sub_err:
+                await run_db(db.rollback)
+                logger.error(f"Error processing submission {i+2}: {str(sub_err)}")
+                logger.error(traceback.format_exc())
+                results.append(sub_err)
+                # Continue with next submission
+        
+        # Write the status marks to the sheet in one batchUpdate (kept for the next flush if it fails)
+        await run_io(scheduler.sheets_service.flush_marks)
+        return results
+    
+    def _find_revisions(self, db: Session, source: str, rows: list) -> dict:
+        """Diff rows against the ingestion ledger and return the revision map of the edited ones"""
+        _, changed, _ = crud.diff_rows(db, source, rows)
+        return self._revisions(changed)
+    
+    def _revisions(self, changed: list) -> dict:
+        """(timestamp, row_hash) of edited rows -> IDs of the submissions they update"""
+        return {(sub.get("timestamp"), sub["row_hash"]): entry.submission_id for sub, entry in changed}
+            
+    async def _download_image(self, image_url: str):
+        """Download a row's image; returns (temp path, permanent path), either may be None"""
+        temp_image_path = None
+        permanent_image_path = None
+        
+        # Check if it's a Google Drive URL
+        if "drive.google.com" in image_url or "docs.google.com" in image_url:
+            logger.info(f"Processing Google Drive image: {image_url}")
+            success, temp_path, perm_path = await run_io(process_drive_image, image_url)
+            
+            if success:
+                temp_image_path = temp_path
+                permanent_image_path = perm_path
+                logger.info(f"Google Drive image processed successfully. Temp path: {temp_image_path}")
+            else:
+                logger.warning(f"Failed to process Google Drive image: {perm_path}")
+        else:
+            # For non-Drive URLs, use the existing download function
+            try:
+                from utils.helpers import save_downloaded_image
+                success, result = await run_io(save_downloaded_image, image_url)
+                if success:
+                    # This is already saved to a permanent location
+                    permanent_image_path = result
+                    logger.info(f"Downloaded image from URL: {permanent_image_path}")
+                else:
+                    logger.warning(f"Failed to download image: {result}")
+            except Exception as img_err:
+                logger.error(f"Error processing image URL: {str(img_err)}")
+        
+        return temp_image_path, permanent_image_path
+    
+    async def _prepare_row(self, sub: dict, duplicate_result: DuplicateCheckResult,
+                           download_limit: asyncio.Semaphore, moderation_limit: asyncio.Semaphore,
+                           revision_id: int = None) -> dict:
+        """
+        Download, validate and moderate one row without touching the database.
+        
+        Each stage waits for its own semaphore, so downloads of later rows
+        overlap with moderation of earlier ones. revision_id is the stored
+        submission an edited row replaces.
+        """
+        logger.info(f"Processing new submission: {sub.get('title')} (timestamp: {sub.get('timestamp')})")
+        
+        # Extract image URL and process it if it's from Google Drive
+        temp_image_path = None
+        permanent_image_path = None
+        original_image_url = sub.get("image_url", "")  # Store the original URL
+        
+        if original_image_url:
+            async with download_limit:
+                temp_image_path, permanent_image_path = await self._download_image(original_image_url)
+        
+        # Create submission object using either the temp or permanent path
+        # For Drive images, we'll use the temporary path initially
+        image_path = temp_image_path or permanent_image_path
+        
+        submission = NewsSubmission(
+            title=sub.get("title", ""),
+            description=sub.get("description", ""),
+            city=sub.get("city", ""),
+            category=sub.get("category", ""),
+            publisher_name=sub.get("publisher_name", ""),
+            publisher_phone=sub.get("publisher_phone", ""),
+            image_path=image_path,
+            original_image_url=original_image_url  # Store the original URL
+        )
+        
+        # Run validation
+        validation_result = validate_submission(submission)
+        
+        # Catch re-uploaded photos with reworded text through the perceptual image hash
+        image_hash = await run_io(compute_image_hash, image_path)
+        # (the index lock may be held by a commit, so the lookup waits on the database pool, not the loop)
+        if not duplicate_result.is_duplicate:
+            duplicate_result = await run_db(self.duplicate_checker.check_image, submission, image_hash, revision_id)
+        
+        # Image moderation (duplicates are rejected anyway, so don't spend a moderation call)
+        if duplicate_result.is_duplicate:
+            moderation_result = ImageModerationResult(
+                is_appropriate=True,
+                reason="Moderation skipped for duplicate submission"
+            )
+        else:
+            moderation_result = await self._moderate(image_path, moderation_limit)
+        
+        return {
+            "submission": submission,
+            "validation": validation_result,
+            "duplicate": duplicate_result,
+            "moderation": moderation_result,
+            "image_hash": image_hash,
+            "temp_image_path": temp_image_path,
+            "permanent_image_path": permanent_image_path,
+            "revision_id": revision_id
+        }
+    
+    async def _moderate(self, image_path: str, moderation_limit: asyncio.Semaphore) -> ImageModerationResult:
+        """Moderate a row's image, bounded by the source's moderation budget"""
+        if not image_path or not os.path.exists(image_path):
+            # If no image, mark as inappropriate
+            return ImageModerationResult(
+                is_appropriate=False,
+                reason="Missing or inaccessible image"
+            )
+        
+        async with moderation_limit:
+            try:
+                # Try to use the new method that doesn't require sending images to the API
+                return await run_io(self.image_moderator.moderate_image, image_path)
+            except Exception as e:
+                logger.error(f"Error during image moderation: {str(e)}")
+                # Fallback to basic checks if AI moderation fails
+                return await run_io(self.image_moderator.moderate_image_with_fallback, image_path)
+    
+    async def _recheck_row(self, db: Session, prepared: dict, moderation_limit: asyncio.Semaphore) -> dict:
+        """
+        Check a prepared row again against stored submissions alone.
+        
+        Used when the earlier row of the batch it matched was rejected or failed
+        to commit. Approved rows of the batch are in the index by now, so they
+        still count; moderation skipped for the duplicate runs now.
+        """
+        submission = prepared["submission"]
+        revision_id = prepared["revision_id"]
+        logger.info(f"Earlier batch row {prepared['duplicate'].duplicate_batch_index} was not approved, checking '{submission.title}' again")
+        
+        duplicate_result = (await run_db(self.duplicate_checker.check_duplicates_batch, [submission], within_batch=False, db=db, exclude_ids=[revision_id]))[0]
+        if not duplicate_result.is_duplicate:
+            duplicate_result = await run_db(self.duplicate_checker.check_image, submission, prepared["image_hash"], revision_id)
+        
+        moderation_result = prepared["moderation"]
+        if not duplicate_result.is_duplicate:
+            moderation_result = await self._moderate(submission.image_path, moderation_limit)
+        return dict(prepared, duplicate=duplicate_result, moderation=moderation_result)
+    
+    def _commit_row(self, db: Session, source: str, i: int, sub: dict, prepared: dict, stored_ids: dict):
+        """Store a prepared row and mark it in the sheet; rows are committed in sheet order"""
+        sheets_service = self._scheduler_for(source).sheets_service
+        submission = prepared["submission"]
+        validation_result = prepared["validation"]
+        duplicate_result = prepared["duplicate"]
+        moderation_result = prepared["moderation"]
+        image_hash = prepared["image_hash"]
+        
+        # Duplicates of an earlier row in this sync reference its database ID
+        if duplicate_result.duplicate_batch_index is not None:
+            duplicate_result.duplicate_entry_id = stored_ids.get(duplicate_result.duplicate_batch_index)
+        
+        # Earlier rows of this sync are in the image index by now
+        revision_id = prepared.get("revision_id")
+        if not duplicate_result.is_duplicate:
+            duplicate_result = self.duplicate_checker.check_image(submission, image_hash, revision_id)
+        
+        # Handle the final disposition of the image based on moderation results
+        temp_image_path = prepared["temp_image_path"]
+        permanent_image_path = prepared["permanent_image_path"]
+        if temp_image_path and permanent_image_path:
+            if moderation_result.is_appropriate and validation_result.is_valid and not duplicate_result.is_duplicate:
+                # If everything is okay, move from temp to permanent location
+                if approve_and_save_image(temp_image_path, permanent_image_path):
+                    # Update the image path in the submission to the permanent location
+                    submission.image_path = permanent_image_path
+            else:
+                # If there's any issue, reject and delete the temp image
+                reject_image(temp_image_path)
+        
+        ledger_entry = {
+            "source": source,
+            "row_timestamp": sub.get("timestamp"),
+            "row_hash": sub["row_hash"],
+            "row_index": i
+        }
+        previous = crud.get_submission(db, revision_id) if revision_id is not None else None
+        
+        if previous is not None:
+            # An edited row: update its submission in place instead of storing a second copy
+            was_approved = previous.status == "approved"
+            previous_image_path = previous.image_path
+            db_submission = crud.update_submission(
+                db=db,
+                submission_id=previous.id,
+                submission=submission,
+                validation=validation_result,
+                duplicate=duplicate_result,
+                moderation=moderation_result,
+                fingerprints=self.duplicate_checker.fingerprints(submission, image_hash),
+                ledger_entry=ledger_entry
+            )
+            self.duplicate_checker.update_submission(db_submission, was_approved)
+            self._remove_replaced_image(previous_image_path, db_submission.image_path)
+            # Marks of the previous version no longer apply
+            sheets_service.clear_marks(i)
+        else:
+            # Store in database
+            db_submission = crud.create_submission(
+                db=db,
+                submission=submission,
+                validation=validation_result,
+                duplicate=duplicate_result,
+                moderation=moderation_result,
+                fingerprints=self.duplicate_checker.fingerprints(submission, image_hash),
+                ledger_entry=ledger_entry
+            )
+            self.duplicate_checker.add_submission(db_submission)
+        
+        # If submission was rejected, mark it in Google Sheets
+        if not validation_result.is_valid:
+            sheets_service.mark_as_invalid(i)
+        elif duplicate_result.is_duplicate:
+            sheets_service.mark_as_duplicate(i)
+        elif not moderation_result.is_appropriate:
+            sheets_service.mark_as_inappropriate(i)
             
+        logger.info(f"Processed submission ID {db_submission.id} with status {db_submission.status}")
+        return db_submission
+    
+    def _remove_replaced_image(self, old_path: str, new_path: str):
+        """Delete the image of a submission's previous version once an edit replaced it"""
+        if not old_path or old_path == new_path or not os.path.exists(old_path):
+            return
+        try:
+            os.remove(old_path)
+            logger.info(f"Removed replaced image: {old_path}")
+        except Exception as e:
+            logger.warning(f"Failed to remove replaced image {old_path}: {str(e)}")
+    
+    def _open_rows(self, scheduler: SourceScheduler, state: models.SyncState):
+        """
+        Open the rows to sync as an iterator of chunks, and whether this is a full reconciliation pass.
+        
+        Normally only the rows from the watermark (state, or None before the
+        first sync) onwards are requested. The whole sheet is read when there
+        is no watermark, when the row at the watermark changed (edited, deleted
+        or re-sorted rows), or when SYNC_FULL_RECONCILE_SECONDS have passed
+        since the last full pass. Only talks to the Sheets API.
+        """
+        sheets_service = scheduler.sheets_service
+        
+        full_pass_due = True
+        if state is not None and state.last_row is not None and state.last_full_sync is not None:
+            last_full_sync = state.last_full_sync
+            if last_full_sync.tzinfo is None:
+                last_full_sync = last_full_sync.replace(tzinfo=timezone.utc)
+            full_pass_due = (datetime.now(timezone.utc) - last_full_sync).total_seconds() >= config.SYNC_FULL_RECONCILE_SECONDS
+        
+        if not full_pass_due:
+            # Re-read the watermark row itself (the start of the first chunk) to make sure nothing before it moved
+            chunks = sheets_service.iter_submission_chunks(start_row=state.last_row)
+            first = next(chunks, [])
+            if first and first[0]["row_index"] == state.last_row and first[0]["row_hash"] == state.last_row_hash:
+                logger.info(f"Incremental sync of {scheduler.name}: rows after row {state.last_row + 2}")
+                return itertools.chain([first[1:]] if len(first) > 1 else [], chunks), False
+            logger.warning(f"Sheet {scheduler.name} changed at or before row {state.last_row + 2}, running a full reconciliation pass")
+        
+        logger.info(f"Full reconciliation pass: reading the whole sheet {scheduler.name}")
+        return sheets_service.iter_submission_chunks(start_row=0), True
+    
+    def _advance_watermark(self, db: Session, scheduler: SourceScheduler, submissions: list, full_pass: bool):
+        """Store the newest row read in this sync as the source's watermark"""
+        last = max(submissions, key=lambda sub: sub["row_index"])
+        scheduler.sync_state = crud.update_sync_state(
+            db,
+            scheduler.source_id,
+            last_row=last["row_index"],
+            last_row_hash=last["row_hash"],
+            full_sync_time=datetime.now(timezone.utc) if full_pass else None
+        )
+    
     def get_status(self):
-        """Get the current status of the sync service"""
+        """Get the current status of the sync service and of each sheet source"""
+        # Processed rows are counted from the ingestion ledger, so the count survives restarts
+        processed_counts = {}
+        jobs = None
+        if self.google_sheets_enabled:
+            db = self.session_factory()
+            try:
+                for source_id in self.sources:
+                    processed_counts[source_id] = crud.count_ingested_rows(db, source_id)
+                if config.INGESTION_MODE == "queue":
+                    jobs = crud.count_jobs(db)
+            except Exception as e:
+                logger.error(f"Failed to count ingested rows: {str(e)}")
+            finally:
+                db.close()
+        
+        sources = []
+        for scheduler in self.sources.values():
+            state = scheduler.sync_state
+            sources.append({
+                "name": scheduler.name,
+                "source_id": scheduler.source_id,
+                "last_sync": scheduler.last_sync_time.isoformat() if scheduler.last_sync_time else None,
+                "next_sync": (scheduler.last_sync_time + timedelta(seconds=scheduler.poll_interval)).isoformat()
+                             if scheduler.last_sync_time else None,
+                "poll_interval": scheduler.poll_interval,
+                "processed_count": processed_counts.get(scheduler.source_id),
+                "sheets_cache": scheduler.sheets_service.submissions_cache.stats(),
+                "watermark_row": state.last_row + 2 if state and state.last_row is not None else None,
+                "last_full_sync": state.last_full_sync.isoformat() if state and state.last_full_sync else None
+            })
+        last_syncs = [scheduler.last_sync_time for scheduler in self.sources.values() if scheduler.last_sync_time]
+        
         return {
             "running": self.running,
             "google_sheets_enabled": self.google_sheets_enabled,
-            "last_sync": self.last_sync_time.isoformat() if self.last_sync_time else None,
-            "next_sync": (self.last_sync_time + asyncio.timedelta(seconds=self.interval)).isoformat() 
-                         if self.last_sync_time else None,
-            "processed_count": len(self.processed_timestamps)
+            "last_sync": max(last_syncs).isoformat() if last_syncs else None,
+            "last_trigger": self.last_trigger_time.isoformat() if self.last_trigger_time else None,
+            "trigger_count": self.trigger_count,
+            "processed_count": sum(processed_counts.values()) if processed_counts else None,
+            "ingestion_mode": config.INGESTION_MODE,
+            "jobs": jobs,
+            "sources": sources
         }
@@ -0,0 +1,182 @@
+"""
+Shared fakes and the base test case for the sheet sync and ingestion worker tests
+"""
+import unittest
+import sys
+import os
+import asyncio
+import tempfile
+import threading
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest import mock
+import numpy as np
+from PIL import Image
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import config
+from db.database import Base
+from db import models
+from services.duplicate_check import DuplicateChecker
+from services.google_sheets import SheetRow, SheetSource
+from services.sync_service import SyncService
+from utils.cache import ReadThroughCache
+from models import ImageModerationResult
+
+def make_row(number):
+    return [
+        f"2026-10-01 10:{number:02d}:00",
+        f"Story number {number}",
+        f"Residents of ward {number} reported that the street lights on the main road have not worked for weeks.",
+        "Test City",
+        "Civic",
+        "Test Publisher",
+        "1234567890",
+        f"https://example.com/photos/{number}.jpg",
+    ]
+
+class FakeSheetsService:
+    """In-memory stand-in for GoogleSheetsService that records reads and marks"""
+
+    def __init__(self, rows, source=None):
+        self.source = source or SheetSource("test-sheet")
+        self.source_id = self.source.source_id
+        self.rows = rows
+        self.reads = []
+        self.pending_marks = []
+        self.marks = []
+        self.flushes = 0
+        self.submissions_cache = ReadThroughCache(self.get_form_responses, ttl_seconds=30, stale_seconds=300)
+
+    def invalidate_cache(self):
+        self.submissions_cache.invalidate()
+
+    def get_submissions(self, start_row=0):
+        return [row for chunk in self.iter_submission_chunks(start_row) for row in chunk]
+
+    def iter_submission_chunks(self, start_row=0, chunk_rows=None):
+        chunk_rows = chunk_rows or config.SHEETS_READ_CHUNK_ROWS
+        while True:
+            values = self.read_range(start_row, chunk_rows)
+            chunk = [SheetRow.parse(row, start_row + offset) for offset, row in enumerate(values)]
+            if chunk:
+                yield chunk
+            if len(values) < chunk_rows:
+                return
+            start_row += chunk_rows
+
+    def read_range(self, start_row, count):
+        """One values().get of a row range"""
+        self.reads.append(start_row)
+        return [list(row) for row in self.rows[start_row:start_row + count]]
+
+    def get_all_submissions(self):
+        return self.get_submissions(0)
+
+    def get_form_responses(self):
+        return [row.form_response() for row in self.get_submissions(0)]
+
+    def mark_as_invalid(self, row_index):
+        self.pending_marks.append(("invalid", row_index))
+
+    def mark_as_duplicate(self, row_index):
+        self.pending_marks.append(("duplicate", row_index))
+
+    def mark_as_inappropriate(self, row_index):
+        self.pending_marks.append(("inappropriate", row_index))
+
+    def clear_marks(self, row_index):
+        self.pending_marks.append(("cleared", row_index))
+
+    def flush_marks(self):
+        self.marks.extend(self.pending_marks)
+        self.pending_marks = []
+        self.flushes += 1
+        return True
+
+class FakeModerator:
+    def moderate_image(self, image_path):
+        return ImageModerationResult(is_appropriate=True)
+
+class SlowModerator:
+    """Moderator that blocks like a network call and records how many calls overlap"""
+    def __init__(self, delay):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def moderate_image(self, image_path):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return ImageModerationResult(is_appropriate=True)
+
+class SlowSheetsService(FakeSheetsService):
+    """Sheet whose reads and marks block like Google API calls"""
+    def __init__(self, rows, delay):
+        super().__init__(rows)
+        self.delay = delay
+
+    def read_range(self, start_row, count):
+        time.sleep(self.delay)
+        return super().read_range(start_row, count)
+
+    def flush_marks(self):
+        time.sleep(self.delay)
+        return super().flush_marks()
+
+class SyncServiceTestCase(unittest.TestCase):
+    """Base class: a SyncService wired to a fake sheet and a throwaway SQLite database"""
+
+    def setUp(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        self.session_factory = sessionmaker(bind=engine)
+
+        self.original_groq_key = config.GROQ_API_KEY
+        config.GROQ_API_KEY = config.GROQ_API_KEY or "test-key"
+        self.service = SyncService(auto_start=False)
+        self.service.google_sheets_enabled = True
+        self.service.session_factory = self.session_factory
+        self.service.duplicate_checker = DuplicateChecker(use_lsh=False, scope="global", window_days=0, snapshot_dir="")
+        self.sheet = FakeSheetsService([make_row(number) for number in range(3)])
+        self.scheduler = self.service.add_source(self.sheet)
+        self.service.image_moderator = FakeModerator()
+
+        # Image downloads return a local file instead of going to the network
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.downloads = []
+        patcher = mock.patch("utils.helpers.save_downloaded_image", side_effect=self.fake_download)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        config.GROQ_API_KEY = self.original_groq_key
+        self.temp_dir.cleanup()
+
+    def fake_download(self, image_url):
+        self.downloads.append(image_url)
+        path = os.path.join(self.temp_dir.name, f"{len(self.downloads)}.png")
+        # Random blocks, so every photo has a different perceptual hash
+        pixels = np.random.RandomState(len(self.downloads)).randint(0, 256, size=(6, 8, 3)).astype(np.uint8)
+        Image.fromarray(pixels).resize((64, 48)).save(path)
+        return True, path
+
+    def sync(self):
+        asyncio.run(self.service.sync_submissions())
+
+    def stored_count(self):
+        db = self.session_factory()
+        try:
+            return db.query(models.Submission).count()
+        finally:
+            db.close()
@@ -0,0 +1,121 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cache import ReadThroughCache
+
+class SlowLoader:
+    """Returns 1, 2, 3... after a delay, counting concurrent calls"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.failures = []
+        self.release = None  # Optional threading.Event the load waits for
+
+    def __call__(self):
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        time.sleep(self.delay)
+        if self.failures:
+            raise self.failures.pop(0)
+        return self.calls
+
+class TestReadThroughCache(unittest.TestCase):
+    def test_fresh_value_is_served_from_cache(self):
+        loader = SlowLoader()
+        cache = ReadThroughCache(loader, ttl_seconds=60, stale_seconds=0)
+        self.assertEqual(cache.get(), 1)
+        self.assertEqual(cache.get(), 1)
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual((cache.stats()["hits"], cache.stats()["misses"]), (1, 1))
+
+    def test_concurrent_misses_share_one_load(self):
+        loader = SlowLoader(delay=0.2)
+        cache = ReadThroughCache(loader, ttl_seconds=60, stale_seconds=0)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual(results, [1] * 20)
+
+    def test_stale_value_is_served_while_refreshing(self):
+        loader = SlowLoader()
+        cache = ReadThroughCache(loader, ttl_seconds=60, stale_seconds=60)
+        cache.get()
+        cache.ttl_seconds = 0  # The cached value is now stale
+
+        loader.release = threading.Event()
+        # Served at once even though the refresh is blocked, and only one refresh starts
+        self.assertEqual(cache.get(), 1)
+        self.assertEqual(cache.get(), 1)
+        loader.release.set()
+        self.wait_for_refresh(cache)
+
+        cache.ttl_seconds = 60
+        self.assertEqual(cache.get(), 2)
+        self.assertEqual(loader.calls, 2)
+        self.assertEqual(cache.stats()["stale_hits"], 2)
+
+    def wait_for_refresh(self, cache):
+        for _ in range(500):
+            if cache._inflight is None:
+                return
+            time.sleep(0.01)
+        self.fail("Background refresh did not finish")
+
+    def test_expired_value_is_not_served(self):
+        loader = SlowLoader()
+        cache = ReadThroughCache(loader, ttl_seconds=0.05, stale_seconds=0)
+        cache.get()
+        time.sleep(0.1)
+        self.assertEqual(cache.get(), 2)
+
+    def test_invalidate_forces_a_fresh_load(self):
+        loader = SlowLoader()
+        cache = ReadThroughCache(loader, ttl_seconds=60, stale_seconds=60)
+        cache.get()
+        cache.invalidate()
+        self.assertEqual(cache.get(), 2)
+
+    def test_load_started_before_invalidate_is_not_cached(self):
+        loader = SlowLoader()
+        loader.release = threading.Event()
+        cache = ReadThroughCache(loader, ttl_seconds=60, stale_seconds=0)
+        early = cache.get_future()
+        cache.invalidate()
+        loader.release.set()
+        self.assertEqual(early.result(), 1)
+        # The early caller got its value, but the next one loads again
+        self.assertEqual(cache.get(), 2)
+
+    def test_failed_load_is_raised_and_retried(self):
+        loader = SlowLoader()
+        loader.failures.append(RuntimeError("quota exceeded"))
+        cache = ReadThroughCache(loader, ttl_seconds=60, stale_seconds=0)
+        with self.assertRaises(RuntimeError):
+            cache.get()
+        self.assertEqual(cache.get(), 2)
+
+    def test_failed_refresh_keeps_the_stale_value(self):
+        loader = SlowLoader()
+        cache = ReadThroughCache(loader, ttl_seconds=60, stale_seconds=60)
+        cache.get()
+        cache.ttl_seconds = 0
+        loader.failures.append(RuntimeError("quota exceeded"))
+        self.assertEqual(cache.get(), 1)
+        self.wait_for_refresh(cache)
+        self.assertEqual(loader.calls, 2)
+        self.assertEqual(cache.get(), 1)
+
+if __name__ == "__main__":
+    unittest.main()
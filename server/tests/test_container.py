@@ -0,0 +1,102 @@
+import unittest
+import sys
+import os
+import threading
+from unittest import mock
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.container import ServiceContainer
+from services.google_sheets import GoogleSheetsService
+from routers import submissions
+
+class TestServiceContainer(unittest.TestCase):
+    def setUp(self):
+        # No credentials, network or database: the services are mocks
+        patchers = [
+            mock.patch("services.container.GoogleSheetsService"),
+            mock.patch("services.container.ImageModerator"),
+            mock.patch("services.container.SessionLocal"),
+            mock.patch("services.container.check_google_credentials", return_value=True),
+        ]
+        self.sheets_class, self.moderator_class, self.session_factory, _ = [patcher.start() for patcher in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+        self.container = ServiceContainer()
+        self.container.duplicate_checker = mock.Mock()
+
+    def test_services_are_built_once(self):
+        self.assertIs(self.container.sheets_service, self.container.sheets_service)
+        self.assertIs(self.container.image_moderator, self.container.image_moderator)
+        self.sheets_class.assert_called_once()
+        self.moderator_class.assert_called_once()
+
+    def test_concurrent_first_use_builds_one_client(self):
+        clients = []
+        threads = [threading.Thread(target=lambda: clients.append(self.container.image_moderator)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.moderator_class.assert_called_once()
+        self.assertEqual(len({id(client) for client in clients}), 1)
+
+    def test_start_warms_up_every_service(self):
+        self.container.start()
+        self.sheets_class.return_value.warm_up.assert_called_once()
+        self.moderator_class.return_value.warm_up.assert_called_once()
+        self.container.duplicate_checker.ensure_loaded.assert_called_once_with(self.session_factory.return_value)
+        self.session_factory.return_value.close.assert_called_once()
+        self.assertTrue(self.container.started)
+
+    def test_failed_warm_up_does_not_stop_startup(self):
+        self.moderator_class.return_value.warm_up.side_effect = Exception("Groq unavailable")
+        self.container.start()
+        self.container.duplicate_checker.ensure_loaded.assert_called_once()
+        self.assertTrue(self.container.started)
+
+    def test_close_closes_clients_and_rebuilds_on_next_use(self):
+        sheets = self.container.sheets_service
+        moderator = self.container.image_moderator
+        self.container.close()
+        sheets.close.assert_called_once()
+        moderator.close.assert_called_once()
+
+        self.container.image_moderator
+        self.assertEqual(self.moderator_class.call_count, 2)
+
+    def test_request_dependencies_reuse_the_container(self):
+        with mock.patch.object(submissions, "container", self.container):
+            self.assertIs(submissions.get_image_moderator(), submissions.get_image_moderator())
+            self.assertIs(submissions.get_sheets_service(), submissions.get_sheets_service())
+        self.moderator_class.assert_called_once()
+        self.sheets_class.assert_called_once()
+
+class TestSheetsConnections(unittest.TestCase):
+    def setUp(self):
+        with mock.patch("services.google_sheets.service_account.Credentials.from_service_account_file"):
+            self.sheets = GoogleSheetsService()
+
+    def test_each_thread_reuses_its_own_connection(self):
+        first = self.sheets._connection()
+        self.assertIs(self.sheets._connection(), first)
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.sheets._connection()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], first)
+        self.assertEqual(len(self.sheets._connections), 2)
+
+    def test_close_closes_every_connection(self):
+        connections = [mock.Mock(), mock.Mock()]
+        self.sheets._connections = list(connections)
+        self.sheets.close()
+        for connection in connections:
+            connection.close.assert_called_once()
+        self.assertEqual(self.sheets._connections, [])
+
+if __name__ == "__main__":
+    unittest.main()
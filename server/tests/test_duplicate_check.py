@@ -0,0 +1,659 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest import mock
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import pickle
+import numpy as np
+from services.duplicate_check import DuplicateChecker, DuplicateIndex, HashingTermVectorizer, ParallelScorer, TermVectorizer, content_fingerprint
+from models import NewsSubmission
+from db.database import Base
+from db import models
+
+EXISTING = [
+    {"id": 11, "description": "Traffic accident on Main Street caused delays for several hours yesterday morning near the market."},
+    {"id": 12, "description": "The city council approved a new budget for public parks and libraries during Tuesday's meeting."},
+    {"id": 13, "description": "Heavy rain flooded several streets in the old town and residents were asked to stay indoors."},
+]
+
+def make_submission(description, title="Test News Title", city="Test City"):
+    return NewsSubmission(
+        title=title,
+        description=description,
+        city=city,
+        category="Test Category",
+        publisher_name="Test Publisher",
+        publisher_phone="1234567890",
+        image_path="test_image.jpg"
+    )
+
+class StoredSubmission:
+    """Stand-in for a db.models.Submission row"""
+    def __init__(self, id, description, status="approved", image_hash=None, created_at=None):
+        self.id = id
+        self.description = description
+        self.status = status
+        self.image_hash = image_hash
+        self.created_at = created_at
+
+class TestDuplicateChecker(unittest.TestCase):
+    def setUp(self):
+        self.checker = DuplicateChecker(use_lsh=False, scope="global", window_days=0)
+        self.checker.load(EXISTING)
+
+    def test_exact_copy_is_duplicate(self):
+        """A verbatim copy is flagged and references the real submission ID"""
+        result = self.checker.check_duplicate(make_submission(EXISTING[1]["description"]))
+        self.assertTrue(result.is_duplicate)
+        self.assertEqual(result.duplicate_entry_id, "12")
+        self.assertAlmostEqual(result.similarity_score, 1.0, places=5)
+
+    def test_unrelated_story_is_not_duplicate(self):
+        """A different story is not flagged"""
+        result = self.checker.check_duplicate(make_submission(
+            "A local bakery won the regional award for the best sourdough bread in the province this year."
+        ))
+        self.assertFalse(result.is_duplicate)
+
+    def test_added_submission_is_indexed(self):
+        """Approved submissions added after loading are matched without a rebuild"""
+        description = "A new community garden opened next to the railway station with space for fifty families."
+        self.checker.add_submission(StoredSubmission(14, description))
+
+        result = self.checker.check_duplicate(make_submission(description))
+        self.assertTrue(result.is_duplicate)
+        self.assertEqual(result.duplicate_entry_id, "14")
+
+    def test_rejected_submission_is_not_indexed(self):
+        """Only approved submissions become part of the index"""
+        description = "A new community garden opened next to the railway station with space for fifty families."
+        self.checker.add_submission(StoredSubmission(15, description, status="rejected"))
+
+        result = self.checker.check_duplicate(make_submission(description))
+        self.assertFalse(result.is_duplicate)
+
+    def test_refresh_keeps_scores_consistent(self):
+        """Refreshing IDF after incremental adds matches a full rebuild"""
+        description = "A new community garden opened next to the railway station with space for fifty families."
+        self.checker.add_submission(StoredSubmission(14, description))
+        self.checker.refresh()
+
+        rebuilt = DuplicateChecker(use_lsh=False, scope="global", window_days=0)
+        rebuilt.load(EXISTING + [{"id": 14, "description": description}])
+
+        query = make_submission(EXISTING[0]["description"] + " Police are investigating the cause.")
+        incremental_result = self.checker.check_duplicate(query)
+        rebuilt_result = rebuilt.check_duplicate(query)
+        self.assertEqual(incremental_result.duplicate_entry_id, rebuilt_result.duplicate_entry_id)
+        self.assertAlmostEqual(incremental_result.similarity_score, rebuilt_result.similarity_score, places=5)
+
+    def test_near_identical_image_is_duplicate(self):
+        """Image hashes within the Hamming radius match regardless of the text"""
+        checker = DuplicateChecker(use_lsh=False, scope="global", window_days=0)
+        checker.load([dict(EXISTING[0], image_hash="f0f0f0f0f0f0f0f0")] + EXISTING[1:])
+
+        result = checker.check_image({"city": "Test City"}, "f0f0f0f0f0f0f0f3")
+        self.assertTrue(result.is_duplicate)
+        self.assertEqual(result.duplicate_entry_id, "11")
+        self.assertFalse(checker.check_image({"city": "Test City"}, "0f0f0f0f0f0f0f0f").is_duplicate)
+        self.assertFalse(checker.check_image({"city": "Test City"}, None).is_duplicate)
+
+    def test_legacy_existing_submissions_argument(self):
+        """Passing existing submissions explicitly still works"""
+        result = DuplicateChecker().check_duplicate(make_submission(EXISTING[2]["description"]), EXISTING)
+        self.assertTrue(result.is_duplicate)
+        self.assertEqual(result.duplicate_entry_id, "13")
+
+    def test_batch_matches_corpus_and_earlier_rows(self):
+        """A batch is scored against the index and against earlier rows in the same batch"""
+        story = "A new community garden opened next to the railway station with space for fifty families."
+        batch = [
+            {"description": EXISTING[2]["description"]},
+            {"description": story},
+            {"description": story + " Volunteers will help with planting."},
+            {"description": "A local bakery won the regional award for the best sourdough bread in the province this year."},
+        ]
+
+        results = self.checker.check_duplicates_batch(batch)
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[0].duplicate_entry_id, "13")
+        self.assertFalse(results[1].is_duplicate)
+        self.assertTrue(results[2].is_duplicate)
+        self.assertEqual(results[2].duplicate_batch_index, 1)
+        self.assertIsNone(results[2].duplicate_entry_id)
+        self.assertFalse(results[3].is_duplicate)
+
+    def test_batch_rows_do_not_match_rejected_rows(self):
+        """A row that is itself a duplicate is not the in-batch match of a later row"""
+        batch = [
+            {"description": EXISTING[0]["description"] + " Police are investigating the cause."},
+            {"description": EXISTING[0]["description"] + " Police are investigating the cause. Two cars were towed."},
+        ]
+
+        results = self.checker.check_duplicates_batch(batch)
+        self.assertEqual(results[0].duplicate_entry_id, "11")
+        # Close to the first row, but further from the stored story than the threshold
+        self.assertFalse(results[1].is_duplicate)
+
+    def test_batch_agrees_with_single_checks(self):
+        """Batch scores match one-at-a-time checks when rows are not compared to each other"""
+        batch = [make_submission(entry["description"] + " More details will follow.") for entry in EXISTING]
+        results = self.checker.check_duplicates_batch(batch, within_batch=False)
+        for submission, result in zip(batch, results):
+            single = self.checker.check_duplicate(submission)
+            self.assertEqual(result.duplicate_entry_id, single.duplicate_entry_id)
+            self.assertAlmostEqual(result.similarity_score or 0.0, single.similarity_score or 0.0, places=6)
+
+    def test_checks_do_not_grow_vocabulary(self):
+        """Terms of checked submissions join the vocabulary only once a submission is indexed"""
+        vocabulary = dict(self.checker.vectorizer.vocabulary)
+        story = "A new community garden opened next to the railway station with space for fifty families."
+        self.checker.check_duplicate(make_submission(story))
+        self.checker.check_duplicates_batch([{"description": story}, {"description": "Zyxwv qwerty plonk frobnicate."}])
+        self.assertEqual(self.checker.vectorizer.vocabulary, vocabulary)
+
+        self.checker.add_submission(StoredSubmission(14, story))
+        self.assertIn("garden", self.checker.vectorizer.vocabulary)
+
+    def test_batch_rows_match_on_unseen_terms(self):
+        """Rows of a batch are compared on their own terms even when the index has never seen them"""
+        story = "A new community garden opened next to the railway station with space for fifty families."
+        results = DuplicateChecker(use_lsh=False, scope="global", window_days=0).check_duplicates_batch(
+            [{"description": story}, {"description": story + " Volunteers will help with planting."}]
+        )
+        self.assertFalse(results[0].is_duplicate)
+        self.assertEqual(results[1].duplicate_batch_index, 0)
+
+class TestHashingDuplicateChecker(unittest.TestCase):
+    def setUp(self):
+        self.checker = DuplicateChecker(use_lsh=False, scope="global", window_days=0, vectorizer="hashing")
+        self.checker.load(EXISTING)
+
+    def test_exact_copy_is_duplicate(self):
+        result = self.checker.check_duplicate(make_submission(EXISTING[1]["description"]))
+        self.assertTrue(result.is_duplicate)
+        self.assertEqual(result.duplicate_entry_id, "12")
+
+    def test_unrelated_story_is_not_duplicate(self):
+        result = self.checker.check_duplicate(make_submission(
+            "A local bakery won the regional award for the best sourdough bread in the province this year."
+        ))
+        self.assertFalse(result.is_duplicate)
+
+    def test_width_does_not_grow(self):
+        """The number of columns is fixed no matter how many new terms arrive"""
+        width = self.checker.vectorizer.n_features
+        self.checker.add_submission(StoredSubmission(14, "Zyxwv qwerty plonk frobnicate wibble wobble gizmo thingamajig."))
+        self.checker.refresh()
+        self.assertEqual(self.checker.vectorizer.n_features, width)
+        self.assertEqual(self.checker.shard_for({}).index.counts.shape, (4, width))
+
+    def test_statistics_do_not_scale_with_width(self):
+        """Shards keep document frequencies and IDF for their own features, not for every hashed column"""
+        checker = DuplicateChecker(use_lsh=False, scope="city", window_days=0, vectorizer="hashing")
+        checker.load([dict(entry, city=f"City {entry['id']}") for entry in EXISTING])
+        self.assertEqual(len(checker.shards), 3)
+        for shard in checker.shards.values():
+            features = len(np.unique(shard.index.counts.indices))
+            self.assertEqual((len(shard.index.doc_freq), len(shard.index.idf)), (features, features))
+            self.assertLess(features, checker.vectorizer.n_features // 100)
+
+    def test_counts_do_not_depend_on_state(self):
+        """Separate (or unpickled) vectorizers produce identical counts without sharing a vocabulary"""
+        texts = [entry["description"] for entry in EXISTING]
+        first = HashingTermVectorizer().term_counts(texts)
+        second = pickle.loads(pickle.dumps(HashingTermVectorizer())).term_counts(texts[::-1])[::-1]
+        self.assertEqual((first != second).nnz, 0)
+
+class TestParallelScorer(unittest.TestCase):
+    def setUp(self):
+        texts = [entry["description"] for entry in EXISTING] * 3 + [
+            "A local bakery won the regional award for the best sourdough bread in the province this year.",
+            "Traffic accident on Main Street caused long delays near the market yesterday.",
+        ]
+        index = DuplicateIndex(TermVectorizer())
+        index.add([str(i) for i in range(len(texts))], texts)
+        index.refresh()
+        self.index = index
+
+    def test_matches_dense_scan(self):
+        """Blocked scoring in worker processes returns the same top-k as a dense scan"""
+        vectors = self.index.vectors
+        query_rows, stored_rows, scores = ParallelScorer(workers=2, block_rows=4).top_k(vectors, k=2, threshold=0.1)
+
+        dense = (vectors @ vectors.T).toarray()
+        np.fill_diagonal(dense, 0)
+        for row in range(dense.shape[0]):
+            expected = sorted((score for score in dense[row] if score >= 0.1), reverse=True)[:2]
+            np.testing.assert_allclose(scores[query_rows == row], expected)
+            for column, score in zip(stored_rows[query_rows == row], scores[query_rows == row]):
+                self.assertAlmostEqual(dense[row, column], score)
+
+    def test_clusters_group_copies(self):
+        """Copies of the same story end up in one cluster"""
+        clusters = ParallelScorer(workers=1, block_rows=4).clusters(self.index.vectors, self.index.ids, threshold=0.8)
+        self.assertEqual(sorted(sorted(cluster) for cluster in clusters), [["0", "3", "6"], ["1", "4", "7"], ["2", "5", "8"]])
+
+class TestLSHDuplicateChecker(unittest.TestCase):
+    def setUp(self):
+        self.checker = DuplicateChecker(use_lsh=True, scope="global", window_days=0)
+        self.checker.load(EXISTING)
+
+    def test_near_copy_is_found_through_buckets(self):
+        """A lightly edited copy collides in an LSH bucket and is scored exactly"""
+        description = EXISTING[0]["description"].replace("yesterday morning", "on Monday morning")
+        result = self.checker.check_duplicate(make_submission(description))
+        self.assertTrue(result.is_duplicate)
+        self.assertEqual(result.duplicate_entry_id, "11")
+
+    def test_unrelated_story_has_no_candidates(self):
+        """An unrelated story is not scored against the corpus"""
+        description = "A local bakery won the regional award for the best sourdough bread in the province this year."
+        signature = self.checker.minhasher.signature(description)
+        self.assertEqual(self.checker.shard_for(make_submission(description)).lsh.query(signature), set())
+        self.assertFalse(self.checker.check_duplicate(make_submission(description)).is_duplicate)
+
+    def test_stored_signature_is_reused(self):
+        """Signatures from fingerprints() rebuild the same buckets"""
+        submission = make_submission(EXISTING[1]["description"])
+        stored = self.checker.fingerprints(submission)["minhash_signature"]
+
+        rebuilt = DuplicateChecker(use_lsh=True, scope="global", window_days=0)
+        rebuilt.load([dict(entry, minhash_signature=stored) if entry["id"] == 12 else entry for entry in EXISTING])
+        self.assertEqual(rebuilt.check_duplicate(submission).duplicate_entry_id, "12")
+
+class TestScopedDuplicateChecker(unittest.TestCase):
+    def setUp(self):
+        now = datetime.now(timezone.utc)
+        self.checker = DuplicateChecker(use_lsh=False, scope="city", window_days=14)
+        self.checker.load([
+            dict(EXISTING[0], city="Pune", created_at=now - timedelta(days=30)),
+            dict(EXISTING[1], city="Pune", created_at=now - timedelta(days=2)),
+            dict(EXISTING[2], city="Mumbai", created_at=now - timedelta(days=1)),
+        ])
+
+    def test_match_is_limited_to_same_city(self):
+        """The same story reported in another city is not a duplicate"""
+        self.assertTrue(self.checker.check_duplicate(make_submission(EXISTING[2]["description"], city="mumbai")).is_duplicate)
+        self.assertFalse(self.checker.check_duplicate(make_submission(EXISTING[2]["description"], city="Pune")).is_duplicate)
+
+    def test_old_entries_are_evicted(self):
+        """Stories older than the window are dropped from the index"""
+        self.assertEqual(len(self.checker), 2)
+        self.assertFalse(self.checker.check_duplicate(make_submission(EXISTING[0]["description"], city="Pune")).is_duplicate)
+        self.assertTrue(self.checker.check_duplicate(make_submission(EXISTING[1]["description"], city="Pune")).is_duplicate)
+
+    def test_eviction_matches_rebuild(self):
+        """Evicting entries leaves the same scores as building the index without them"""
+        now = datetime.now(timezone.utc)
+        self.checker.load([
+            dict(EXISTING[0], city="Pune", created_at=now - timedelta(days=12)),
+            dict(EXISTING[2], city="Pune", created_at=now - timedelta(days=11)),
+            dict(EXISTING[1], city="Pune", created_at=now - timedelta(days=2)),
+        ])
+        self.checker.window_days = 10
+        self.checker.refresh()
+
+        rebuilt = DuplicateChecker(use_lsh=False, scope="city", window_days=14)
+        rebuilt.load([dict(EXISTING[1], city="Pune")])
+        query = make_submission(EXISTING[1]["description"] + " Libraries will open later.", city="Pune")
+        self.assertEqual(len(self.checker), 1)
+        self.assertAlmostEqual(
+            self.checker.check_duplicate(query).similarity_score,
+            rebuilt.check_duplicate(query).similarity_score,
+            places=6
+        )
+
+    def test_batch_does_not_match_across_cities(self):
+        """Rows in one batch are only compared with earlier rows from the same city"""
+        # Exact copies are caught by the global content hash, so use edited copies
+        story = "A new community garden opened next to the railway station with space for fifty families."
+        results = self.checker.check_duplicates_batch([
+            {"description": story, "city": "Delhi"},
+            {"description": story + " Volunteers will help with planting.", "city": "Chennai"},
+            {"description": story + " Planting starts on Sunday.", "city": "Delhi"},
+        ])
+        self.assertFalse(results[1].is_duplicate)
+        self.assertEqual(results[2].duplicate_batch_index, 0)
+
+    def test_idf_only_covers_terms_of_the_shard(self):
+        """Each shard stores document frequencies for its own terms, not for the whole shared vocabulary"""
+        for shard in self.checker.shards.values():
+            terms = np.unique(shard.index.counts.indices)
+            self.assertEqual(shard.index.doc_freq_columns.tolist(), terms.tolist())
+            self.assertEqual(shard.index.idf_columns.tolist(), terms.tolist())
+            self.assertLess(len(shard.index.idf), self.checker.vectorizer.n_features)
+
+class TestEditedSubmissions(unittest.TestCase):
+    EDITED = "A new community garden opened next to the railway station with space for fifty families."
+
+    def setUp(self):
+        self.checker = DuplicateChecker(use_lsh=True, scope="global", window_days=0)
+        self.checker.load([dict(EXISTING[0], image_hash="f0f0f0f0f0f0f0f0")] + EXISTING[1:])
+
+    def test_edit_replaces_indexed_version(self):
+        """An edited submission is indexed once, under its new text only"""
+        self.checker.update_submission(StoredSubmission(11, self.EDITED), was_approved=True)
+
+        shard = self.checker.shard_for(make_submission(self.EDITED))
+        self.assertEqual(len(self.checker), 3)
+        self.assertEqual([entry_id for entry_id in shard.index.ids if entry_id == "11"], ["11"])
+        self.assertFalse(self.checker.check_duplicate(make_submission(EXISTING[0]["description"])).is_duplicate)
+        self.assertEqual(self.checker.check_duplicate(make_submission(self.EDITED)).duplicate_entry_id, "11")
+
+        # Compaction keeps the scores of a rebuild without the old version
+        self.checker.refresh()
+        rebuilt = DuplicateChecker(use_lsh=True, scope="global", window_days=0)
+        rebuilt.load(EXISTING[1:] + [{"id": 11, "description": self.EDITED}])
+        query = make_submission(EXISTING[1]["description"] + " Libraries will open later.")
+        self.assertAlmostEqual(
+            self.checker.check_duplicate(query).similarity_score,
+            rebuilt.check_duplicate(query).similarity_score,
+            places=6
+        )
+
+    def test_rejected_edit_is_removed(self):
+        """An edit that is no longer approved leaves the text and image indexes"""
+        self.checker.update_submission(StoredSubmission(11, self.EDITED, status="rejected"), was_approved=True)
+
+        self.assertEqual(len(self.checker), 2)
+        self.assertFalse(self.checker.check_duplicate(make_submission(EXISTING[0]["description"])).is_duplicate)
+        self.assertFalse(self.checker.check_image({}, "f0f0f0f0f0f0f0f0").is_duplicate)
+
+    def test_replaced_image_is_removed(self):
+        """Only the image hash of the latest version matches"""
+        self.checker.update_submission(StoredSubmission(11, EXISTING[0]["description"], image_hash="0f0f0f0f0f0f0f0f"), was_approved=True)
+
+        self.assertFalse(self.checker.check_image({}, "f0f0f0f0f0f0f0f0").is_duplicate)
+        self.assertEqual(self.checker.check_image({}, "0f0f0f0f0f0f0f0f").duplicate_entry_id, "11")
+
+    def test_eviction_skips_removed_entries(self):
+        """Evicting a window that contains an edited submission's old row does not fail"""
+        now = datetime.now(timezone.utc)
+        checker = DuplicateChecker(use_lsh=True, scope="global", window_days=14)
+        checker.load([
+            dict(EXISTING[0], created_at=now - timedelta(days=12)),
+            dict(EXISTING[1], created_at=now - timedelta(days=11)),
+            dict(EXISTING[2], created_at=now - timedelta(days=2)),
+        ])
+        checker.update_submission(StoredSubmission(11, self.EDITED, created_at=now - timedelta(days=12)), was_approved=True)
+
+        checker.window_days = 10
+        checker.refresh()
+        # The new version is appended after the newest row, so only 12 is evicted
+        self.assertEqual(len(checker), 2)
+        self.assertEqual(checker.check_duplicate(make_submission(self.EDITED)).duplicate_entry_id, "11")
+        self.assertEqual(checker.check_duplicate(make_submission(EXISTING[2]["description"])).duplicate_entry_id, "13")
+
+class TestExactDuplicates(unittest.TestCase):
+    def setUp(self):
+        # Throwaway SQLite database with the real schema
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+
+        self.checker = DuplicateChecker(use_lsh=False, scope="global", window_days=0)
+        self.stored = models.Submission(
+            title="Flooding in the Old Town",
+            description=EXISTING[2]["description"],
+            city="Test City",
+            category="Test Category",
+            publisher_name="Test Publisher",
+            publisher_phone="1234567890",
+            status="approved",
+            content_hash=content_fingerprint("Flooding in the Old Town", EXISTING[2]["description"])
+        )
+        self.db.add(self.stored)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_fingerprint_ignores_formatting(self):
+        """Case, accents, punctuation and whitespace do not change the fingerprint"""
+        self.assertEqual(
+            content_fingerprint("Café  Opens!", "New café opens on Main St."),
+            content_fingerprint("cafe opens", "NEW CAFE OPENS ON MAIN ST")
+        )
+        self.assertNotEqual(
+            content_fingerprint("Cafe opens", "New cafe opens on Main St."),
+            content_fingerprint("Cafe closes", "New cafe opens on Main St.")
+        )
+
+    def test_reformatted_copy_found_without_index(self):
+        """A reformatted copy is matched through the content hash even when nothing is indexed"""
+        submission = make_submission(
+            "  HEAVY RAIN flooded several streets in the old town, and residents were asked to stay indoors!!",
+            title="flooding in the old town"
+        )
+        result = self.checker.check_duplicate(submission, db=self.db)
+        self.assertTrue(result.is_duplicate)
+        self.assertEqual(result.duplicate_entry_id, str(self.stored.id))
+        self.assertEqual(result.similarity_score, 1.0)
+
+    def test_exact_copies_are_global(self):
+        """The content hash matches copies from any scope and any age, unlike the scored index"""
+        self.stored.created_at = datetime.now(timezone.utc) - timedelta(days=90)
+        self.db.commit()
+        checker = DuplicateChecker(use_lsh=False, scope="city", window_days=14)
+        checker.load([])
+
+        submission = make_submission(EXISTING[2]["description"], title="Flooding in the Old Town", city="Another City")
+        result = checker.check_duplicate(submission, db=self.db)
+        self.assertTrue(result.is_duplicate)
+        self.assertEqual(result.duplicate_entry_id, str(self.stored.id))
+
+    def test_unique_index_spans_scopes(self):
+        """A second approved copy is refused even from another city; rejected copies are kept"""
+        def copy(city, status):
+            return models.Submission(
+                title=self.stored.title,
+                description=self.stored.description,
+                city=city,
+                category="Test Category",
+                publisher_name="Test Publisher",
+                publisher_phone="1234567890",
+                status=status,
+                content_hash=self.stored.content_hash
+            )
+
+        self.db.add(copy("Another City", "rejected"))
+        self.db.commit()
+        self.db.add(copy("Another City", "approved"))
+        with self.assertRaises(IntegrityError):
+            self.db.commit()
+        self.db.rollback()
+
+    def test_exact_copies_within_batch(self):
+        """Identical rows in one batch reference the first occurrence"""
+        row = {"title": "Bakery award", "description": "A local bakery won the regional award for the best sourdough bread this year."}
+        results = self.checker.check_duplicates_batch([row, dict(row)], db=self.db)
+        self.assertFalse(results[0].is_duplicate)
+        self.assertEqual(results[1].duplicate_batch_index, 0)
+
+class TestIndexSnapshot(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+        self.snapshot_dir = tempfile.TemporaryDirectory()
+        for entry in EXISTING:
+            self.store(entry["description"])
+
+    def tearDown(self):
+        self.db.close()
+        self.snapshot_dir.cleanup()
+
+    def store(self, description, status="approved", created_at=None):
+        submission = models.Submission(
+            title="Test News Title",
+            description=description,
+            city="Test City",
+            category="Test Category",
+            publisher_name="Test Publisher",
+            publisher_phone="1234567890",
+            status=status,
+            created_at=created_at
+        )
+        self.db.add(submission)
+        self.db.commit()
+        return submission
+
+    def make_checker(self, window_days=0):
+        checker = DuplicateChecker(use_lsh=True, scope="city", window_days=window_days, snapshot_dir=self.snapshot_dir.name)
+        checker.ensure_loaded(self.db)
+        return checker
+
+    def test_warm_start_maps_snapshot(self):
+        """A second process loads the saved arrays through memmap and gets the same results"""
+        cold = self.make_checker()
+        warm = DuplicateChecker(use_lsh=True, scope="city", window_days=0, snapshot_dir=self.snapshot_dir.name)
+        self.assertTrue(warm.load_snapshot(self.db))
+
+        shard = warm.shard_for(make_submission(EXISTING[0]["description"]))
+        # Read-only arrays are the mapped snapshot files, not private copies
+        for array in (shard.index.vectors.data, shard.index.vectors.indices, shard.index.vectors.indptr):
+            self.assertFalse(array.flags.writeable)
+        query = make_submission(EXISTING[0]["description"] + " Police are investigating the cause.")
+        self.assertEqual(warm.check_duplicate(query).duplicate_entry_id, cold.check_duplicate(query).duplicate_entry_id)
+        self.assertAlmostEqual(warm.check_duplicate(query).similarity_score, cold.check_duplicate(query).similarity_score, places=6)
+
+    def test_newer_submissions_are_replayed(self):
+        """Submissions approved after the snapshot are added on load"""
+        self.make_checker()
+        description = "A new community garden opened next to the railway station with space for fifty families."
+        stored = self.store(description)
+
+        warm = self.make_checker()
+        self.assertEqual(warm.high_water_mark, stored.id)
+        self.assertEqual(warm.check_duplicate(make_submission(description)).duplicate_entry_id, str(stored.id))
+
+    def test_expired_entries_are_evicted_on_load(self):
+        """Entries that left the window after the snapshot was written are not loaded"""
+        description = "A new community garden opened next to the railway station with space for fifty families."
+        self.store(description, created_at=datetime.now(timezone.utc) - timedelta(days=10))
+        self.assertEqual(len(self.make_checker(window_days=14)), len(EXISTING) + 1)
+
+        # A week later the stored story is 17 days old
+        with mock.patch("services.duplicate_check.time.time", return_value=time.time() + 7 * 86400):
+            warm = DuplicateChecker(use_lsh=True, scope="city", window_days=14, snapshot_dir=self.snapshot_dir.name)
+            self.assertTrue(warm.load_snapshot(self.db))
+        self.assertEqual(len(warm), len(EXISTING))
+        self.assertFalse(warm.check_duplicate(make_submission(description)).is_duplicate)
+
+    def test_stale_snapshot_is_rebuilt(self):
+        """A snapshot no longer matching the database is ignored"""
+        self.make_checker()
+        first = self.db.query(models.Submission).order_by(models.Submission.id).first()
+        first.status = "rejected"
+        self.db.commit()
+
+        warm = DuplicateChecker(use_lsh=True, scope="city", window_days=0, snapshot_dir=self.snapshot_dir.name)
+        self.assertFalse(warm.load_snapshot(self.db))
+
+    def test_edited_submission_invalidates_snapshot(self):
+        """An approved submission edited after the snapshot was written forces a rebuild"""
+        self.make_checker()
+        first = self.db.query(models.Submission).order_by(models.Submission.id).first()
+        first.description = "A new community garden opened next to the railway station with space for fifty families."
+        first.updated_at = datetime.now(timezone.utc)
+        self.db.commit()
+
+        warm = DuplicateChecker(use_lsh=True, scope="city", window_days=0, snapshot_dir=self.snapshot_dir.name)
+        self.assertFalse(warm.load_snapshot(self.db))
+
+    def test_snapshot_after_edit_is_reused(self):
+        """A snapshot written after the index applied an edit stays valid and holds only the new version"""
+        checker = self.make_checker()
+        first = self.db.query(models.Submission).order_by(models.Submission.id).first()
+        first.description = "A new community garden opened next to the railway station with space for fifty families."
+        first.updated_at = datetime.now(timezone.utc)
+        self.db.commit()
+        checker.update_submission(first, was_approved=True)
+        checker.save_snapshot()
+
+        warm = DuplicateChecker(use_lsh=True, scope="city", window_days=0, snapshot_dir=self.snapshot_dir.name)
+        self.assertTrue(warm.load_snapshot(self.db))
+        self.assertEqual(len(warm), len(EXISTING))
+        self.assertFalse(warm.check_duplicate(make_submission(EXISTING[0]["description"])).is_duplicate)
+        self.assertEqual(warm.check_duplicate(make_submission(first.description)).duplicate_entry_id, str(first.id))
+
+class TestSharedDatabase(unittest.TestCase):
+    """Two processes, each with its own index, sharing one database"""
+    STORY = "A new community garden opened next to the railway station with space for fifty families."
+
+    def setUp(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        self.session_factory = sessionmaker(bind=engine)
+        self.db = self.session_factory()
+        for entry in EXISTING:
+            self.store(entry["description"])
+
+        self.first = DuplicateChecker(use_lsh=False, scope="global", window_days=0, snapshot_dir="")
+        self.second = DuplicateChecker(use_lsh=False, scope="global", window_days=0, snapshot_dir="")
+        self.first.ensure_loaded(self.db)
+        self.second.ensure_loaded(self.db)
+
+    def tearDown(self):
+        self.db.close()
+
+    def store(self, description, title="Test News Title"):
+        submission = models.Submission(
+            title=title,
+            description=description,
+            city="Test City",
+            category="Test Category",
+            publisher_name="Test Publisher",
+            publisher_phone="1234567890",
+            status="approved"
+        )
+        self.db.add(submission)
+        self.db.commit()
+        return submission
+
+    def test_approval_elsewhere_is_seen_before_a_check(self):
+        """A near copy of a story the other process approved is caught, not only exact copies"""
+        stored = self.store(self.STORY)
+        self.first.add_submission(stored)
+
+        # A reworded copy with another title, so the content-hash lookup does not apply
+        copy = make_submission(self.STORY.replace("opened", "has opened"), title="Garden opens")
+        self.second.ensure_loaded(self.db)
+        result = self.second.check_duplicate(copy, db=self.db)
+        self.assertEqual(result.duplicate_entry_id, str(stored.id))
+
+        # Catching up again does not index the row twice
+        self.second.ensure_loaded(self.db)
+        self.assertEqual(len(self.second), len(EXISTING) + 1)
+
+    def test_edit_elsewhere_replaces_the_indexed_version(self):
+        """An edit applied by the other process replaces the old version here too"""
+        first = self.db.query(models.Submission).order_by(models.Submission.id).first()
+        first.description = self.STORY
+        first.updated_at = datetime.now(timezone.utc)
+        self.db.commit()
+        self.first.update_submission(first, was_approved=True)
+
+        self.second.ensure_loaded(self.db)
+        self.assertEqual(len(self.second), len(EXISTING))
+        self.assertFalse(self.second.check_duplicate(make_submission(EXISTING[0]["description"] + " Police are investigating the cause.")).is_duplicate)
+        self.assertEqual(self.second.check_duplicate(make_submission(self.STORY + " Planting starts on Sunday.")).duplicate_entry_id, str(first.id))
+
+        # The edit is applied once, and the process that made it does not apply it again
+        self.assertEqual(self.second.catch_up(self.db, 60), 0)
+        self.assertEqual(self.first.catch_up(self.db, 60), 0)
+
+if __name__ == "__main__":
+    unittest.main()
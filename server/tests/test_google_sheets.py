@@ -0,0 +1,182 @@
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from services.google_sheets import GoogleSheetsService, SheetRow, SheetSource, column_index, column_letter, load_sheet_sources
+
+class TestSheetMarks(unittest.TestCase):
+    def setUp(self):
+        # No credentials or network: the API client is a mock
+        with mock.patch("services.google_sheets.service_account.Credentials.from_service_account_file"), \
+             mock.patch("services.google_sheets.build") as build:
+            self.sheets = GoogleSheetsService()
+        self.values = build.return_value.spreadsheets.return_value.values.return_value
+
+        self.original_settings = (config.SHEETS_MARK_FLUSH_ROWS, config.SHEETS_WRITE_RETRIES, config.SHEETS_WRITE_RETRY_SECONDS)
+        config.SHEETS_MARK_FLUSH_ROWS = 200
+        config.SHEETS_WRITE_RETRIES = 2
+        config.SHEETS_WRITE_RETRY_SECONDS = 0
+
+    def tearDown(self):
+        config.SHEETS_MARK_FLUSH_ROWS, config.SHEETS_WRITE_RETRIES, config.SHEETS_WRITE_RETRY_SECONDS = self.original_settings
+
+    def test_marks_are_buffered_until_flush(self):
+        self.sheets.mark_as_duplicate(0)
+        self.sheets.mark_as_inappropriate(1)
+        self.sheets.mark_as_invalid(2)
+        self.values.update.assert_not_called()
+        self.values.batchUpdate.assert_not_called()
+
+        self.assertTrue(self.sheets.flush_marks())
+        self.values.batchUpdate.assert_called_once()
+        body = self.values.batchUpdate.call_args.kwargs["body"]
+        self.assertEqual(body["valueInputOption"], "RAW")
+        self.assertEqual(body["data"], [
+            {"range": "Form Responses 1!I2", "values": [["DUPLICATE"]]},
+            {"range": "Form Responses 1!J3", "values": [["INAPPROPRIATE CONTENT"]]},
+            {"range": "Form Responses 1!K4", "values": [["INVALID SUBMISSION"]]},
+        ])
+        self.assertEqual(self.sheets.pending_marks, [])
+
+    def test_empty_flush_makes_no_request(self):
+        self.assertTrue(self.sheets.flush_marks())
+        self.values.batchUpdate.assert_not_called()
+
+    def test_full_buffer_is_flushed(self):
+        config.SHEETS_MARK_FLUSH_ROWS = 3
+        for row_index in range(7):
+            self.sheets.mark_as_duplicate(row_index)
+        self.assertEqual(self.values.batchUpdate.call_count, 2)
+        self.assertEqual(len(self.sheets.pending_marks), 1)
+
+    def test_failed_flush_is_retried(self):
+        self.values.batchUpdate.return_value.execute.side_effect = [Exception("rate limited"), {}]
+        self.sheets.mark_as_duplicate(0)
+        self.assertTrue(self.sheets.flush_marks())
+        self.assertEqual(self.values.batchUpdate.return_value.execute.call_count, 2)
+        self.assertEqual(self.sheets.pending_marks, [])
+
+    def test_marks_are_kept_when_retries_run_out(self):
+        self.values.batchUpdate.return_value.execute.side_effect = Exception("unavailable")
+        self.sheets.mark_as_duplicate(0)
+        self.assertFalse(self.sheets.flush_marks())
+        self.assertEqual(self.values.batchUpdate.return_value.execute.call_count, 3)
+        self.assertEqual(len(self.sheets.pending_marks), 1)
+
+        # The next flush writes them
+        self.values.batchUpdate.return_value.execute.side_effect = None
+        self.sheets.mark_as_invalid(1)
+        self.assertTrue(self.sheets.flush_marks())
+        ranges = [mark["range"] for mark in self.values.batchUpdate.call_args.kwargs["body"]["data"]]
+        self.assertEqual(ranges, ["Form Responses 1!I2", "Form Responses 1!K3"])
+
+class TestChunkedReads(unittest.TestCase):
+    def setUp(self):
+        with mock.patch("services.google_sheets.service_account.Credentials.from_service_account_file"), \
+             mock.patch("services.google_sheets.build") as build:
+            self.sheets = GoogleSheetsService()
+        self.values = build.return_value.spreadsheets.return_value.values.return_value
+
+        # Five responses, the third one incomplete
+        self.rows = [[f"1/{number}/2025", f"Title {number}", "Description", "City", "Category", "Name", "555"] for number in range(5)]
+        self.rows[2] = self.rows[2][:3]
+        self.values.get.side_effect = self.get_range
+
+    def get_range(self, spreadsheetId, range):
+        first, last = range.split("!A")[1].split(":H")
+        request = mock.Mock()
+        request.execute.return_value = {"values": self.rows[int(first) - 2:int(last) - 1]}
+        return request
+
+    def requested_ranges(self):
+        return [call.kwargs["range"] for call in self.values.get.call_args_list]
+
+    def test_sheet_is_read_in_fixed_ranges(self):
+        chunks = list(self.sheets.iter_submission_chunks(chunk_rows=2))
+        self.assertEqual(self.requested_ranges(), ["Form Responses 1!A2:H3", "Form Responses 1!A4:H5", "Form Responses 1!A6:H7"])
+        self.assertEqual([[row.row_index for row in chunk] for chunk in chunks], [[0, 1], [3], [4]])
+
+    def test_chunks_are_read_on_demand(self):
+        chunks = self.sheets.iter_submission_chunks(start_row=1, chunk_rows=2)
+        next(chunks)
+        self.assertEqual(self.requested_ranges(), ["Form Responses 1!A3:H4"])
+
+    def test_rows_parse_into_compact_records(self):
+        row = self.sheets.get_submissions()[0]
+        self.assertEqual(row["title"], "Title 0")
+        self.assertEqual(row.get("image_url"), "")
+        self.assertEqual(dict(row)["row_index"], 0)
+        self.assertFalse(hasattr(row, "__dict__"))
+        with self.assertRaises(KeyError):
+            row["missing"]
+
+class TestSheetSources(unittest.TestCase):
+    def setUp(self):
+        self.original_settings = (config.SHEET_SOURCES, config.SPREADSHEET_ID)
+
+    def tearDown(self):
+        config.SHEET_SOURCES, config.SPREADSHEET_ID = self.original_settings
+
+    def test_column_letters(self):
+        self.assertEqual([column_index(letter) for letter in ("A", "H", "Z", "AA", "ab")], [0, 7, 25, 26, 27])
+        self.assertEqual([column_letter(index) for index in (0, 7, 25, 26, 27)], ["A", "H", "Z", "AA", "AB"])
+        with self.assertRaises(ValueError):
+            column_index("A1")
+
+    def test_default_source_reads_the_form_columns(self):
+        source = SheetSource("sheet-id")
+        self.assertEqual(source.source_id, "sheet-id:Form Responses 1")
+        self.assertEqual(source.last_column, "H")
+        self.assertEqual(source.indexes, SheetSource.DEFAULT_INDEXES)
+
+    def test_column_mapping(self):
+        # A regional form that asks for the category first and has no city question (the city is column J, filled in by the sheet)
+        source = SheetSource("sheet-id", sheet_name="North", columns={"category": "B", "title": "C", "description": "D", "city": "J"},
+                             mark_columns={"duplicate": "K", "inappropriate": "L", "invalid": "M"})
+        self.assertEqual(source.last_column, "J")
+
+        row = SheetRow.parse(["1/1/2025", "Civic", "Title", "Description", "", "Name", "555", "https://example.com/1.jpg", "", "Pune"], 4, source.indexes)
+        self.assertEqual((row["category"], row["title"], row["city"], row["row_index"]), ("Civic", "Title", "Pune", 4))
+        # The city column is required, so a row that stops before it is incomplete
+        self.assertIsNone(SheetRow.parse(["1/1/2025", "Civic", "Title", "Description", "", "Name", "555"], 4, source.indexes))
+
+        with mock.patch("services.google_sheets.build") as build:
+            sheets = GoogleSheetsService(source, credentials=mock.Mock())
+        values = build.return_value.spreadsheets.return_value.values.return_value
+        values.get.return_value.execute.return_value = {"values": []}
+        sheets.get_submissions()
+        self.assertEqual(values.get.call_args.kwargs["range"], "North!A2:J501")
+        sheets.mark_as_invalid(0)
+        self.assertEqual(sheets.pending_marks, [{"range": "North!M2", "values": [["INVALID SUBMISSION"]]}])
+
+    def test_mark_columns_must_follow_form_columns(self):
+        # Marks inside the read range would change the row hash of every marked row
+        with self.assertRaises(ValueError):
+            SheetSource("sheet-id", columns={"image_url": "I"})
+        # Only the form fields can be mapped
+        with self.assertRaises(ValueError):
+            SheetSource("sheet-id", columns={"region": "X"})
+
+    def test_sources_are_loaded_from_json(self):
+        config.SHEET_SOURCES = '[{"name": "north", "spreadsheet_id": "north-id", "poll_seconds": 60}, {"name": "south", "spreadsheet_id": "south-id", "moderation_concurrency": 1}]'
+        north, south = load_sheet_sources()
+        self.assertEqual((north.name, north.source_id, north.poll_seconds), ("north", "north-id:Form Responses 1", 60))
+        self.assertEqual((south.poll_seconds, south.moderation_concurrency, south.download_concurrency), (None, 1, config.SYNC_DOWNLOAD_CONCURRENCY))
+
+        config.SHEET_SOURCES = '[{"name": "north", "spreadsheet_id": "north-id"}, {"name": "north", "spreadsheet_id": "south-id"}]'
+        with self.assertRaises(ValueError):
+            load_sheet_sources()
+
+    def test_single_spreadsheet_without_sources(self):
+        config.SHEET_SOURCES = ""
+        config.SPREADSHEET_ID = "legacy-id"
+        sources = load_sheet_sources()
+        self.assertEqual([(source.name, source.source_id) for source in sources], [("default", "legacy-id:Form Responses 1")])
+
+if __name__ == "__main__":
+    unittest.main()
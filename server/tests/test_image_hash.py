@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+from PIL import Image
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.image_hash import BKTree, hamming_distance, hash_image_file, HASH_METHODS
+
+def make_image(seed, size=(320, 240)):
+    """Smooth random image, similar in structure to a photo"""
+    generator = np.random.RandomState(seed)
+    small = generator.randint(0, 256, size=(6, 8, 3)).astype(np.uint8)
+    return Image.fromarray(small).resize(size, Image.BICUBIC)
+
+class TestImageHash(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def save(self, image, name):
+        path = os.path.join(self.temp_dir.name, name)
+        image.save(path)
+        return path
+
+    def test_reencoded_copy_is_close(self):
+        """A resized JPEG re-upload hashes within a few bits of the original"""
+        original = make_image(1)
+        original_path = self.save(original, "original.png")
+        copy_path = self.save(original.resize((200, 150)), "copy.jpg")
+
+        for method in HASH_METHODS:
+            first = int(hash_image_file(original_path, method), 16)
+            second = int(hash_image_file(copy_path, method), 16)
+            self.assertLessEqual(hamming_distance(first, second), 6, method)
+
+    def test_different_images_are_far_apart(self):
+        """Unrelated images differ in many bits"""
+        first = int(hash_image_file(self.save(make_image(1), "first.png")), 16)
+        second = int(hash_image_file(self.save(make_image(2), "second.png")), 16)
+        self.assertGreater(hamming_distance(first, second), 10)
+
+    def test_hash_is_hex_string(self):
+        image_hash = hash_image_file(self.save(make_image(3), "image.png"))
+        self.assertEqual(len(image_hash), 16)
+        int(image_hash, 16)
+
+class TestBKTree(unittest.TestCase):
+    def test_radius_query_matches_linear_scan(self):
+        """BK-tree radius queries return exactly what a linear scan would"""
+        generator = np.random.RandomState(0)
+        values = [int(value) for value in generator.randint(0, 1 << 62, size=500, dtype=np.int64)]
+        tree = BKTree()
+        for position, value in enumerate(values):
+            tree.add(value, str(position))
+
+        query = values[42] ^ 0b1011  # Three bits flipped
+        expected = sorted(
+            (hamming_distance(query, value), str(position))
+            for position, value in enumerate(values)
+            if hamming_distance(query, value) <= 8
+        )
+        self.assertEqual(tree.query(query, 8), expected)
+        self.assertEqual(tree.query(query, 8)[0], (3, "42"))
+
+    def test_identical_hashes_keep_every_item(self):
+        tree = BKTree()
+        tree.add(7, "a")
+        tree.add(7, "b")
+        self.assertEqual(len(tree), 2)
+        self.assertEqual(tree.query(7, 0), [(0, "a"), (0, "b")])
+
+if __name__ == "__main__":
+    unittest.main()
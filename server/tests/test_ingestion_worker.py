@@ -0,0 +1,181 @@
+import unittest
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from unittest import mock
+
+import config
+from db import crud, models
+from services.duplicate_check import DuplicateChecker
+from services.ingestion_worker import IngestionWorker
+from services.sync_service import SyncService
+from helpers import SyncServiceTestCase, FakeModerator, make_row
+
+class IngestionWorkerTestCase(SyncServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.original_settings = (config.INGESTION_MODE, config.INGESTION_MAX_ATTEMPTS)
+        config.INGESTION_MODE = "queue"
+        config.INGESTION_MAX_ATTEMPTS = 2
+
+    def tearDown(self):
+        config.INGESTION_MODE, config.INGESTION_MAX_ATTEMPTS = self.original_settings
+        super().tearDown()
+
+    def make_worker(self, pool_size=4, service=None):
+        """A worker with its own SyncService (and duplicate index), as in a separate process"""
+        if service is None:
+            service = SyncService(auto_start=False)
+            service.google_sheets_enabled = True
+            service.session_factory = self.session_factory
+            service.duplicate_checker = DuplicateChecker(use_lsh=False, scope="global", window_days=0, snapshot_dir="")
+            service.add_source(self.sheet)
+            service.image_moderator = FakeModerator()
+        worker = IngestionWorker(pool_size=pool_size, sync_service=service)
+        worker.session_factory = self.session_factory
+        return worker
+
+    def jobs(self):
+        db = self.session_factory()
+        try:
+            return [
+                (job.row_index, job.state, job.attempts)
+                for job in db.query(models.SubmissionJob).order_by(models.SubmissionJob.id)
+            ]
+        finally:
+            db.close()
+
+    def expire_backoff(self):
+        """Make every job's retry due now"""
+        db = self.session_factory()
+        db.query(models.SubmissionJob).update({"next_attempt_at": datetime.now(timezone.utc) - timedelta(seconds=1)})
+        db.commit()
+        db.close()
+
+class TestJobQueue(IngestionWorkerTestCase):
+    def test_sync_queues_rows_and_worker_ingests_them(self):
+        self.sync()
+        self.assertEqual(self.stored_count(), 0)
+        self.assertEqual(self.downloads, [])
+        self.assertEqual(self.jobs(), [(0, "pending", 0), (1, "pending", 0), (2, "pending", 0)])
+
+        worker = self.make_worker()
+        self.assertEqual(asyncio.run(worker.run_once()), 3)
+        self.assertEqual(self.stored_count(), 3)
+        self.assertEqual(self.jobs(), [(0, "done", 1), (1, "done", 1), (2, "done", 1)])
+        self.assertEqual(asyncio.run(worker.run_once()), 0)
+
+        # Rows already queued are not queued again
+        self.sheet.rows.append(make_row(3))
+        self.sync()
+        self.assertEqual(len(self.jobs()), 4)
+        self.assertEqual(self.service.get_status()["jobs"], {"done": 3, "pending": 1})
+
+    def test_workers_claim_disjoint_jobs(self):
+        self.sync()
+        first = self.make_worker(pool_size=2)
+        second = self.make_worker(pool_size=2)
+
+        db = self.session_factory()
+        try:
+            first_claim = [job_id for job_id, _, _ in first._claim(db)]
+            second_claim = [job_id for job_id, _, _ in second._claim(db)]
+        finally:
+            db.close()
+
+        self.assertEqual(len(first_claim), 2)
+        self.assertEqual(len(second_claim), 1)
+        self.assertFalse(set(first_claim) & set(second_claim))
+
+    def test_expired_lease_is_reclaimed(self):
+        """Jobs of a worker that died are claimed again once the lease runs out"""
+        self.sync()
+        crashed = self.make_worker()
+        db = self.session_factory()
+        crashed._claim(db)
+        db.query(models.SubmissionJob).update({"lease_expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)})
+        db.commit()
+        db.close()
+
+        asyncio.run(self.make_worker().run_once())
+        self.assertEqual(self.jobs(), [(0, "done", 2), (1, "done", 2), (2, "done", 2)])
+        self.assertEqual(self.stored_count(), 3)
+
+    def test_rows_committed_before_a_crash_are_not_ingested_twice(self):
+        """A job whose row is already in the ledger is completed without processing it again"""
+        config.INGESTION_MODE = "inline"
+        self.sync()
+        self.assertEqual(len(self.downloads), 3)
+
+        db = self.session_factory()
+        crud.enqueue_jobs(db, self.sheet.source_id, self.sheet.get_all_submissions())
+        db.close()
+
+        asyncio.run(self.make_worker().run_once())
+        self.assertEqual(len(self.downloads), 3)
+        self.assertEqual(self.stored_count(), 3)
+        self.assertEqual([state for _, state, _ in self.jobs()], ["done"] * 3)
+
+    def test_failed_jobs_are_retried_after_backoff_then_dead_lettered(self):
+        self.sheet.rows = self.sheet.rows[:1]
+        self.sync()
+        worker = self.make_worker()
+
+        with mock.patch.object(worker.sync_service, "_commit_row", side_effect=RuntimeError("database unavailable")):
+            asyncio.run(worker.run_once())
+            self.assertEqual(self.jobs(), [(0, "pending", 1)])
+
+            # The job waits out its backoff before it can be claimed again
+            self.assertEqual(asyncio.run(worker.run_once()), 0)
+            self.expire_backoff()
+            asyncio.run(worker.run_once())
+            self.assertEqual(self.jobs(), [(0, "failed", 2)])
+            self.assertEqual(asyncio.run(worker.run_once()), 0)
+
+        db = self.session_factory()
+        job = db.query(models.SubmissionJob).one()
+        self.assertEqual(job.last_error, "database unavailable")
+        dead_letter = db.query(models.DeadLetterRow).one()
+        self.assertEqual((dead_letter.job_id, dead_letter.attempts, dead_letter.last_error), (job.id, 2, "database unavailable"))
+
+        # Requeuing gives the job a fresh set of attempts
+        self.assertTrue(crud.requeue_dead_letter(db, dead_letter.id))
+        db.close()
+        self.assertEqual(self.jobs(), [(0, "pending", 0)])
+        asyncio.run(worker.run_once())
+        self.assertEqual(self.jobs(), [(0, "done", 1)])
+
+    def test_worker_sees_submissions_approved_by_other_workers(self):
+        """Each worker's index catches up with rows the others approved, so near copies are still caught"""
+        self.sheet.rows = self.sheet.rows[:1]
+        self.sync()
+        first = self.make_worker()
+        second = self.make_worker()
+
+        # The second worker builds its index before the first one approves anything
+        db = self.session_factory()
+        second.sync_service.duplicate_checker.ensure_loaded(db)
+        db.close()
+        asyncio.run(first.run_once())
+
+        # A reworded copy of the same story, with a different title so the exact-hash path does not apply
+        copy = make_row(5)
+        copy[2] = make_row(0)[2].replace("have not worked", "had not worked")
+        self.sheet.rows.append(copy)
+        self.sync()
+        asyncio.run(second.run_once())
+
+        db = self.session_factory()
+        stored = db.query(models.Submission).order_by(models.Submission.id).all()
+        self.assertEqual([submission.status for submission in stored], ["approved", "rejected"])
+        self.assertTrue(stored[1].is_duplicate)
+        db.close()
+
+if __name__ == "__main__":
+    unittest.main()
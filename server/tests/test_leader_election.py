@@ -0,0 +1,141 @@
+import unittest
+import sys
+import os
+import asyncio
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from db.database import Base
+from db import models
+from services.leader_election import LeaderElector
+
+class TestLeaderElection(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=self.engine)
+        self.session_factory = sessionmaker(bind=self.engine)
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.lock_file = os.path.join(self.temp_dir.name, "sync_leader.lock")
+        self.events = []
+        self.electors = []
+
+    def tearDown(self):
+        for elector in self.electors:
+            elector._release_lock()
+        self.temp_dir.cleanup()
+
+    def make_elector(self, name, heartbeat_seconds=0.05):
+        """An elector standing in for one server process"""
+        elector = LeaderElector(
+            "sync",
+            on_elected=lambda: self.events.append((name, "elected")),
+            on_demoted=lambda: self.events.append((name, "demoted")),
+            on_trigger=lambda source: self.events.append((name, "triggered", source)),
+            engine=self.engine,
+            lock_file=self.lock_file,
+            heartbeat_seconds=heartbeat_seconds
+        )
+        elector.session_factory = self.session_factory
+        elector.identity = f"test-host:{name}"
+        self.electors.append(elector)
+        return elector
+
+    def test_only_one_process_leads(self):
+        first = self.make_elector("first")
+        second = self.make_elector("second")
+        self.assertFalse(first.uses_advisory_lock)
+
+        self.assertEqual(first.step(), "elected")
+        self.assertIsNone(second.step())
+        self.assertIsNone(first.step())
+        self.assertTrue(first.is_leader)
+        self.assertFalse(second.is_leader)
+
+        # Every process reports the same leader
+        for elector in (first, second):
+            status = elector.status()
+            self.assertEqual(status["leader"], "test-host:first")
+            self.assertTrue(status["leader_alive"])
+        self.assertTrue(first.status()["is_leader"])
+        self.assertFalse(second.status()["is_leader"])
+
+    def test_another_process_takes_over(self):
+        first = self.make_elector("first")
+        second = self.make_elector("second")
+        first.step()
+
+        # The leader goes away (the lock is released, as when its process exits)
+        first.stop()
+        self.assertEqual(second.step(), "elected")
+        self.assertEqual(second.status()["leader"], "test-host:second")
+        self.assertEqual(self.events, [("first", "demoted")])
+
+    def test_trigger_is_forwarded_to_the_leader(self):
+        first = self.make_elector("first")
+        second = self.make_elector("second")
+        self.assertFalse(second.request_trigger())  # No leader yet
+
+        first.step()
+        time.sleep(0.01)
+        self.assertTrue(second.request_trigger())
+        self.assertEqual(first.step(), "triggered")
+        self.assertEqual(first.triggered_sources, [None])
+        self.assertIsNone(first.step())
+
+    def test_forwarded_trigger_keeps_its_sources(self):
+        first = self.make_elector("first")
+        second = self.make_elector("second")
+        third = self.make_elector("third")
+        first.step()
+
+        time.sleep(0.01)
+        self.assertTrue(second.request_trigger("north-sheet"))
+        self.assertTrue(third.request_trigger("south-sheet"))
+        self.assertTrue(second.request_trigger("north-sheet"))
+        self.assertEqual(first.step(), "triggered")
+        self.assertEqual(first.triggered_sources, ["north-sheet", "south-sheet"])
+
+        # Requests are taken off the row once the leader has seen them
+        time.sleep(0.01)
+        self.assertTrue(second.request_trigger("south-sheet"))
+        self.assertEqual(first.step(), "triggered")
+        self.assertEqual(first.triggered_sources, ["south-sheet"])
+
+    def test_missed_heartbeats_mark_leader_dead(self):
+        first = self.make_elector("first")
+        first.step()
+        db = self.session_factory()
+        db.query(models.ServiceLeader).update({"heartbeat_at": datetime.now(timezone.utc) - timedelta(seconds=1)})
+        db.commit()
+        db.close()
+        self.assertFalse(self.make_elector("second").status()["leader_alive"])
+
+    def test_background_election_fails_over(self):
+        """Running electors call back on election and demotion, and a follower takes over within a few heartbeats"""
+        first = self.make_elector("first")
+        second = self.make_elector("second")
+
+        async def scenario():
+            first.start()
+            await asyncio.sleep(0.1)
+            second.start()
+            await asyncio.sleep(0.2)
+            self.assertEqual(self.events, [("first", "elected")])
+
+            first.stop()
+            await asyncio.sleep(0.2)
+            second.stop()
+
+        asyncio.run(scenario())
+        self.assertEqual(self.events, [("first", "elected"), ("first", "demoted"), ("second", "elected"), ("second", "demoted")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,687 @@
+import unittest
+import sys
+import os
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from unittest import mock
+import httpx
+import numpy as np
+from fastapi import FastAPI
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import config
+from db.database import Base, get_db
+from db import crud, models
+from services.google_sheets import SheetSource, row_hash
+from services.sync_service import SyncService
+from models import ImageModerationResult
+from routers.sync import router as sync_router, get_sync_service
+
+from helpers import (
+    SyncServiceTestCase, FakeSheetsService, FakeModerator, SlowModerator, SlowSheetsService, make_row
+)
+
+class TestSyncWatermark(SyncServiceTestCase):
+    def test_watermark_is_read_on_the_database_pool(self):
+        threads = {}
+        get_sync_state = crud.get_sync_state
+        def record_state(*args):
+            threads.setdefault("state", threading.current_thread().name)
+            return get_sync_state(*args)
+        read_range = self.sheet.read_range
+        def record_read(*args):
+            threads.setdefault("sheet", threading.current_thread().name)
+            return read_range(*args)
+        self.sheet.read_range = record_read
+
+        with mock.patch("db.crud.get_sync_state", side_effect=record_state):
+            self.sync()
+        self.assertTrue(threads["state"].startswith("newsviews-db"))
+        self.assertTrue(threads["sheet"].startswith("newsviews-io"))
+
+    def test_first_sync_reads_whole_sheet_and_sets_watermark(self):
+        self.sync()
+        self.assertEqual(self.sheet.reads, [0])
+        self.assertEqual(self.stored_count(), 3)
+
+        db = self.session_factory()
+        state = crud.get_sync_state(db, self.sheet.source_id)
+        self.assertEqual(state.last_row, 2)
+        self.assertEqual(state.last_row_hash, row_hash(make_row(2)))
+        self.assertIsNotNone(state.last_full_sync)
+        db.close()
+
+    def test_next_sync_reads_only_new_rows(self):
+        """After the first pass only the rows from the watermark onwards are requested"""
+        self.sync()
+        self.sheet.rows.append(make_row(3))
+        self.sync()
+
+        self.assertEqual(self.sheet.reads, [0, 2])
+        self.assertEqual(self.stored_count(), 4)
+        self.assertEqual(self.service.get_status()["sources"][0]["watermark_row"], 5)
+
+    def test_edit_before_watermark_triggers_full_pass(self):
+        self.sync()
+        self.sheet.rows[2] = make_row(7)
+        self.sync()
+        self.assertEqual(self.sheet.reads, [0, 2, 0])
+
+    def test_reconciliation_pass_is_periodic(self):
+        self.sync()
+        db = self.session_factory()
+        state = crud.get_sync_state(db, self.sheet.source_id)
+        crud.update_sync_state(db, self.sheet.source_id, state.last_row, state.last_row_hash,
+                               full_sync_time=datetime.now(timezone.utc) - timedelta(seconds=config.SYNC_FULL_RECONCILE_SECONDS + 1))
+        db.close()
+
+        self.sync()
+        self.assertEqual(self.sheet.reads, [0, 0])
+        # Rows seen before are not processed again
+        self.assertEqual(self.stored_count(), 3)
+
+class TestChunkedSync(SyncServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.original_chunk_rows = config.SHEETS_READ_CHUNK_ROWS
+        config.SHEETS_READ_CHUNK_ROWS = 2
+
+    def tearDown(self):
+        config.SHEETS_READ_CHUNK_ROWS = self.original_chunk_rows
+        super().tearDown()
+
+    def test_sync_processes_one_chunk_at_a_time(self):
+        self.sheet.rows = [make_row(number) for number in range(5)]
+        batches = []
+        ingest_rows = self.service.ingest_rows
+        async def record(db, source, rows, revisions=None):
+            batches.append(len(rows))
+            return await ingest_rows(db, source, rows, revisions)
+        with mock.patch.object(self.service, "ingest_rows", side_effect=record):
+            self.sync()
+
+        self.assertEqual(self.sheet.reads, [0, 2, 4])
+        self.assertEqual(batches, [2, 2, 1])
+        self.assertEqual(self.stored_count(), 5)
+        self.assertEqual(self.service.get_status()["sources"][0]["watermark_row"], 6)
+
+    def test_failed_read_keeps_the_chunks_already_synced(self):
+        self.sheet.rows = [make_row(number) for number in range(5)]
+        read_range = self.sheet.read_range
+        def failing_read(start_row, count):
+            if start_row == 2:
+                raise RuntimeError("quota exceeded")
+            return read_range(start_row, count)
+        with mock.patch.object(self.sheet, "read_range", side_effect=failing_read):
+            self.sync()
+        self.assertEqual(self.stored_count(), 2)
+
+        # The interrupted pass was not recorded as a full pass, so the next sync reads the whole sheet; the ledger skips the first chunk
+        self.sync()
+        self.assertEqual(self.stored_count(), 5)
+        self.assertEqual(self.sheet.reads[-3:], [0, 2, 4])
+
+class TestMultipleSources(SyncServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        # Sources sync concurrently, each with its own session: a file database gives each its own connection
+        engine = create_engine(f"sqlite:///{os.path.join(self.temp_dir.name, 'sources.db')}", connect_args={"check_same_thread": False})
+        self.addCleanup(engine.dispose)
+        Base.metadata.create_all(bind=engine)
+        self.session_factory = sessionmaker(bind=engine)
+        self.service.session_factory = self.session_factory
+
+        # A second regional form with its own polling interval and moderation budget
+        self.north = FakeSheetsService([make_row(number) for number in range(20, 23)],
+                                       SheetSource("north-sheet", name="north", poll_seconds=30, moderation_concurrency=1))
+        self.north_scheduler = self.service.add_source(self.north)
+
+    def test_sources_have_their_own_watermarks_and_intervals(self):
+        self.sync()
+        self.assertEqual((self.sheet.reads, self.north.reads), ([0], [0]))
+        self.assertEqual(self.stored_count(), 6)
+
+        self.north.rows.append(make_row(23))
+        self.sync()
+        self.assertEqual((self.sheet.reads, self.north.reads), ([0, 2], [0, 2]))
+        self.assertEqual(self.stored_count(), 7)
+
+        status = self.service.get_status()
+        self.assertEqual(status["processed_count"], 7)
+        self.assertEqual([(source["name"], source["processed_count"], source["watermark_row"]) for source in status["sources"]],
+                         [("test-sheet", 3, 4), ("north", 4, 5)])
+        self.assertEqual((self.scheduler.interval, self.north_scheduler.interval), (config.SYNC_POLL_MIN_SECONDS, 30))
+
+    def test_marks_go_to_the_rows_sheet(self):
+        self.north.rows[1][3] = ""  # Missing city makes the row invalid
+        self.sync()
+        self.assertIn(("invalid", 1), self.north.marks)
+        self.assertNotIn(("invalid", 1), self.sheet.marks)
+
+    def test_sync_of_one_source(self):
+        asyncio.run(self.service.sync_submissions(self.north.source_id))
+        self.assertEqual((self.sheet.reads, self.north.reads), ([], [0]))
+
+    def test_sources_take_turns_chunk_by_chunk(self):
+        """With one slot, a full pass over a large sheet does not hold up the other source"""
+        original_settings = (config.SHEETS_READ_CHUNK_ROWS, config.SYNC_SOURCE_CONCURRENCY)
+        config.SHEETS_READ_CHUNK_ROWS, config.SYNC_SOURCE_CONCURRENCY = 2, 1
+        self.addCleanup(lambda: setattr(config, "SHEETS_READ_CHUNK_ROWS", original_settings[0]))
+        self.addCleanup(lambda: setattr(config, "SYNC_SOURCE_CONCURRENCY", original_settings[1]))
+        self.sheet.rows = [make_row(number) for number in range(6)]
+
+        order = []
+        sync_chunk = self.service._sync_chunk
+        async def record(db, source, chunk):
+            order.append(source)
+            return await sync_chunk(db, source, chunk)
+        with mock.patch.object(self.service, "_sync_chunk", side_effect=record):
+            self.sync()
+
+        self.assertEqual(order, [self.sheet.source_id, self.north.source_id] * 2 + [self.sheet.source_id])
+        self.assertEqual(self.stored_count(), 9)
+
+    def test_moderation_budget_is_per_source(self):
+        # Distinct stories, so no row is skipped as a duplicate before moderation
+        stories = TestEditedRows.STORIES + [
+            "Shopkeepers in the old bazaar protested against the sudden increase in parking fees on Friday.",
+            "The district hospital opened a new dialysis ward with twelve beds and round the clock staff.",
+            "Heavy rain uprooted a banyan tree outside the primary school, blocking the lane for hours.",
+        ]
+        for row, story in zip(self.sheet.rows + self.north.rows, stories):
+            row[2] = story
+        self.service.image_moderator = SlowModerator(0.05)
+        asyncio.run(self.service.sync_submissions(self.north.source_id))
+        self.assertEqual(self.service.image_moderator.max_active, 1)
+
+        asyncio.run(self.service.sync_submissions(self.sheet.source_id))
+        self.assertGreater(self.service.image_moderator.max_active, 1)
+
+class TestIngestionLedger(SyncServiceTestCase):
+    def test_restart_does_not_reprocess_rows(self):
+        """A new SyncService on the same database skips every row already in the ledger"""
+        self.sync()
+        self.assertEqual(len(self.downloads), 3)
+
+        restarted = SyncService(auto_start=False)
+        restarted.google_sheets_enabled = True
+        restarted.session_factory = self.session_factory
+        restarted.duplicate_checker = self.service.duplicate_checker
+        restarted.image_moderator = FakeModerator()
+        restarted.add_source(self.sheet)
+        asyncio.run(restarted.sync_submissions())
+
+        self.assertEqual(len(self.downloads), 3)
+        self.assertEqual(self.stored_count(), 3)
+        self.assertEqual(restarted.get_status()["processed_count"], 3)
+
+    def test_ledger_links_rows_to_submissions(self):
+        self.sync()
+        db = self.session_factory()
+        entries = db.query(models.IngestionLedger).order_by(models.IngestionLedger.row_index).all()
+        self.assertEqual([entry.row_index for entry in entries], [0, 1, 2])
+        self.assertTrue(all(entry.submission_id is not None for entry in entries))
+        self.assertEqual(entries[0].row_hash, row_hash(make_row(0)))
+        db.close()
+
+class TestEditedRows(SyncServiceTestCase):
+    STORIES = [
+        "The municipal council approved a new budget for repairing potholes across the northern district.",
+        "Volunteers planted four hundred saplings along the riverbank during the weekend cleanup drive.",
+        "A water pipeline burst near the railway station, flooding the market road since Tuesday morning.",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        for row_index, story in enumerate(self.STORIES):
+            self.edit_row(row_index, story)
+
+    def edit_row(self, row_index, description):
+        row = list(self.sheet.rows[row_index])
+        row[2] = description
+        self.sheet.rows[row_index] = row
+
+    def submission_for_row(self, db, row_index):
+        entry = db.query(models.IngestionLedger).filter(models.IngestionLedger.row_index == row_index).one()
+        return crud.get_submission(db, entry.submission_id)
+
+    def test_edited_row_updates_its_submission(self):
+        self.sync()
+        db = self.session_factory()
+        original_id = self.submission_for_row(db, 2).id
+        db.close()
+
+        # A small correction: close enough to the previous version to count as a duplicate of anything else
+        self.edit_row(2, self.STORIES[2] + " Repairs start on Monday.")
+        self.sync()
+
+        self.assertEqual(self.stored_count(), 3)
+        # Only the edited row was processed again
+        self.assertEqual(len(self.downloads), 4)
+        db = self.session_factory()
+        submission = self.submission_for_row(db, 2)
+        self.assertEqual(submission.id, original_id)
+        self.assertTrue(submission.description.endswith("Repairs start on Monday."))
+        self.assertEqual(submission.status, "approved")
+        self.assertFalse(submission.is_duplicate)
+        self.assertEqual(db.query(models.IngestionLedger).count(), 3)
+        db.close()
+        self.assertIn(("cleared", 2), self.sheet.marks)
+
+    def test_edit_into_a_copy_of_another_row_is_rejected(self):
+        self.sync()
+        self.edit_row(2, self.STORIES[0])
+        self.sync()
+
+        self.assertEqual(self.stored_count(), 3)
+        db = self.session_factory()
+        submission = self.submission_for_row(db, 2)
+        self.assertEqual(submission.status, "rejected")
+        self.assertEqual(submission.duplicate_reference_id, str(self.submission_for_row(db, 0).id))
+        db.close()
+        self.assertEqual(self.sheet.marks[-2:], [("cleared", 2), ("duplicate", 2)])
+
+    def test_edited_rows_are_diffed_once_per_chunk(self):
+        self.sync()
+        self.edit_row(2, self.STORIES[2] + " Repairs start on Monday.")
+        with mock.patch.object(crud, "diff_rows", wraps=crud.diff_rows) as diff_rows:
+            self.sync()
+
+        self.assertEqual(diff_rows.call_count, 1)
+        db = self.session_factory()
+        self.assertFalse(self.submission_for_row(db, 2).is_duplicate)
+        db.close()
+
+    def test_rows_are_classified_against_the_ledger(self):
+        self.sync()
+        self.edit_row(1, "An edited description of the story about the street lights.")
+        self.sheet.rows.append(make_row(3))
+
+        db = self.session_factory()
+        new_rows, changed, unchanged = crud.diff_rows(db, self.sheet.source_id, self.sheet.get_submissions(0))
+        self.assertEqual([row["row_index"] for row in new_rows], [3])
+        self.assertEqual([(row["row_index"], entry.row_index) for row, entry in changed], [(1, 1)])
+        self.assertEqual(unchanged, 2)
+        db.close()
+
+class TestSyncPipeline(SyncServiceTestCase):
+    def test_rows_are_moderated_concurrently_and_committed_in_order(self):
+        """A burst of rows takes about as long as the slowest row, and is stored in sheet order"""
+        self.sheet.rows = [make_row(number) for number in range(8)]
+        stories = [
+            "Heavy rain flooded several streets in the old town and residents were asked to stay indoors.",
+            "The city council approved a new budget for public parks and libraries during Tuesday's meeting.",
+            "A local bakery won the regional award for the best sourdough bread in the province this year.",
+            "Firefighters put out a blaze at a timber warehouse near the river before it could spread.",
+            "Thousands of runners took part in the annual marathon that finished at the cricket stadium.",
+            "Tanker deliveries began in the eastern colonies after the main water pipeline burst on Friday.",
+            "Students protested outside the university gate demanding the exam schedule be postponed.",
+            "A leopard was spotted on the golf course early in the morning, forest officials confirmed.",
+        ]
+        for row, story in zip(self.sheet.rows, stories):
+            row[2] = story
+        moderator = SlowModerator(delay=0.3)
+        self.service.image_moderator = moderator
+
+        started = time.perf_counter()
+        self.sync()
+        elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 8 * 0.3 / 2)
+        self.assertEqual(moderator.max_active, config.SYNC_MODERATION_CONCURRENCY)
+
+        db = self.session_factory()
+        entries = db.query(models.IngestionLedger).order_by(models.IngestionLedger.submission_id).all()
+        self.assertEqual([entry.row_index for entry in entries], list(range(8)))
+        db.close()
+
+class TestSyncQueries(SyncServiceTestCase):
+    def test_copy_of_a_rejected_batch_row_is_checked_again(self):
+        """A near copy of an earlier row in the same sync is stored if that row was not approved"""
+        invalid = make_row(0)
+        invalid[1] = ""
+        self.sheet.rows = [invalid, make_row(1)]
+        moderated = []
+        self.service.image_moderator.moderate_image = lambda image_path: moderated.append(image_path) or ImageModerationResult(is_appropriate=True)
+        self.sync()
+
+        db = self.session_factory()
+        statuses = [submission.status for submission in db.query(models.Submission).order_by(models.Submission.id)]
+        copy = db.query(models.Submission).order_by(models.Submission.id.desc()).first()
+        db.close()
+        self.assertEqual(statuses, ["rejected", "approved"])
+        self.assertFalse(copy.is_duplicate)
+        self.assertIsNone(copy.duplicate_reference_id)
+        # The copy skipped moderation as a duplicate at first, so it is moderated when checked again
+        self.assertEqual(len(moderated), 2)
+
+    def test_sync_never_rescans_submissions(self):
+        """After the index is built, a sync reads recent submissions once (catch-up), by content hash once and by primary key per stored row"""
+        self.sync()
+
+        statements = []
+        engine = self.session_factory.kw["bind"]
+        def record(connection, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().startswith("SELECT") and "FROM submissions" in statement:
+                statements.append(" ".join(statement.split()))
+        event.listen(engine, "before_cursor_execute", record)
+
+        self.sheet.rows += [make_row(number) for number in range(10, 15)]
+        self.sync()
+        event.remove(engine, "before_cursor_execute", record)
+
+        self.assertEqual(self.stored_count(), 8)
+        by_hash = [statement for statement in statements if "WHERE submissions.content_hash IN" in statement]
+        by_id = [statement for statement in statements if "WHERE submissions.id = ?" in statement]
+        recent = [statement for statement in statements if "submissions.created_at >= ?" in statement]
+        self.assertEqual(len(by_hash), 1)
+        self.assertEqual(len(by_id), 5)
+        self.assertEqual(len(recent), 1)
+        self.assertEqual(len(statements), 7)
+
+class TestSheetsCache(SyncServiceTestCase):
+    def test_sync_with_new_rows_invalidates_the_feed_cache(self):
+        self.sync()
+        self.assertEqual(len(self.sheet.submissions_cache.get()), 3)
+        self.sheet.submissions_cache.get()
+        self.assertEqual(self.sheet.submissions_cache.stats()["loads"], 1)
+
+        # No new rows: the cached copy stays
+        self.sync()
+        self.sheet.submissions_cache.get()
+        self.assertEqual(self.sheet.submissions_cache.stats()["loads"], 1)
+
+        self.sheet.rows.append(make_row(3))
+        self.sync()
+        self.assertEqual(len(self.sheet.submissions_cache.get()), 4)
+        self.assertEqual(self.service.get_status()["sources"][0]["sheets_cache"]["loads"], 2)
+
+    def test_feed_has_only_the_form_fields(self):
+        """GET /submissions/ serves the form responses without the sync's row_index and row_hash"""
+        feed = self.sheet.submissions_cache.get()
+        self.assertEqual(list(feed[0]), ["timestamp", "title", "description", "city", "category", "publisher_name", "publisher_phone", "image_url"])
+
+class TestSheetMarks(SyncServiceTestCase):
+    def test_marks_are_written_once_per_sync(self):
+        """Every rejected row of a sync is marked by a single flush at the end"""
+        # Later rows repeat the first story
+        self.sheet.rows = [make_row(number) for number in range(4)]
+        for row in self.sheet.rows[1:]:
+            row[1:3] = self.sheet.rows[0][1:3]
+        self.sync()
+        self.assertEqual(self.sheet.flushes, 1)
+        self.assertEqual(self.sheet.marks, [("duplicate", 1), ("duplicate", 2), ("duplicate", 3)])
+
+class TestRowRetries(SyncServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.original_max_attempts = config.INGESTION_MAX_ATTEMPTS
+        config.INGESTION_MAX_ATTEMPTS = 2
+
+    def tearDown(self):
+        config.INGESTION_MAX_ATTEMPTS = self.original_max_attempts
+        super().tearDown()
+
+    def sync_with_failing_row(self, row_index):
+        """Sync while committing the given row fails"""
+        commit_row = self.service._commit_row
+        def failing_commit(db, source, i, *args):
+            if i == row_index:
+                raise RuntimeError("database unavailable")
+            return commit_row(db, source, i, *args)
+        with mock.patch.object(self.service, "_commit_row", side_effect=failing_commit):
+            self.sync()
+
+    def expire_backoff(self):
+        db = self.session_factory()
+        db.query(models.RowFailure).update({"next_attempt_at": datetime.now(timezone.utc) - timedelta(seconds=1)})
+        db.commit()
+        db.close()
+
+    def test_failed_row_is_retried_after_backoff(self):
+        self.sync_with_failing_row(1)
+        self.assertEqual(self.stored_count(), 2)
+
+        db = self.session_factory()
+        failure = db.query(models.RowFailure).one()
+        self.assertEqual((failure.row_index, failure.attempts, failure.last_error), (1, 1, "database unavailable"))
+        next_attempt = failure.next_attempt_at.replace(tzinfo=timezone.utc)
+        self.assertAlmostEqual((next_attempt - datetime.now(timezone.utc)).total_seconds(), config.INGESTION_RETRY_BASE_SECONDS, delta=5)
+        db.close()
+
+        # Not retried while backing off, not even by a reconciliation pass that reads the row again
+        self.sheet.rows[2] = make_row(7)
+        self.sync()
+        self.assertEqual(self.stored_count(), 3)
+        self.assertEqual(len(self.downloads), 4)
+
+        self.expire_backoff()
+        self.sync()
+        self.assertEqual(self.stored_count(), 4)
+        db = self.session_factory()
+        self.assertEqual(db.query(models.RowFailure).count(), 0)
+        self.assertEqual(db.query(models.IngestionLedger).filter(models.IngestionLedger.row_index == 1).count(), 1)
+        db.close()
+
+    def test_backoff_doubles_up_to_the_maximum(self):
+        base, maximum = config.INGESTION_RETRY_BASE_SECONDS, config.INGESTION_RETRY_MAX_SECONDS
+        self.assertEqual(crud.retry_delay(1), timedelta(seconds=base))
+        self.assertEqual(crud.retry_delay(2), timedelta(seconds=2 * base))
+        self.assertEqual(crud.retry_delay(30), timedelta(seconds=maximum))
+
+    def test_row_is_dead_lettered_after_max_attempts_and_can_be_requeued(self):
+        self.sync_with_failing_row(1)
+        self.expire_backoff()
+        self.sync_with_failing_row(1)
+
+        db = self.session_factory()
+        self.assertEqual(db.query(models.RowFailure).count(), 0)
+        dead_letter = db.query(models.DeadLetterRow).one()
+        self.assertEqual((dead_letter.row_index, dead_letter.attempts, dead_letter.job_id), (1, 2, None))
+        db.close()
+
+        # Dead-lettered rows are left alone, even by a reconciliation pass
+        self.sheet.rows[2] = make_row(7)
+        self.sync()
+        self.assertEqual(self.stored_count(), 3)
+
+        app = FastAPI()
+        app.include_router(sync_router)
+        app.dependency_overrides[get_sync_service] = lambda: self.service
+        def get_test_db():
+            db = self.session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+        app.dependency_overrides[get_db] = get_test_db
+
+        async def requeue():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                listed = (await client.get("/sync/dead-letters")).json()
+                response = await client.post(f"/sync/dead-letters/{listed[0]['id']}/requeue")
+                missing = await client.post(f"/sync/dead-letters/{listed[0]['id']}/requeue")
+                return listed, response, missing
+
+        listed, response, missing = asyncio.run(requeue())
+        self.assertEqual([(entry["row"], entry["attempts"], entry["last_error"]) for entry in listed], [(3, 2, "database unavailable")])
+        self.assertEqual(response.json()["status"], "requeued")
+        self.assertEqual(missing.status_code, 404)
+
+        # The next sync retries it straight away
+        self.sync()
+        self.assertEqual(self.stored_count(), 4)
+
+class TestSyncTriggers(SyncServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.original_settings = (config.SYNC_TRIGGER_DEBOUNCE_SECONDS, config.SYNC_POLL_MAX_SECONDS, config.SYNC_TRIGGER_TOKEN)
+        config.SYNC_TRIGGER_DEBOUNCE_SECONDS = 0.2
+        config.SYNC_TRIGGER_TOKEN = ""
+
+    def tearDown(self):
+        config.SYNC_TRIGGER_DEBOUNCE_SECONDS, config.SYNC_POLL_MAX_SECONDS, config.SYNC_TRIGGER_TOKEN = self.original_settings
+        super().tearDown()
+
+    def run_loop(self, scenario):
+        """Run the sync loop while a scenario coroutine drives it"""
+        async def main():
+            self.service.start()
+            try:
+                await scenario()
+            finally:
+                self.service.stop()
+        asyncio.run(main())
+
+    async def wait_for_reads(self, count, timeout=5):
+        deadline = time.perf_counter() + timeout
+        while len(self.sheet.reads) < count and time.perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+
+    def test_burst_of_triggers_runs_one_sync(self):
+        """Triggers during the debounce window are coalesced into a single sync"""
+        self.scheduler.interval = self.scheduler.poll_interval = 60
+        results = []
+
+        async def scenario():
+            await self.wait_for_reads(1)
+            self.sheet.rows += [make_row(number) for number in range(10, 13)]
+            for _ in range(5):
+                results.append(self.service.trigger())
+                await asyncio.sleep(0.02)
+            await self.wait_for_reads(2)
+            await asyncio.sleep(0.5)
+
+        started = time.perf_counter()
+        self.run_loop(scenario)
+
+        self.assertEqual(results, [True, False, False, False, False])
+        self.assertEqual(len(self.sheet.reads), 2)
+        self.assertEqual(self.stored_count(), 6)
+        self.assertLess(time.perf_counter() - started, 5)
+
+    def test_polling_backs_off_while_idle(self):
+        """Without new rows the polling interval doubles up to the maximum, and new rows reset it"""
+        config.SYNC_POLL_MAX_SECONDS = 0.4
+        self.scheduler.interval = self.scheduler.poll_interval = 0.05
+        intervals = []
+
+        async def scenario():
+            await self.wait_for_reads(5)
+            intervals.append(self.scheduler.poll_interval)
+            self.sheet.rows.append(make_row(10))
+            self.service.trigger()
+            await self.wait_for_reads(6)
+            deadline = time.perf_counter() + 5
+            while self.scheduler.poll_interval != 0.05 and time.perf_counter() < deadline:
+                await asyncio.sleep(0.005)
+            intervals.append(self.scheduler.poll_interval)
+            self.assertEqual(self.stored_count(), 4)
+
+        self.run_loop(scenario)
+        self.assertEqual(intervals, [0.4, 0.05])
+
+    def test_trigger_endpoint(self):
+        config.SYNC_TRIGGER_TOKEN = "secret"
+        self.scheduler.interval = self.scheduler.poll_interval = 60
+        app = FastAPI()
+        app.include_router(sync_router)
+        app.dependency_overrides[get_sync_service] = lambda: self.service
+        responses = []
+
+        async def scenario():
+            await self.wait_for_reads(1)
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                responses.append(await client.post("/sync/trigger"))
+                for _ in range(2):
+                    responses.append(await client.post("/sync/trigger", headers={"X-Sync-Token": "secret"}))
+
+        self.run_loop(scenario)
+        self.assertEqual(responses[0].status_code, 401)
+        self.assertEqual([response.json()["status"] for response in responses[1:]], ["scheduled", "coalesced"])
+        self.assertEqual(self.service.get_status()["trigger_count"], 2)
+
+    def test_trigger_endpoint_is_refused_without_a_token(self):
+        app = FastAPI()
+        app.include_router(sync_router)
+        app.dependency_overrides[get_sync_service] = lambda: self.service
+
+        async def trigger():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                return await client.post("/sync/trigger", headers={"X-Sync-Token": ""})
+
+        response = asyncio.run(trigger())
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.service.get_status()["trigger_count"], 0)
+
+class TestEventLoopLatency(SyncServiceTestCase):
+    def test_requests_stay_fast_while_sync_runs(self):
+        """Sheet reads, moderation and database writes all block, yet /health and /sync/status answer promptly"""
+        delay = 0.3
+        # A file database gives every session its own connection, as PostgreSQL does in
+        # production; the shared StaticPool connection would mix the requests' and the sync's transactions
+        engine = create_engine(f"sqlite:///{os.path.join(self.temp_dir.name, 'latency.db')}", connect_args={"check_same_thread": False})
+        self.addCleanup(engine.dispose)
+        Base.metadata.create_all(bind=engine)
+        self.session_factory = sessionmaker(bind=engine)
+        self.service.session_factory = self.session_factory
+
+        rows = [make_row(number) for number in range(3)]
+        rows[1][3] = ""  # Missing city makes the row invalid, so the sheet gets a (slow) write
+        self.sheet = SlowSheetsService(rows, delay)
+        self.service.add_source(self.sheet)
+        self.service.image_moderator = SlowModerator(delay)
+
+        create_submission = crud.create_submission
+        def slow_create_submission(*args, **kwargs):
+            time.sleep(delay)
+            return create_submission(*args, **kwargs)
+
+        app = FastAPI()
+        app.include_router(sync_router)
+        app.dependency_overrides[get_sync_service] = lambda: self.service
+
+        @app.get("/health")
+        async def health_check():
+            return {"status": "healthy"}
+
+        async def measure():
+            latencies = {"/health": [], "/sync/status": []}
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                sync = asyncio.create_task(self.service.sync_submissions())
+                while not sync.done():
+                    for path, samples in latencies.items():
+                        started = time.perf_counter()
+                        response = await client.get(path)
+                        samples.append(time.perf_counter() - started)
+                        self.assertEqual(response.status_code, 200)
+                    await asyncio.sleep(0.01)
+                await sync
+            return latencies
+
+        with mock.patch("db.crud.create_submission", side_effect=slow_create_submission):
+            started = time.perf_counter()
+            latencies = asyncio.run(measure())
+            elapsed = time.perf_counter() - started
+
+        # The sync itself spent well over a second in blocking calls...
+        self.assertGreater(elapsed, 4 * delay)
+        self.assertEqual(self.stored_count(), 3)
+        self.assertIn(("invalid", 1), self.sheet.marks)
+        # ...while requests were answered in a fraction of one blocking call. /sync/status
+        # reads the same SQLite connection as the sync, so it may wait on the database once in a while
+        for path, samples in latencies.items():
+            self.assertGreater(len(samples), 10, path)
+            self.assertLess(float(np.median(samples)), delay / 10, path)
+        self.assertLess(max(latencies["/health"]), delay / 2)
+
+if __name__ == "__main__":
+    unittest.main()
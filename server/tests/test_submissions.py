@@ -0,0 +1,125 @@
+import unittest
+import sys
+import os
+import asyncio
+import tempfile
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest import mock
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from db.database import Base, get_db
+from db import models
+from models import DuplicateCheckResult, ImageModerationResult
+from services.duplicate_check import DuplicateChecker, content_fingerprint
+from routers.submissions import router as submissions_router, get_duplicate_checker, get_image_moderator
+
+TITLE = "Flooding in the Old Town"
+DESCRIPTION = "Heavy rain flooded several streets in the old town and residents were asked to stay indoors."
+
+class FakeModerator:
+    def moderate_image(self, image_path):
+        return ImageModerationResult(is_appropriate=True)
+
+class TestValidateSubmission(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        self.session_factory = sessionmaker(bind=engine)
+        self.checker = DuplicateChecker(use_lsh=False, scope="global", window_days=0, snapshot_dir="")
+
+        self.app = FastAPI()
+        self.app.include_router(submissions_router)
+        self.app.dependency_overrides[get_duplicate_checker] = lambda: self.checker
+        self.app.dependency_overrides[get_image_moderator] = lambda: FakeModerator()
+        def get_test_db():
+            db = self.session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+        self.app.dependency_overrides[get_db] = get_test_db
+
+        # Uploads are written to a throwaway directory instead of uploads/
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        def save(image):
+            path = os.path.join(self.temp_dir.name, image.filename)
+            with open(path, "wb") as f:
+                f.write(image.file.read())
+            return True, path
+        for target, side_effect in (("routers.submissions.save_uploaded_image", save), ("routers.submissions.compute_image_hash", lambda path: None)):
+            patcher = mock.patch(target, side_effect=side_effect)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def store_approved(self, title=TITLE, description=DESCRIPTION):
+        db = self.session_factory()
+        submission = models.Submission(
+            title=title,
+            description=description,
+            city="Test City",
+            category="Test Category",
+            publisher_name="Test Publisher",
+            publisher_phone="1234567890",
+            status="approved",
+            content_hash=content_fingerprint(title, description)
+        )
+        db.add(submission)
+        db.commit()
+        submission_id = submission.id
+        db.close()
+        return submission_id
+
+    def post(self, description=DESCRIPTION):
+        async def request():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app), base_url="http://test") as client:
+                return await client.post("/submissions/validate", data={
+                    "title": TITLE,
+                    "description": description,
+                    "city": "Test City",
+                    "category": "Test Category",
+                    "publisher_name": "Test Publisher",
+                    "publisher_phone": "1234567890",
+                }, files={"image": ("photo.jpg", b"not really a jpeg", "image/jpeg")})
+        return asyncio.run(request())
+
+    def test_concurrent_copy_is_stored_as_duplicate(self):
+        """A copy approved by another request after the duplicate check is rejected instead of failing"""
+        original_id = self.store_approved()
+        # The other request commits between this request's check and its insert
+        with mock.patch.object(self.checker, "check_duplicate", return_value=DuplicateCheckResult(is_duplicate=False)):
+            response = self.post()
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["status"], "rejected")
+        self.assertEqual(body["duplicate_check"]["duplicate_entry_id"], str(original_id))
+
+        db = self.session_factory()
+        stored = db.query(models.Submission).filter(models.Submission.id == body["submission_id"]).one()
+        self.assertEqual((stored.status, stored.is_duplicate), ("rejected", True))
+        db.close()
+
+    def test_near_copy_of_a_story_approved_by_another_process(self):
+        """A process that is not the sync leader catches reworded copies of stories the leader approved"""
+        # This process built its index before the leader approved the story
+        db = self.session_factory()
+        self.checker.ensure_loaded(db)
+        db.close()
+        original_id = self.store_approved(title="Old Town flooded", description=DESCRIPTION.replace("Heavy rain", "Heavy rainfall"))
+
+        response = self.post()
+        body = response.json()
+        self.assertEqual(body["status"], "rejected")
+        self.assertEqual(body["duplicate_check"]["duplicate_entry_id"], str(original_id))
+        self.assertLess(body["duplicate_check"]["similarity_score"], 1.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Read-through cache for slow, rate-limited reads (e.g. the whole Google Sheet)
+"""
+import threading
+import time
+from concurrent.futures import Future
+
+from utils.executors import io_executor
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger("utils.cache")
+
+class ReadThroughCache:
+    """
+    Caches the result of a blocking loader for ttl_seconds.
+
+    - Single flight: however many callers miss at once, the loader runs once
+      and they all share its result.
+    - Stale while revalidate: for stale_seconds after the TTL the old value is
+      still returned at once while one background load refreshes it.
+    - invalidate() drops the value, so the next caller waits for a fresh load.
+
+    Loads run on the I/O executor. Async code awaits get_future() through
+    asyncio.wrap_future, so waiting callers hold no threads; blocking code
+    calls get().
+    """
+
+    def __init__(self, loader, ttl_seconds: float, stale_seconds: float, name: str = "cache"):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded_at = None  # time.monotonic() of the load that produced _value
+        self._inflight = None  # Future of the running load
+        self._generation = 0  # Bumped by invalidate(), so loads started earlier are not cached
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    def get_future(self) -> Future:
+        """A future of the cached value (already done unless the caller has to wait for a load)"""
+        with self._lock:
+            age = time.monotonic() - self._loaded_at if self._loaded_at is not None else None
+
+            if age is not None and age < self.ttl_seconds:
+                self.hits += 1
+                return self._done(self._value)
+
+            if age is not None and age < self.ttl_seconds + self.stale_seconds:
+                self.stale_hits += 1
+                self._start_load()
+                return self._done(self._value)
+
+            self.misses += 1
+            return self._start_load()
+
+    def get(self):
+        """The cached value, blocking while it is loaded (do not call from an I/O executor thread)"""
+        return self.get_future().result()
+
+    def invalidate(self):
+        """Forget the cached value; the next caller loads a fresh one"""
+        with self._lock:
+            self._generation += 1
+            self._value = None
+            self._loaded_at = None
+            self._inflight = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "loads": self.loads,
+                "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at is not None else None,
+            }
+
+    @staticmethod
+    def _done(value) -> Future:
+        future = Future()
+        future.set_result(value)
+        return future
+
+    def _start_load(self) -> Future:
+        """Start a load unless one is running (call with the lock held)"""
+        if self._inflight is None:
+            self._inflight = Future()
+            self.loads += 1
+            io_executor.submit(self._load, self._inflight, self._generation)
+        return self._inflight
+
+    def _load(self, future: Future, generation: int):
+        try:
+            value = self.loader()
+        except Exception as e:
+            logger.error(f"Loading {self.name} failed: {str(e)}")
+            with self._lock:
+                if self._inflight is future:
+                    self._inflight = None
+            future.set_exception(e)
+            return
+
+        with self._lock:
+            # A load started before invalidate() may have missed the change that caused it
+            if generation == self._generation:
+                self._value = value
+                self._loaded_at = time.monotonic()
+            if self._inflight is future:
+                self._inflight = None
+        future.set_result(value)
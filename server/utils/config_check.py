@@ -23,8 +23,8 @@ def check_google_credentials():
         logger.warning(f"Google credentials file not found at: {creds_path}")
         return False
     
-    if not config.SPREADSHEET_ID:
-        logger.warning("SPREADSHEET_ID environment variable is not set")
+    if not config.SPREADSHEET_ID and not config.SHEET_SOURCES:
+        logger.warning("Neither SPREADSHEET_ID nor SHEET_SOURCES environment variable is set")
         return False
     
     logger.info(f"Google credentials found at: {creds_path}")
@@ -0,0 +1,48 @@
+"""
+Dedicated thread pools for blocking work called from async code
+
+The Google API client, requests, the Groq client, PIL and SQLAlchemy are all
+synchronous. Calling them directly from an async endpoint or the sync loop
+stalls every other request on the worker, so async code hands them to one of
+these pools instead. Network calls and database work get separate pools, so a
+burst of slow downloads can never starve the database calls (or the reverse),
+and neither competes with FastAPI's own threadpool for sync endpoints.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger("utils.executors")
+
+# Sheets, Drive, Groq and file I/O
+io_executor = ThreadPoolExecutor(max_workers=config.IO_EXECUTOR_WORKERS, thread_name_prefix="newsviews-io")
+
+# Database sessions and duplicate index work
+db_executor = ThreadPoolExecutor(max_workers=config.DB_EXECUTOR_WORKERS, thread_name_prefix="newsviews-db")
+
+async def _run(executor: ThreadPoolExecutor, func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+async def run_io(func, *args, **kwargs):
+    """Run a blocking network or file call on the I/O pool and await its result"""
+    return await _run(io_executor, func, *args, **kwargs)
+
+async def run_db(func, *args, **kwargs):
+    """
+    Run a blocking database call on the database pool and await its result.
+
+    A Session is not thread-safe, but it may move between threads as long as
+    only one call uses it at a time, which awaiting each call guarantees.
+    """
+    return await _run(db_executor, func, *args, **kwargs)
+
+def shutdown_executors():
+    """Wait for queued work and stop both pools (called on application shutdown)"""
+    logger.info("Shutting down blocking-work executors")
+    io_executor.shutdown(wait=True)
+    db_executor.shutdown(wait=True)
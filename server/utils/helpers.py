@@ -13,6 +13,7 @@ except ImportError:
     magic = None
 
 from utils.gdrive import download_file as gdrive_download
+from utils.image_hash import hash_image_file
 from utils.temp_storage import temp_storage
 from utils.logger import setup_logger
 
@@ -125,6 +126,27 @@ def detect_image_type(file_path: str) -> str:
     # Could not identify the image type
     return None
 
+def compute_image_hash(file_path: str) -> str:
+    """
+    Compute the perceptual hash of an ingested image
+    
+    Args:
+        file_path: Path to the image file
+        
+    Returns:
+        Hex hash string, or None if the image could not be hashed
+    """
+    if not file_path or not os.path.exists(file_path):
+        return None
+    
+    try:
+        image_hash = hash_image_file(file_path, config.IMAGE_HASH_METHOD)
+        logger.info(f"Computed {config.IMAGE_HASH_METHOD} {image_hash} for {file_path}")
+        return image_hash
+    except Exception as e:
+        logger.warning(f"Could not hash image {file_path}: {str(e)}")
+        return None
+
 def process_drive_image(drive_url: str) -> tuple[bool, str, str]:
     """
     Process an image from Google Drive
@@ -181,6 +203,7 @@ def process_submission_image(url: str, is_form_data: bool = False) -> dict:
         "success": False,
         "local_path": None,
         "original_url": url,
+        "image_hash": None,
         "message": ""
     }
     
@@ -207,6 +230,9 @@ def process_submission_image(url: str, is_form_data: bool = False) -> dict:
                 result["local_path"] = local_path
             else:
                 result["message"] = local_path  # Error message
+        
+        if result["success"]:
+            result["image_hash"] = compute_image_hash(result["local_path"])
                 
         return result
         
@@ -0,0 +1,130 @@
+"""
+Perceptual image hashing and Hamming-distance search
+"""
+import numpy as np
+from PIL import Image
+
+# Hash size gives hash_size * hash_size bits (64 by default)
+HASH_SIZE = 8
+
+def _grayscale(image: Image.Image, width: int, height: int) -> np.ndarray:
+    """Downsample an image to a grayscale float array"""
+    resized = image.convert("L").resize((width, height), Image.LANCZOS)
+    return np.asarray(resized, dtype=np.float64)
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    value = 0
+    for bit in bits.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+def average_hash(image: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """aHash: each bit says whether a pixel is brighter than the mean"""
+    pixels = _grayscale(image, hash_size, hash_size)
+    return _bits_to_int(pixels > pixels.mean())
+
+def difference_hash(image: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """dHash: each bit says whether a pixel is brighter than its right neighbour"""
+    pixels = _grayscale(image, hash_size + 1, hash_size)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """Orthonormal DCT-II basis matrix"""
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * np.sqrt(2.0 / size)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+def perceptual_hash(image: Image.Image, hash_size: int = HASH_SIZE, highfreq_factor: int = 4) -> int:
+    """pHash: each bit says whether a low-frequency DCT coefficient is above the median"""
+    size = hash_size * highfreq_factor
+    pixels = _grayscale(image, size, size)
+    dct = _dct_matrix(size)
+    coefficients = dct @ pixels @ dct.T
+    low_frequencies = coefficients[:hash_size, :hash_size]
+    return _bits_to_int(low_frequencies > np.median(low_frequencies))
+
+HASH_METHODS = {
+    "ahash": average_hash,
+    "dhash": difference_hash,
+    "phash": perceptual_hash,
+}
+
+def hash_image_file(file_path: str, method: str = "phash") -> str:
+    """Hash an image file and return the hash as a 16-character hex string"""
+    with Image.open(file_path) as image:
+        value = HASH_METHODS[method](image)
+    return f"{value:0{HASH_SIZE * HASH_SIZE // 4}x}"
+
+def hamming_distance(first: int, second: int) -> int:
+    return bin(first ^ second).count("1")
+
+class BKTree:
+    """
+    Burkhard-Keller tree over integer hashes for Hamming-radius queries.
+
+    Each node keeps its children keyed by their distance to it, so a radius
+    query only descends into children whose distance lies within
+    [d - radius, d + radius] of the query's distance to the node.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, value: int, item_id: str):
+        node = [value, [item_id], {}]
+        self.size += 1
+        if self.root is None:
+            self.root = node
+            return
+
+        current = self.root
+        while True:
+            distance = hamming_distance(value, current[0])
+            if distance == 0:
+                # Identical hash: keep every item that produced it
+                current[1].append(item_id)
+                return
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def remove(self, value: int, item_id: str) -> bool:
+        """Remove one item stored under a hash, returning False if it is not in the tree"""
+        current = self.root
+        while current is not None:
+            distance = hamming_distance(value, current[0])
+            if distance == 0:
+                if item_id not in current[1]:
+                    return False
+                # The node stays in place (possibly empty) to keep routing its children
+                current[1].remove(item_id)
+                self.size -= 1
+                return True
+            current = current[2].get(distance)
+        return False
+
+    def query(self, value: int, max_distance: int) -> list:
+        """All (distance, item_id) pairs within max_distance, closest first"""
+        if self.root is None:
+            return []
+
+        matches = []
+        stack = [self.root]
+        while stack:
+            node_value, item_ids, children = stack.pop()
+            distance = hamming_distance(value, node_value)
+            if distance <= max_distance:
+                matches.extend((distance, item_id) for item_id in item_ids)
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+
+        return sorted(matches)
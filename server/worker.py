@@ -0,0 +1,56 @@
+"""
+Standalone ingestion worker for INGESTION_MODE=queue.
+
+The API process only queues new sheet rows in the submissions_jobs table;
+run any number of these workers (on any machine with database access) to
+process them.
+
+Usage:
+    python worker.py [--pool-size 4]
+"""
+import argparse
+import asyncio
+import signal
+
+from db.database import engine
+from db import models
+from services.container import container
+from services.ingestion_worker import IngestionWorker
+from utils.executors import shutdown_executors
+from utils.logger import setup_logger
+import config
+
+# Set up logger
+logger = setup_logger("worker")
+
+async def run(pool_size: int):
+    worker = IngestionWorker(pool_size=pool_size)
+
+    # Finish the current batch on SIGINT/SIGTERM; unfinished jobs are reclaimed after their lease anyway
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, worker.stop)
+
+    await worker.run_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Process queued sheet rows")
+    parser.add_argument("--pool-size", type=int, default=config.INGESTION_WORKER_POOL_SIZE, help="Jobs claimed and processed together")
+    args = parser.parse_args()
+
+    if config.INGESTION_MODE != "queue":
+        logger.warning("INGESTION_MODE is not 'queue': the sync service processes rows itself and will not queue any jobs")
+
+    # Create database tables
+    models.Base.metadata.create_all(bind=engine)
+
+    # Warm up the shared clients and the duplicate index before claiming jobs
+    container.start()
+    try:
+        asyncio.run(run(args.pool_size))
+    finally:
+        shutdown_executors()
+        container.close()
+
+if __name__ == "__main__":
+    main()